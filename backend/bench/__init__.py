@@ -0,0 +1 @@
+# bench package: in-process micro-benchmarks (run as `python -m backend.bench.<name>`)
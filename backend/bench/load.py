@@ -0,0 +1,302 @@
+"""
+In-process load test with per-route latency baselines.
+
+    python -m backend.bench.load [-c CONCURRENCY] [-d SECONDS] [--mix NAME]
+                                 [--baseline PATH] [--save] [--threshold FRACTION]
+
+Drives the ASGI app through httpx's ASGI transport (no sockets, no server
+process) with CONCURRENCY virtual clients, each picking scenarios from a
+weighted mix until the duration is up. Every router is exercised: assessments
+(start, fetch, answer), roadmap (read, refresh), problems (recommended, detail,
+submit and poll attempts), progress, ai (guidance against the fake Ollama from
+backend.dev) and meta. Postgres is replaced by the in-memory repositories
+unless --database-url points at a real one (backend/dev/docker-compose.yml).
+
+Prints throughput and p50/p95/p99 per route. --save writes the numbers to the
+baseline file; otherwise, if the file exists, each route's p95 is compared
+with it and the run fails (exit 1) when one is more than --threshold slower,
+plus --slack-ms so sub-millisecond routes don't flap. Any 5xx also fails it.
+Baselines are machine-specific: record them on the machine that compares.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "var" / "bench" / "load-baseline.json"
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, q: float) -> float:
+        samples = sorted(self.latencies_ms)
+        return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+@dataclass
+class Client:
+    """One virtual user: its own token, plus the state multi-step scenarios carry over."""
+    http: "httpx.AsyncClient"
+    headers: Dict[str, str]
+    stats: Dict[str, RouteStats]
+    rng: random.Random
+    problems: Sequence
+    recording: bool = False
+    assessment_id: Optional[str] = None
+    question_id: Optional[str] = None
+    attempt: Optional[Tuple[str, str]] = None
+    # Like a browser cache: revalidate GETs with the last ETag seen for the path
+    etags: Dict[str, str] = field(default_factory=dict)
+
+    async def call(self, method: str, route: str, path: str, body: Optional[dict] = None) -> Optional[dict]:
+        headers = self.headers
+        etag = self.etags.get(path) if method == "GET" else None
+        if etag is not None:
+            headers = {**headers, "If-None-Match": etag}
+        started = time.perf_counter()
+        resp = await self.http.request(method, path, json=body, headers=headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        if method == "GET" and "etag" in resp.headers:
+            self.etags[path] = resp.headers["etag"]
+        if self.recording:
+            stats = self.stats[f"{method} {route}"]
+            stats.latencies_ms.append(elapsed)
+            if resp.status_code >= 500:
+                stats.errors += 1
+        if resp.status_code >= 300 or not resp.headers.get("content-type", "").startswith("application/json"):
+            return None
+        return resp.json()
+
+
+async def browse_problems(c: Client) -> None:
+    await c.call("GET", "/problems/recommended", f"/problems/recommended?limit={c.rng.choice((5, 10, 20))}")
+    record = c.rng.choice(c.problems)
+    await c.call("GET", "/problems/{problem_id}", f"/problems/{record.problem_id}")
+
+
+async def submit_attempt(c: Client) -> None:
+    record = c.rng.choice(c.problems)
+    code = record.solution if record.solution and c.rng.random() < 0.5 else "def solve(*args):\n    return None\n"
+    resp = await c.call(
+        "POST", "/problems/{problem_id}/attempts", f"/problems/{record.problem_id}/attempts",
+        {"code": code, "language": "python", "time_spent_seconds": c.rng.randint(60, 1800)},
+    )
+    if resp is not None:
+        c.attempt = (record.problem_id, resp["attempt_id"])
+
+
+async def poll_attempt(c: Client) -> None:
+    if c.attempt is None:
+        return await submit_attempt(c)
+    problem_id, attempt_id = c.attempt
+    await c.call(
+        "GET", "/problems/{problem_id}/attempts/{attempt_id}", f"/problems/{problem_id}/attempts/{attempt_id}"
+    )
+
+
+async def roadmap(c: Client) -> None:
+    await c.call("GET", "/roadmap", f"/roadmap?limit={c.rng.choice((10, 20))}")
+
+
+async def refresh_roadmap(c: Client) -> None:
+    await c.call("POST", "/roadmap/refresh", "/roadmap/refresh")
+
+
+async def progress(c: Client) -> None:
+    await c.call("GET", "/progress/overview", "/progress/overview")
+
+
+async def meta(c: Client) -> None:
+    await c.call("GET", "/meta/topics", "/meta/topics")
+
+
+async def guidance(c: Client) -> None:
+    record = c.rng.choice(c.problems)
+    # A few phrasings per problem, so the guidance cache sees both hits and misses
+    message = c.rng.choice(("I'm stuck, where do I start?", "Why is my solution too slow?", "Is this approach right?"))
+    await c.call("POST", "/ai/guidance", "/ai/guidance", {"problem_id": record.problem_id, "user_message": message})
+
+
+async def assessment(c: Client) -> None:
+    """Start an assessment, or answer the next question of the current one."""
+    if c.assessment_id is None:
+        resp = await c.call("POST", "/assessments", "/assessments", {"level": "mixed"})
+        if resp is None:
+            return
+        c.assessment_id = resp["assessment_id"]
+        resp = await c.call("GET", "/assessments/{assessment_id}", f"/assessments/{c.assessment_id}")
+    else:
+        resp = await c.call(
+            "POST", "/assessments/{assessment_id}/answers", f"/assessments/{c.assessment_id}/answers",
+            {"question_id": c.question_id, "answer": c.rng.choice("abcd")},
+        )
+    questions = resp["questions"] if resp else []
+    if not questions or questions[0]["kind"] != "choice":
+        # Done with the adaptive part (open questions aren't graded here): next time start over
+        c.assessment_id = c.question_id = None
+    else:
+        c.question_id = questions[0]["question_id"]
+
+
+Scenario = Callable[[Client], Awaitable[None]]
+
+# name -> [(scenario, weight)]
+MIXES: Dict[str, List[Tuple[Scenario, int]]] = {
+    # Roughly what the web client does: mostly reads, some practice and assessments, a little AI
+    "default": [
+        (browse_problems, 25), (roadmap, 15), (progress, 12), (meta, 5), (submit_attempt, 6),
+        (poll_attempt, 10), (assessment, 15), (refresh_roadmap, 3), (guidance, 9),
+    ],
+    "reads": [(browse_problems, 40), (roadmap, 30), (progress, 20), (meta, 10)],
+    "writes": [(submit_attempt, 30), (poll_attempt, 20), (assessment, 35), (refresh_roadmap, 15)],
+    "ai": [(guidance, 1)],
+}
+
+
+async def _worker(c: Client, mix: List[Tuple[Scenario, int]], deadline: float) -> None:
+    scenarios = [s for s, _ in mix]
+    weights = [w for _, w in mix]
+    while time.perf_counter() < deadline:
+        await c.rng.choices(scenarios, weights)[0](c)
+
+
+async def run(args) -> Tuple[Dict[str, RouteStats], float]:
+    import httpx
+
+    from backend.core.catalog import get_catalog
+    from backend.dev.tokens import mint_token
+    from backend.main import app
+
+    stats: Dict[str, RouteStats] = defaultdict(RouteStats)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        problems = get_catalog().query(limit=10_000)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            clients = [
+                Client(
+                    http=http,
+                    headers={"Authorization": f"Bearer {mint_token(f'bench-user-{i % args.users}')}"},
+                    stats=stats,
+                    rng=random.Random(args.seed + i),
+                    problems=problems,
+                )
+                for i in range(args.concurrency)
+            ]
+            mix = MIXES[args.mix]
+            warm_deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(_worker(c, mix, warm_deadline) for c in clients))
+            for c in clients:
+                c.recording = True
+            started = time.perf_counter()
+            await asyncio.gather(*(_worker(c, mix, started + args.duration) for c in clients))
+            elapsed = time.perf_counter() - started
+    return stats, elapsed
+
+
+def summarize(stats: Dict[str, RouteStats], elapsed: float) -> Dict[str, Dict[str, float]]:
+    return {
+        route: {
+            "count": len(s.latencies_ms),
+            "rps": round(len(s.latencies_ms) / elapsed, 1),
+            "p50_ms": round(s.percentile(0.50), 3),
+            "p95_ms": round(s.percentile(0.95), 3),
+            "p99_ms": round(s.percentile(0.99), 3),
+            "errors": s.errors,
+        }
+        for route, s in sorted(stats.items())
+    }
+
+
+def regressions(current: Dict, baseline: Dict, threshold: float, slack_ms: float) -> List[str]:
+    found = []
+    for route, now in current.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+        limit = before["p95_ms"] * (1 + threshold) + slack_ms
+        if now["p95_ms"] > limit:
+            found.append(f"{route}: p95 {now['p95_ms']:.2f} ms vs baseline {before['p95_ms']:.2f} ms (limit {limit:.2f})")
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.bench.load", description=__doc__.split("\n")[1])
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before that")
+    parser.add_argument("--users", type=int, default=200, help="distinct users the clients take turns being")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-token-ms", type=float, default=1.0, help="fake Ollama per-token delay")
+    parser.add_argument("--database-url", help="run against this Postgres instead of the in-memory repositories")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p95 slowdown, as a fraction")
+    parser.add_argument("--slack-ms", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    from backend.dev.fake_ollama import start_fake_ollama
+
+    # Settings are read once, so the environment has to be in place before the app is imported
+    server, url = start_fake_ollama(0, args.llm_token_ms / 1000)
+    os.environ["OLLAMA_URL"] = url
+    os.environ.setdefault("SUPABASE_JWKS_FILE", str(Path(__file__).resolve().parent.parent / "dev" / "jwks.json"))
+    os.environ["STARTUP_WARMUP"] = "blocking"
+    # A handful of virtual users would hit their per-user limits within seconds; measure capacity instead
+    os.environ.setdefault("RATE_LIMIT_STORE", "off")
+    os.environ["EVENTLOG_DIR"] = tempfile.mkdtemp(prefix="osiris-bench-")
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ.pop("DATABASE_URL", None)
+
+    stats, elapsed = asyncio.run(run(args))
+    server.shutdown()
+    current = summarize(stats, elapsed)
+
+    total = sum(r["count"] for r in current.values())
+    print(f"{args.mix} mix, {args.concurrency} clients, {elapsed:.1f} s: {total} requests, {total / elapsed:.0f} req/s")
+    print(f"{'route':<52} {'count':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'5xx':>5}  (ms)")
+    for route, r in current.items():
+        print(
+            f"{route:<52} {r['count']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} "
+            f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>5}"
+        )
+
+    failed = False
+    if any(r["errors"] for r in current.values()):
+        print("FAIL: server errors")
+        failed = True
+    config = {"mix": args.mix, "concurrency": args.concurrency, "users": args.users, "llm_token_ms": args.llm_token_ms}
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"config": config, "routes": current}, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"] != config:
+            print(f"note: baseline was recorded with {baseline['config']}")
+        found = regressions(current, baseline["routes"], args.threshold, args.slack_ms)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            failed = True
+        else:
+            print(f"no p95 regressions beyond {args.threshold:.0%} (+{args.slack_ms} ms) against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Response serialization: FastAPI's default path vs FastJSONResponse, per endpoint.
+
+    python -m backend.bench.serialization [-n ITERATIONS]
+
+For every route that returns a FastJSONResponse, builds a payload of realistic
+size and times, per call:
+
+- default: what FastAPI does with a returned model (validate against the
+  route's response_model, dump it, render with JSONResponse);
+- fast: FastJSONResponse render.
+
+Prints p50/p99 in microseconds and checks both paths produce the same JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from backend.core.responses import FastJSONResponse
+from backend.main import app
+from backend.models.schemas import (
+    AssessmentGetResponse, AssessmentResultResponse, Difficulty, ProblemDetail, ProblemSummary,
+    ProgressOverview, Question, RoadmapItem, RoadmapResponse, SkillScore, Topic, now_iso
+)
+
+TOPICS = list(Topic)
+DIFFICULTIES = list(Difficulty)
+
+
+def _roadmap() -> RoadmapResponse:
+    items = [
+        RoadmapItem(
+            item_id=uuid4(),
+            topic=TOPICS[i % len(TOPICS)],
+            difficulty=DIFFICULTIES[i % len(DIFFICULTIES)],
+            problem_id=f"problem-{i}",
+            title=f"Practice problem number {i}",
+            rationale="Dynamic programming is a weak spot (skill 0.41); you should solve this about 70% of the time.",
+        )
+        for i in range(100)
+    ]
+    return RoadmapResponse(user_id="bench-user", generated_at=now_iso(), items=items)
+
+
+def _recommended() -> List[ProblemSummary]:
+    return [
+        ProblemSummary(
+            problem_id=f"problem-{i}",
+            title=f"Practice problem number {i}",
+            topic=TOPICS[i % len(TOPICS)],
+            difficulty=DIFFICULTIES[i % len(DIFFICULTIES)],
+        )
+        for i in range(50)
+    ]
+
+
+def _problem() -> ProblemDetail:
+    return ProblemDetail(
+        problem_id="two-sum",
+        title="Two Sum",
+        topic=Topic.hashing,
+        difficulty=Difficulty.easy,
+        statement="Given an array of integers nums and an integer target, return indices of two numbers "
+        "such that they add up to target. " * 3,
+        constraints=["2 <= nums.length <= 10^4", "-10^9 <= nums[i] <= 10^9"],
+        examples=[{"input": {"nums": list(range(20)), "target": 9}, "output": [0, 9]} for _ in range(3)],
+    )
+
+
+def _overview() -> ProgressOverview:
+    return ProgressOverview(
+        user_id="bench-user",
+        generated_at=now_iso(),
+        problems_completed=42,
+        total_attempts=180,
+        current_streak_days=6,
+        strongest_topics=TOPICS[:3],
+        weakest_topics=TOPICS[-3:],
+    )
+
+
+def _assessment() -> AssessmentGetResponse:
+    question = Question(
+        question_id=uuid4(),
+        topic=Topic.graphs,
+        difficulty=Difficulty.medium,
+        prompt="Dijkstra's algorithm with a binary heap runs in:",
+        choices=["O((V + E) log V)", "O(V + E)", "O(V^3)", "O(E^2)"],
+    )
+    return AssessmentGetResponse(assessment_id=uuid4(), created_at=now_iso(), questions=[question], answered=4)
+
+
+def _result() -> AssessmentResultResponse:
+    profile = [SkillScore(topic=t, score=0.5, confidence=0.6) for t in TOPICS]
+    return AssessmentResultResponse(
+        assessment_id=uuid4(),
+        submitted_at=now_iso(),
+        overall_score=0.5,
+        skill_profile=profile,
+        recommended_focus=TOPICS[:3],
+    )
+
+
+# (method, path) -> payload factory
+PAYLOADS: Dict[Tuple[str, str], Callable[[], Any]] = {
+    ("GET", "/roadmap"): _roadmap,
+    ("POST", "/roadmap/refresh"): _roadmap,
+    ("GET", "/problems/recommended"): _recommended,
+    ("GET", "/problems/{problem_id}"): _problem,
+    ("GET", "/progress/overview"): _overview,
+    ("GET", "/assessments/{assessment_id}"): _assessment,
+    ("GET", "/assessments/{assessment_id}/result"): _result,
+}
+
+
+def _route(method: str, path: str) -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route
+    raise LookupError(f"no route {method} {path}")
+
+
+def _percentiles(samples_ns: List[int]) -> Tuple[float, float]:
+    samples = sorted(samples_ns)
+    return samples[len(samples) // 2] / 1000, samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000
+
+
+async def _default_path(route: APIRoute, payload: Any) -> bytes:
+    content = await serialize_response(field=route.response_field, response_content=payload, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def run(iterations: int) -> List[Tuple[str, float, float, float, float]]:
+    rows = []
+    for (method, path), factory in PAYLOADS.items():
+        route = _route(method, path)
+        payload = factory()
+        default_body = await _default_path(route, payload)
+        fast_body = FastJSONResponse(payload).body
+        if json.loads(default_body) != json.loads(fast_body):
+            raise AssertionError(f"{method} {path}: fast path output differs")
+
+        default_ns, fast_ns = [], []
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            await _default_path(route, payload)
+            default_ns.append(time.perf_counter_ns() - started)
+            started = time.perf_counter_ns()
+            FastJSONResponse(payload)
+            fast_ns.append(time.perf_counter_ns() - started)
+        rows.append((f"{method} {path}", *_percentiles(default_ns), *_percentiles(fast_ns)))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.bench.serialization", description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"{'endpoint':<42} {'default p50':>12} {'p99':>9} {'fast p50':>10} {'p99':>9}  (us)")
+    for name, d50, d99, f50, f99 in asyncio.run(run(args.iterations)):
+        print(f"{name:<42} {d50:>12.1f} {d99:>9.1f} {f50:>10.1f} {f99:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
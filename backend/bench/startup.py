@@ -0,0 +1,130 @@
+"""
+Cold start: import-time profile and time to the first /health response.
+
+    python -m backend.bench.startup [--budget-ms MS] [--runs N] [--top N]
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. Prints:
+
+- the import-time profile of `backend.main` (from `python -X importtime`),
+  self time summed per package, slowest first;
+- the cold start: process spawn to the first /health response, split into
+  imports, lifespan startup and the request itself (best of --runs).
+
+Exits 1 when the cold start exceeds --budget-ms, so CI can run it as a check.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Spawn to first /health is ~0.45 s on a dev machine; the budget leaves headroom for slow CI
+DEFAULT_BUDGET_MS = 1000
+
+# Runs in the child: the app is served through its ASGI interface directly so
+# no HTTP client import ends up in the measurement
+_COLD_START = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from backend.main import app
+t1 = time.perf_counter()
+
+async def main():
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        await app(scope, receive, send)
+        t3 = time.perf_counter()
+        print(json.dumps({
+            "status": messages[0]["status"],
+            "import_ms": (t1 - t0) * 1000,
+            "startup_ms": (t2 - t1) * 1000,
+            "request_ms": (t3 - t2) * 1000,
+        }), flush=True)
+
+asyncio.run(main())
+"""
+
+
+def _group(module: str) -> str:
+    parts = module.split(".")
+    # Our own modules are reported individually, third-party ones per package
+    return ".".join(parts[:3]) if parts[0] == "backend" else parts[0]
+
+
+def import_profile() -> List[Tuple[str, float]]:
+    """(package, self milliseconds) for everything `import backend.main` loads."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        capture_output=True, text=True, check=True,
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        totals[_group(name.strip())] += int(self_us) / 1000
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def cold_start() -> Dict[str, float]:
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", _COLD_START], stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    total_ms = (time.perf_counter() - start) * 1000
+    proc.wait()
+    if not line:
+        raise RuntimeError(f"cold start child exited with {proc.returncode}")
+    result = json.loads(line)
+    result["total_ms"] = total_ms
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.bench.startup", description=__doc__.split("\n")[1])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+    os.environ.setdefault("PYTHONPATH", os.getcwd())
+
+    profile = import_profile()
+    total_import = sum(ms for _, ms in profile)
+    print(f"import backend.main: {total_import:.0f} ms self time over {len(profile)} packages")
+    print(f"  {'package':<36} {'ms':>8} {'share':>6}")
+    for name, ms in profile[:args.top]:
+        print(f"  {name:<36} {ms:8.1f} {ms / total_import:6.1%}")
+
+    runs = [cold_start() for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda r: r["total_ms"])
+    print(
+        f"\ncold start to first /health (best of {len(runs)}): {best['total_ms']:.0f} ms "
+        f"[imports {best['import_ms']:.0f}, startup {best['startup_ms']:.0f}, "
+        f"request {best['request_ms']:.1f}, interpreter {best['total_ms'] - best['import_ms'] - best['startup_ms'] - best['request_ms']:.0f}]"
+    )
+    if best["status"] != 200:
+        print(f"FAIL: /health answered {best['status']}")
+        return 1
+    if best["total_ms"] > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        return 1
+    print(f"ok: within the {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
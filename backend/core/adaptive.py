@@ -0,0 +1,325 @@
+"""
+Adaptive assessments (computerized adaptive testing).
+
+Instead of a fixed form, an assessment asks one question at a time from a
+calibrated bank (backend/data/questions.jsonl). Every item has a 2PL IRT
+calibration: difficulty `b` and discrimination `a` on the same logit scale as
+the skill engine. Multiple-choice answers are graded on the spot and folded
+into the user's skill profile straight away, and the next question is:
+
+- for the assessed topic we know least about (largest ability variance),
+- the unused item that is most informative at the current ability estimate,
+  where information is a^2 p (1 - p) with p = sigmoid(a (theta - b)).
+
+Item information only depends on theta, so it is precomputed: for each topic
+and each point of a fixed theta grid, the bank keeps its TABLE_DEPTH most
+informative items in descending order. Picking the next item is a grid lookup
+plus a walk past the items already used, independent of the bank size. The
+adaptive phase stops once every topic's confidence reaches the target, or
+after `max_questions`.
+
+It is followed by `open_questions` open-ended items (code to run against
+tests, or a conceptual answer) for the least-known topics. Those can't be
+graded instantly; their answers are collected and handed to the grading
+pipeline (backend.core.grading) when the assessment is submitted.
+"""
+
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+import numpy as np
+
+from backend.core.config import get_settings
+from backend.core.skills import TOPIC_INDEX, TOPICS, SkillEngine, get_skill_engine
+from backend.models.schemas import Difficulty, Question, Topic
+
+DEFAULT_BANK_PATH = Path(__file__).resolve().parent.parent / "data" / "questions.jsonl"
+
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+TABLE_DEPTH = 32
+
+CHOICE_LETTERS = "abcdefghij"
+
+# Item kinds
+CHOICE = "choice"
+CODE = "code"
+CONCEPT = "concept"
+
+
+@dataclass(frozen=True)
+class BankItem:
+    question_id: UUID
+    topic: Topic
+    difficulty: Difficulty
+    a: float
+    b: float
+    prompt: str
+    kind: str = CHOICE
+    choices: Tuple[str, ...] = ()
+    # Grading data; never sent to clients
+    answer: int = -1  # index into choices
+    entry_point: Optional[str] = None
+    tests: Tuple[Dict[str, Any], ...] = ()
+    rubric: Optional[str] = None
+
+    @property
+    def question(self) -> Question:
+        return Question(
+            question_id=self.question_id,
+            topic=self.topic,
+            difficulty=self.difficulty,
+            prompt=self.prompt,
+            kind=self.kind,
+            choices=list(self.choices) if self.kind == CHOICE else None,
+        )
+
+    def grade(self, answer: str) -> float:
+        """1.0 if `answer` picks the right choice (by index, letter or text), else 0.0."""
+        answer = answer.strip().lower()
+        if answer.isdigit():
+            picked = int(answer)
+        elif len(answer) == 1 and answer in CHOICE_LETTERS:
+            picked = CHOICE_LETTERS.index(answer)
+        else:
+            picked = next((i for i, c in enumerate(self.choices) if c.strip().lower() == answer), -1)
+        return 1.0 if picked == self.answer else 0.0
+
+
+def item_from_dict(raw: Dict) -> BankItem:
+    return BankItem(
+        question_id=uuid5(NAMESPACE_URL, f"osiris/questions/{raw['key']}"),
+        topic=Topic(raw["topic"]),
+        difficulty=Difficulty(raw["difficulty"]),
+        a=float(raw["a"]),
+        b=float(raw["b"]),
+        prompt=raw["prompt"],
+        kind=raw.get("kind", CHOICE),
+        choices=tuple(raw.get("choices", ())),
+        answer=int(raw.get("answer", -1)),
+        entry_point=raw.get("entry_point"),
+        tests=tuple(raw.get("tests", ())),
+        rubric=raw.get("rubric"),
+    )
+
+
+def information(theta, a, b):
+    """Fisher information of 2PL items at ability `theta` (numpy-broadcast)."""
+    p = 1.0 / (1.0 + np.exp(a * (b - theta)))
+    return a * a * p * (1.0 - p)
+
+
+class ItemBank:
+    def __init__(self, items: Iterable[BankItem], depth: int = TABLE_DEPTH):
+        self.items: List[BankItem] = list(items)
+        self.positions: Dict[UUID, int] = {item.question_id: i for i, item in enumerate(self.items)}
+        self._a = np.array([item.a for item in self.items], dtype=np.float64)
+        self._b = np.array([item.b for item in self.items], dtype=np.float64)
+        self._grid = THETA_GRID.tolist()
+        topic_of = np.array([TOPIC_INDEX[item.topic] for item in self.items], dtype=np.int64)
+        is_choice = np.array([item.kind == CHOICE for item in self.items], dtype=bool)
+        # Per topic: multiple-choice positions and, per grid point, the top ones by information
+        self._by_topic: List[np.ndarray] = []
+        self._tables: List[List[List[int]]] = []
+        # Per topic: open-ended (code/concept) positions
+        self._open: List[List[int]] = []
+        for col in range(len(TOPICS)):
+            self._open.append(np.flatnonzero((topic_of == col) & ~is_choice).tolist())
+            members = np.flatnonzero((topic_of == col) & is_choice)
+            self._by_topic.append(members)
+            if not len(members):
+                self._tables.append([[] for _ in self._grid])
+                continue
+            info = information(THETA_GRID[:, None], self._a[members], self._b[members])  # grid x items
+            k = min(depth, len(members))
+            top = np.argpartition(-info, k - 1, axis=1)[:, :k]
+            top_info = np.take_along_axis(info, top, axis=1)
+            ranked = np.take_along_axis(top, np.argsort(-top_info, axis=1, kind="stable"), axis=1)
+            self._tables.append(members[ranked].tolist())
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, question_id: UUID) -> Optional[BankItem]:
+        pos = self.positions.get(question_id)
+        return None if pos is None else self.items[pos]
+
+    def _grid_point(self, theta: float) -> int:
+        i = bisect.bisect_left(self._grid, theta)
+        if i == 0:
+            return 0
+        if i == len(self._grid):
+            return i - 1
+        return i if self._grid[i] - theta < theta - self._grid[i - 1] else i - 1
+
+    def next_item(self, topic: Topic, theta: float, used: Set[int]) -> Optional[int]:
+        """Bank position of the most informative unused item for `topic` at `theta`."""
+        col = TOPIC_INDEX[topic]
+        for pos in self._tables[col][self._grid_point(theta)]:
+            if pos not in used:
+                return pos
+        # Everything in the table was used: fall back to an exact scan of the topic
+        members = self._by_topic[col]
+        free = np.array([pos for pos in members.tolist() if pos not in used], dtype=np.int64)
+        if not len(free):
+            return None
+        return int(free[np.argmax(information(theta, self._a[free], self._b[free]))])
+
+    def open_item(self, topic: Topic, theta: float, used: Set[int]) -> Optional[int]:
+        """Most informative unused open-ended item for `topic`, if the bank has one."""
+        free = [pos for pos in self._open[TOPIC_INDEX[topic]] if pos not in used]
+        if not free:
+            return None
+        return max(free, key=lambda pos: float(information(theta, self._a[pos], self._b[pos])))
+
+
+def load_bank(path: Path) -> ItemBank:
+    with path.open("r", encoding="utf-8") as f:
+        return ItemBank(item_from_dict(json.loads(line)) for line in f if line.strip())
+
+
+@dataclass
+class AssessmentSession:
+    assessment_id: UUID
+    user_id: str
+    topics: List[Topic]
+    used: Set[int] = field(default_factory=set)  # bank positions asked so far
+    pending: Optional[int] = None  # multiple-choice question asked, not answered yet
+    answered: int = 0
+    adaptive_done: bool = False
+    open_items: List[int] = field(default_factory=list)
+    open_answers: Dict[int, str] = field(default_factory=dict)  # collected, graded on submit
+    done: bool = False
+
+
+class AdaptiveAssessments:
+    def __init__(
+        self,
+        bank: ItemBank,
+        skills: SkillEngine,
+        target_confidence: float,
+        max_questions: int,
+        open_questions: int = 0,
+        max_sessions: int = 10_000,
+    ):
+        self.bank = bank
+        self.skills = skills
+        self.target_confidence = target_confidence
+        self.max_questions = max_questions
+        self.open_questions = open_questions
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[UUID, AssessmentSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, assessment_id: UUID, user_id: str, topics: List[Topic]) -> AssessmentSession:
+        session = AssessmentSession(assessment_id=assessment_id, user_id=user_id, topics=list(topics))
+        with self._lock:
+            self._sessions[assessment_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, assessment_id: UUID) -> Optional[AssessmentSession]:
+        return self._sessions.get(assessment_id)
+
+    def next_questions(self, session: AssessmentSession) -> List[BankItem]:
+        """The question(s) to show now; empty once the assessment is done."""
+        with self._lock:
+            if session.pending is not None:
+                return [self.bank.items[session.pending]]
+            if session.done:
+                return []
+            if not session.adaptive_done:
+                pos = self._next_adaptive(session)
+                if pos is not None:
+                    session.used.add(pos)
+                    session.pending = pos
+                    return [self.bank.items[pos]]
+                session.adaptive_done = True
+                session.open_items = self._pick_open(session)
+                session.used.update(session.open_items)
+            return [self.bank.items[pos] for pos in session.open_items if pos not in session.open_answers]
+
+    def _next_adaptive(self, session: AssessmentSession) -> Optional[int]:
+        if session.answered >= self.max_questions:
+            return None
+        theta, var = self.skills.vector(session.user_id)
+        confidence = np.clip(1.0 - var / self.skills.model.prior_variance, 0.0, 1.0)
+        # Least-known topics first; skip those already confident enough
+        for topic in sorted(session.topics, key=lambda t: -var[TOPIC_INDEX[t]]):
+            col = TOPIC_INDEX[topic]
+            if confidence[col] >= self.target_confidence:
+                continue
+            pos = self.bank.next_item(topic, float(theta[col]), session.used)
+            if pos is not None:
+                return pos
+        return None
+
+    def _pick_open(self, session: AssessmentSession) -> List[int]:
+        theta, var = self.skills.vector(session.user_id)
+        picked: List[int] = []
+        for topic in sorted(session.topics, key=lambda t: -var[TOPIC_INDEX[t]]):
+            if len(picked) >= self.open_questions:
+                break
+            pos = self.bank.open_item(topic, float(theta[TOPIC_INDEX[topic]]), session.used)
+            if pos is not None:
+                picked.append(pos)
+        return picked
+
+    def answer(self, session: AssessmentSession, question_id: UUID, answer: str) -> bool:
+        """
+        Take the answer to a question currently shown. Multiple-choice answers are
+        graded and update the skill profile now; open-ended ones wait for `finish`.
+        False if the question isn't one that is waiting for an answer.
+        """
+        with self._lock:
+            pos = self.bank.positions.get(question_id)
+            if pos is None or session.done:
+                return False
+            if pos in session.open_items and pos not in session.open_answers:
+                session.open_answers[pos] = answer
+                session.answered += 1
+                return True
+            if pos != session.pending:
+                return False
+            session.pending = None
+            session.answered += 1
+        self.observe(session.user_id, self.bank.items[pos], self.bank.items[pos].grade(answer))
+        return True
+
+    def observe(self, user_id: str, item: BankItem, outcome: float) -> None:
+        self.skills.observe(user_id, item.topic, item.difficulty, outcome, b=item.b, a=item.a)
+
+    def finish(self, session: AssessmentSession) -> List[Tuple[BankItem, str]]:
+        """Close the assessment; returns the open-ended answers still to be graded."""
+        with self._lock:
+            session.pending = None
+            session.done = True
+            collected, session.open_answers = session.open_answers, {}
+        return [(self.bank.items[pos], answer) for pos, answer in collected.items()]
+
+
+_assessments: Optional[AdaptiveAssessments] = None
+_assessments_lock = threading.Lock()
+
+
+def get_adaptive_assessments() -> AdaptiveAssessments:
+    global _assessments
+    if _assessments is None:
+        with _assessments_lock:
+            if _assessments is None:
+                settings = get_settings()
+                path = Path(settings.assessment_bank_path) if settings.assessment_bank_path else DEFAULT_BANK_PATH
+                _assessments = AdaptiveAssessments(
+                    load_bank(path),
+                    get_skill_engine(),
+                    target_confidence=settings.assessment_target_confidence,
+                    max_questions=settings.assessment_max_questions,
+                    open_questions=settings.assessment_open_questions,
+                )
+    return _assessments
@@ -0,0 +1,227 @@
+"""
+Attempt evaluation off the request path.
+
+POST /problems/{id}/attempts only enqueues a job and returns 202; a pool of
+worker tasks runs the hidden tests in the sandbox and records the verdict,
+which clients poll via GET /problems/{id}/attempts/{attempt_id}. Request
+latency therefore no longer depends on how long the submitted code runs.
+Finished jobs are kept (bounded, oldest first out) so late polls still resolve.
+Each graded attempt also updates the user's skill profile (backend.core.skills),
+and every finished attempt is published as an attempt.graded event and saved
+through the attempt repository (backend.database.repositories).
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional
+from uuid import UUID, uuid4
+
+from backend.core.catalog import get_catalog
+from backend.core.config import get_settings
+from backend.core.events import ATTEMPT_GRADED, get_event_bus
+from backend.core.sandbox import SandboxError, get_sandbox
+from backend.core.skills import get_skill_engine
+from backend.core.tracing import NOOP_SPAN, activate, span, start_span
+from backend.database.pool import DatabaseUnavailable
+from backend.database.repositories import AttemptRecord, get_repositories
+from backend.models.schemas import AttemptSubmitRequest, AttemptSubmitResponse, SkillScore, now_iso
+
+logger = logging.getLogger(__name__)
+
+PENDING_FEEDBACK = {
+    "queued": "Attempt queued for evaluation.",
+    "running": "Running your code against the hidden tests.",
+}
+
+
+class AttemptQueueFull(Exception):
+    pass
+
+
+@dataclass
+class AttemptJob:
+    attempt_id: UUID
+    user_id: str
+    problem_id: str
+    payload: AttemptSubmitRequest
+    submitted_at: str = field(default_factory=now_iso)
+    verdict: str = "queued"
+    feedback: str = PENDING_FEEDBACK["queued"]
+    done: bool = False
+    score: Optional[float] = None  # fraction of tests passed, when graded
+    skill_profile: Optional[List[SkillScore]] = None
+    # Opened by the submitting request and ended once graded, so its trace spans queue wait and evaluation
+    trace_span: Any = field(default=NOOP_SPAN, repr=False)
+    enqueued_at: float = field(default_factory=time.monotonic, repr=False)
+
+    def to_response(self) -> AttemptSubmitResponse:
+        return AttemptSubmitResponse(
+            attempt_id=self.attempt_id,
+            submitted_at=self.submitted_at,
+            verdict=self.verdict,
+            feedback=self.feedback,
+            updated_skill_profile=self.skill_profile,
+        )
+
+
+async def evaluate(job: AttemptJob) -> None:
+    record = get_catalog().get(job.problem_id)
+    if record is None or not record.tests or job.payload.language.lower() != "python":
+        job.verdict = "received"
+        job.feedback = "Attempt received. No automated tests are available for this problem/language yet."
+        return
+
+    timeout = get_settings().attempt_eval_timeout_seconds
+    try:
+        async with asyncio.timeout(timeout):
+            result = await get_sandbox().run(job.payload.code, record.entry_point, list(record.tests))
+    except asyncio.TimeoutError:
+        job.verdict = "timed_out"
+        job.feedback = f"The code runner did not finish evaluating this attempt within {timeout:g}s. Please resubmit."
+        return
+    except SandboxError:
+        job.verdict = "internal_error"
+        job.feedback = "The code runner failed while evaluating this attempt. Please resubmit."
+        return
+    job.verdict = result.verdict
+    job.feedback = result.feedback
+    job.score = result.score
+    if result.score is not None:
+        with span("skills.update", **{"skills.topic": record.detail.topic}):
+            skills = get_skill_engine()
+            await skills.hydrate(job.user_id)
+            submitted = datetime.fromisoformat(job.submitted_at).timestamp()
+            skills.observe(job.user_id, record.detail.topic, record.detail.difficulty, result.score, at=submitted)
+            job.skill_profile = skills.profile(job.user_id)
+
+
+async def persist(job: AttemptJob) -> None:
+    record = AttemptRecord(
+        user_id=job.user_id,
+        problem_id=job.problem_id,
+        language=job.payload.language,
+        score=job.score,
+        response=job.to_response().model_copy(update={"updated_skill_profile": None}),
+    )
+    repos = get_repositories()
+    try:
+        await repos.attempts.save(record)
+        if job.skill_profile:
+            # What the next process seeds this user from (SkillEngine.hydrate)
+            await repos.skills.save(job.user_id, job.skill_profile)
+    except DatabaseUnavailable as exc:
+        # The attempt.submitted event is already in the durable event log
+        logger.warning("could not save attempt %s: %s", job.attempt_id, exc)
+    except Exception:
+        logger.exception("could not save attempt %s", job.attempt_id)
+
+
+class AttemptQueue:
+    def __init__(self, workers: int, max_queue: int, retention: int):
+        self.workers = workers
+        self.retention = retention
+        self.max_queue = max_queue
+        self._queue: "asyncio.Queue[AttemptJob]" = asyncio.Queue(maxsize=max_queue)
+        self._reserved = 0  # slots held by submissions still being logged
+        self._jobs: "OrderedDict[UUID, AttemptJob]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def reserve(self) -> UUID:
+        """Hold a queue slot for an attempt and return its id; the caller then `submit`s it or `release`s it."""
+        if self._queue.qsize() + self._reserved >= self.max_queue:
+            raise AttemptQueueFull()
+        self._reserved += 1
+        return uuid4()
+
+    def release(self) -> None:
+        self._reserved -= 1
+
+    def submit(self, attempt_id: UUID, user_id: str, problem_id: str, payload: AttemptSubmitRequest) -> AttemptJob:
+        """Enqueue a reserved attempt; never full, since the slot was held since `reserve`."""
+        self._ensure_workers()
+        job = AttemptJob(attempt_id=attempt_id, user_id=user_id, problem_id=problem_id, payload=payload)
+        self._reserved -= 1
+        self._queue.put_nowait(job)
+        job.trace_span = start_span("attempt.evaluate", **{"attempt.id": str(job.attempt_id)})
+        self._jobs[job.attempt_id] = job
+        # Evict the oldest finished jobs; unfinished ones stay however old they are
+        excess = len(self._jobs) - self.retention
+        if excess > 0:
+            evict = list(itertools.islice((old_id for old_id, old in self._jobs.items() if old.done), excess))
+            for old_id in evict:
+                del self._jobs[old_id]
+        return job
+
+    def get(self, attempt_id: UUID) -> Optional[AttemptJob]:
+        return self._jobs.get(attempt_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            # Workers outlive the request that started them; run each job in its own request's trace
+            with activate(job.trace_span):
+                await self._process(job)
+            self._queue.task_done()
+
+    async def _process(self, job: AttemptJob) -> None:
+        job.trace_span.set("attempt.queue_wait_ms", round((time.monotonic() - job.enqueued_at) * 1000, 3))
+        job.verdict, job.feedback = "running", PENDING_FEEDBACK["running"]
+        try:
+            await evaluate(job)
+        except Exception:
+            job.verdict = "internal_error"
+            job.feedback = "Evaluation failed unexpectedly. Please resubmit."
+        finally:
+            job.done = True
+            # Drop the code once graded; only the verdict needs to stay around
+            job.payload = job.payload.model_copy(update={"code": ""})
+            get_event_bus().publish(
+                ATTEMPT_GRADED,
+                user_id=job.user_id,
+                attempt_id=job.attempt_id,
+                problem_id=job.problem_id,
+                verdict=job.verdict,
+                score=job.score,
+                at=datetime.fromisoformat(job.submitted_at).timestamp(),
+            )
+            await persist(job)
+            job.trace_span.set("attempt.verdict", job.verdict)
+            job.trace_span.end()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+_queue: Optional[AttemptQueue] = None
+
+
+def get_attempt_queue() -> AttemptQueue:
+    global _queue
+    if _queue is None:
+        settings = get_settings()
+        _queue = AttemptQueue(
+            workers=settings.attempt_workers,
+            max_queue=settings.attempt_max_queue,
+            retention=settings.attempt_retention,
+        )
+    return _queue
+
+
+async def stop_attempt_queue() -> None:
+    if _queue is not None:
+        await _queue.stop()
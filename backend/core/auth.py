@@ -1,12 +1,237 @@
-from typing import Optional
+"""
+Supabase JWT verification.
+
+Tokens are verified locally: signature + expiry are checked against a JWKS key
+set that is loaded once and refreshed by a background thread, so no network
+round trip happens on the request path. Tokens that already verified are kept
+in a bounded LRU (keyed by the token's SHA-256) until their `exp`, which makes
+repeat requests from the same session a hash + dict lookup.
+
+Legacy Supabase projects that still sign with the shared HS256 secret are
+supported through SUPABASE_JWT_SECRET.
+
+PyJWT (and the ~70 ms of `cryptography` it loads) is imported on the first
+key load or token decode rather than at start-up; warm-up does the key load.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
 from fastapi import HTTPException, status
 
+from backend.core.config import Settings, get_settings
+from backend.core.tracing import span
+
+if TYPE_CHECKING:
+    import jwt
+
+# Asymmetric algorithms Supabase signs with; anything else in a JWKS is ignored
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+# Unknown `kid`s trigger an early refresh, but never more often than this
+MIN_REFRESH_INTERVAL_SECONDS = 30.0
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+class JWKSCache:
+    """In-memory JWKS key set with background refresh."""
+
+    def __init__(self, url: Optional[str], path: Optional[str], refresh_seconds: int):
+        self.url = url
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._keys: Dict[Optional[str], jwt.PyJWK] = {}
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._load_lock = threading.Lock()
+        self._kick = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url or self.path)
+
+    def _fetch(self) -> dict:
+        if self.path:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        with urllib.request.urlopen(self.url, timeout=5) as resp:
+            return json.loads(resp.read())
+
+    def refresh(self) -> None:
+        import jwt
+
+        keys: Dict[Optional[str], jwt.PyJWK] = {}
+        for jwk in self._fetch().get("keys", []):
+            try:
+                key = jwt.PyJWK(jwk)
+            except jwt.PyJWKError:
+                continue
+            if key.algorithm_name in ASYMMETRIC_ALGORITHMS:
+                keys[jwk.get("kid")] = key
+        # Swap the whole dict so readers never see a half-built key set
+        self._keys = keys
+        self._last_refresh = time.monotonic()
+
+    def load(self) -> None:
+        """Blocking first load; afterwards refreshes happen in the background."""
+        with self._load_lock:
+            if self._loaded or not self.configured:
+                return
+            self.refresh()
+            self._loaded = True
+            self._thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            self._kick.wait(timeout=self.refresh_seconds)
+            self._kick.clear()
+            wait = MIN_REFRESH_INTERVAL_SECONDS - (time.monotonic() - self._last_refresh)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the last good key set; try again next cycle
+                pass
+
+    def get(self, kid: Optional[str]) -> Optional["jwt.PyJWK"]:
+        if not self._loaded:
+            self.load()
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+        if key is None:
+            # Possibly a rotated signing key: ask the refresher to look now
+            self._kick.set()
+        return key
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token digest -> (user_id, exp)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, exp = entry
+            if exp <= now:
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return user_id
+
+    def put(self, digest: bytes, user_id: str, exp: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (user_id, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenVerifier:
+    def __init__(self, settings: Settings):
+        self.audience = settings.jwt_audience
+        self.secret = settings.jwt_secret
+        self.jwks = JWKSCache(settings.jwks_url, settings.jwks_file, settings.jwks_refresh_seconds)
+        self.cache = VerifiedTokenCache(settings.token_cache_size)
+
+    def verify(self, token: str) -> str:
+        """Return the user id (`sub`) of a valid token or raise 401."""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+        user_id = self.cache.get(digest, now)
+        if user_id is not None:
+            return user_id
+
+        claims = self._decode(token)
+        user_id = str(claims["sub"])
+        self.cache.put(digest, user_id, float(claims["exp"]))
+        return user_id
+
+    def _decode(self, token: str) -> dict:
+        import jwt
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            raise _unauthorized("Malformed token")
+
+        alg = header.get("alg")
+        if alg == "HS256" and self.secret:
+            key = self.secret
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            if not self.jwks.configured:
+                raise _unauthorized("No JWKS configured for token verification")
+            try:
+                jwk = self.jwks.get(header.get("kid"))
+            except (OSError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Token signing keys unavailable",
+                )
+            if jwk is None or jwk.algorithm_name != alg:
+                raise _unauthorized("Unknown signing key")
+            key = jwk.key
+        else:
+            raise _unauthorized("Unsupported token algorithm")
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[alg],
+                audience=self.audience,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.ExpiredSignatureError:
+            raise _unauthorized("Token expired")
+        except jwt.InvalidTokenError:
+            raise _unauthorized("Invalid token")
+
+
+_verifier: Optional[TokenVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def get_verifier() -> TokenVerifier:
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier(get_settings())
+    return _verifier
+
+
 def require_user(authorization: Optional[str]) -> str:
     """
-    Placeholder auth gate.
+    Auth gate for every protected route.
 
-    Expected: "Bearer <jwt>"
-    TODO: Verify Supabase JWT and return user_id/sub.
+    Expected: "Bearer <jwt>" (a Supabase access token). Returns the user_id (`sub`).
     """
     if not authorization:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Authorization header")
@@ -16,5 +241,5 @@ def require_user(authorization: Optional[str]) -> str:
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Empty token")
 
-    # TEMP: treat token as user_id for local testing
-    return token
+    with span("auth"):
+        return get_verifier().verify(token)
@@ -0,0 +1,242 @@
+"""
+In-memory problem catalog.
+
+The catalog file (JSONL, or the compact .osc format written by
+`python -m backend.ingest`) is loaded once into an immutable CatalogSnapshot:
+
+- `positions` gives O(1) lookup by problem id; ProblemDetail/ProblemSummary
+  are built once per problem, on first access;
+- a (topic, difficulty) inverted index maps every filter combination
+  (including "any") to a sorted array of catalog positions, so a filtered
+  top-N query is a slice of that array instead of a scan.
+
+Reloads build a complete new snapshot and then swap one reference, so readers
+always see either the old or the new catalog, never a mix. A background thread
+watches the file's mtime and reloads when it changes; a reload is announced on
+the cross-worker invalidation bus, which makes the other workers' watchers
+check their file right away instead of at their next poll.
+"""
+
+import json
+import threading
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.catalog_file import CatalogFile, is_catalog_file
+from backend.core.config import get_settings
+from backend.core.invalidation import get_invalidation_bus
+from backend.core.responses import CachedBody
+from backend.models.schemas import Difficulty, ProblemDetail, ProblemSummary, Topic
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent.parent / "data" / "problems.jsonl"
+
+IndexKey = Tuple[Optional[Topic], Optional[Difficulty]]
+
+BUS_TOPIC = "catalog"
+
+
+@dataclass(frozen=True)
+class ProblemRecord:
+    detail: ProblemDetail
+    summary: ProblemSummary
+    # Evaluation data; never sent to clients
+    entry_point: Optional[str]
+    tests: Tuple[Dict[str, Any], ...]
+    solution: Optional[str]
+
+    @property
+    def problem_id(self) -> str:
+        return self.detail.problem_id
+
+    @cached_property
+    def detail_json(self) -> CachedBody:
+        """GET /problems/{id} body and ETag; rendered once per snapshot, on first read."""
+        return CachedBody(self.detail)
+
+
+def record_from_dict(raw: Dict[str, Any]) -> ProblemRecord:
+    detail = ProblemDetail(
+        problem_id=raw["problem_id"],
+        title=raw["title"],
+        topic=raw["topic"],
+        difficulty=raw["difficulty"],
+        statement=raw["statement"],
+        constraints=raw.get("constraints", []),
+        examples=raw.get("examples", []),
+    )
+    summary = ProblemSummary(
+        problem_id=detail.problem_id,
+        title=detail.title,
+        topic=detail.topic,
+        difficulty=detail.difficulty,
+        source=raw.get("source", "internal"),
+    )
+    return ProblemRecord(
+        detail=detail,
+        summary=summary,
+        entry_point=raw.get("entry_point"),
+        tests=tuple(raw.get("tests", ())),
+        solution=raw.get("solution"),
+    )
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of one catalog version.
+
+    Only ids, topics/difficulties and the index are needed up front; full
+    records come from `loader` on first access (a list lookup for JSONL, a
+    decode from the mmap for .osc files).
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        index: Dict[IndexKey, array],
+        loader: Callable[[int], ProblemRecord],
+        version: str = "",
+    ):
+        self.version = version
+        self.ids = ids
+        self.positions: Dict[str, int] = {pid: pos for pos, pid in enumerate(ids)}
+        self.index = index
+        self._loader = loader
+        self._records: List[Optional[ProblemRecord]] = [None] * len(ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable[ProblemRecord], version: str = "") -> "CatalogSnapshot":
+        unique: Dict[str, ProblemRecord] = {}
+        for record in records:
+            unique.setdefault(record.problem_id, record)  # first occurrence wins
+        ordered = list(unique.values())
+        index: Dict[IndexKey, array] = {}
+        for pos, record in enumerate(ordered):
+            t, d = record.detail.topic, record.detail.difficulty
+            for key in ((t, d), (t, None), (None, d), (None, None)):
+                index.setdefault(key, array("I")).append(pos)
+        return cls(list(unique), index, ordered.__getitem__, version)
+
+    @classmethod
+    def from_file(cls, catalog_file: CatalogFile, version: str = "") -> "CatalogSnapshot":
+        return cls(
+            catalog_file.ids,
+            catalog_file.postings,
+            lambda pos: record_from_dict(catalog_file.record(pos)),
+            version,
+        )
+
+    def record(self, pos: int) -> ProblemRecord:
+        record = self._records[pos]
+        if record is None:
+            record = self._records[pos] = self._loader(pos)
+        return record
+
+    def get(self, problem_id: str) -> Optional[ProblemRecord]:
+        pos = self.positions.get(problem_id)
+        return None if pos is None else self.record(pos)
+
+    def query(
+        self,
+        topic: Optional[Topic] = None,
+        difficulty: Optional[Difficulty] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> List[ProblemRecord]:
+        positions = self.index.get((topic, difficulty))
+        if positions is None:
+            return []
+        return [self.record(pos) for pos in positions[offset:offset + limit]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def load_snapshot(path: Path) -> CatalogSnapshot:
+    stat = path.stat()
+    version = f"{stat.st_mtime_ns}-{stat.st_size}"
+    if is_catalog_file(path):
+        return CatalogSnapshot.from_file(CatalogFile(path), version)
+    with open(path, "r", encoding="utf-8") as fh:
+        records = [record_from_dict(json.loads(line)) for line in fh if line.strip()]
+    return CatalogSnapshot.from_records(records, version)
+
+
+class ProblemCatalog:
+    def __init__(self, path: Path, reload_seconds: float):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._poke = threading.Event()
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        if self._snapshot is None:
+            self.load()
+        return self._snapshot
+
+    def load(self) -> None:
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = load_snapshot(self.path)
+            if self._watcher is None and self.reload_seconds > 0:
+                self._watcher = threading.Thread(target=self._watch, name="catalog-watch", daemon=True)
+                self._watcher.start()
+
+    def reload(self) -> bool:
+        """Rebuild from disk and swap in atomically; returns False if the file is unusable."""
+        try:
+            snapshot = load_snapshot(self.path)
+        except (OSError, ValueError, KeyError):
+            return False  # keep serving the last good catalog
+        self._snapshot = snapshot
+        self.reloads += 1
+        get_invalidation_bus().publish(BUS_TOPIC, snapshot.version)
+        return True
+
+    def _current_version(self) -> Optional[str]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _on_invalidate(self, _version: Optional[str]) -> None:
+        """Another worker reloaded: check the file now rather than at the next poll."""
+        self._poke.set()
+
+    def _watch(self) -> None:
+        while True:
+            self._poke.wait(self.reload_seconds)
+            self._poke.clear()
+            version = self._current_version()
+            if version is not None and version != self._snapshot.version:
+                self.reload()
+
+    def get(self, problem_id: str) -> Optional[ProblemRecord]:
+        return self.snapshot.get(problem_id)
+
+    def query(self, topic=None, difficulty=None, limit: int = 10, offset: int = 0) -> List[ProblemRecord]:
+        return self.snapshot.query(topic, difficulty, limit, offset)
+
+
+_catalog: Optional[ProblemCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ProblemCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                settings = get_settings()
+                path = Path(settings.catalog_path) if settings.catalog_path else DEFAULT_CATALOG_PATH
+                catalog = ProblemCatalog(path, settings.catalog_reload_seconds)
+                get_invalidation_bus().subscribe(BUS_TOPIC, catalog._on_invalidate)
+                _catalog = catalog
+    return _catalog
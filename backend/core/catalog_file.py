@@ -0,0 +1,163 @@
+"""
+Compact on-disk catalog format (.osc).
+
+Layout (little endian):
+
+    header   magic "OSRSCAT\\0", u16 version, u16 reserved, u32 count,
+             then (u64 offset, u64 length) for each section below
+    ids      problem ids, utf-8, "\\n"-separated, in catalog order
+    topics   u8 per problem: position in `Topic`
+    diffs    u8 per problem: position in `Difficulty`
+    offsets  u64 per problem: absolute offset of its record
+    lengths  u32 per problem: record length in bytes
+    postings for every (topic or any) x (difficulty or any) key, in the fixed
+             order of `posting_keys()`: u32 n, then n u32 catalog positions
+    records  one compact JSON object per problem
+
+Readers mmap the file and only parse the small metadata sections up front;
+records are decoded on first access, so loading a large catalog is close to
+free. Files are written to a temp path and renamed into place.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from backend.models.schemas import Difficulty, Topic
+
+MAGIC = b"OSRSCAT\0"
+VERSION = 1
+SECTIONS = ("ids", "topics", "diffs", "offsets", "lengths", "postings", "records")
+HEADER = struct.Struct("<8sHHI" + "QQ" * len(SECTIONS))
+
+TOPICS: List[Topic] = list(Topic)
+DIFFICULTIES: List[Difficulty] = list(Difficulty)
+
+
+class CatalogFormatError(ValueError):
+    pass
+
+
+def posting_keys() -> List[Tuple[Optional[Topic], Optional[Difficulty]]]:
+    return [(t, d) for t in [None] + TOPICS for d in [None] + DIFFICULTIES]
+
+
+def is_catalog_file(path: Path) -> bool:
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class CatalogEntry(NamedTuple):
+    problem_id: str
+    topic: str
+    difficulty: str
+    blob: bytes  # the record as compact UTF-8 JSON
+
+
+def encode_record(record: Dict[str, Any]) -> CatalogEntry:
+    blob = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return CatalogEntry(record["problem_id"], record["topic"], record["difficulty"], blob)
+
+
+def write_catalog(path: Path, entries: Sequence[CatalogEntry]) -> None:
+    """Write encoded records (already deduplicated, in catalog order)."""
+    topic_pos = {t.value: i for i, t in enumerate(TOPICS)}
+    diff_pos = {d.value: i for i, d in enumerate(DIFFICULTIES)}
+
+    blobs = [e.blob for e in entries]
+    ids = "\n".join(e.problem_id for e in entries).encode("utf-8")
+    topics = bytes(topic_pos[e.topic] for e in entries)
+    diffs = bytes(diff_pos[e.difficulty] for e in entries)
+
+    members: Dict[Tuple[Optional[Topic], Optional[Difficulty]], List[int]] = {key: [] for key in posting_keys()}
+    for i, e in enumerate(entries):
+        t, d = Topic(e.topic), Difficulty(e.difficulty)
+        for key in ((t, d), (t, None), (None, d), (None, None)):
+            members[key].append(i)
+    postings = array("I")
+    for key in posting_keys():
+        postings.append(len(members[key]))
+        postings.extend(members[key])
+
+    count = len(entries)
+    meta = {
+        "ids": ids,
+        "topics": topics,
+        "diffs": diffs,
+        "offsets": b"\0" * (8 * count),  # patched below once record offsets are known
+        "lengths": array("I", (len(b) for b in blobs)).tobytes(),
+        "postings": postings.tobytes(),
+    }
+    cursor = HEADER.size
+    layout: Dict[str, Tuple[int, int]] = {}
+    for name in SECTIONS[:-1]:
+        layout[name] = (cursor, len(meta[name]))
+        cursor += len(meta[name])
+    records_start = cursor
+    offsets = array("Q")
+    for blob in blobs:
+        offsets.append(cursor)
+        cursor += len(blob)
+    meta["offsets"] = offsets.tobytes()
+    layout["records"] = (records_start, cursor - records_start)
+
+    fields = [v for name in SECTIONS for v in layout[name]]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, VERSION, 0, count, *fields))
+        for name in SECTIONS[:-1]:
+            fh.write(meta[name])
+        for blob in blobs:
+            fh.write(blob)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class CatalogFile:
+    """Read-only, memory-mapped view of a .osc catalog."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise CatalogFormatError(f"{path}: truncated header")
+        magic, version, _, count, *fields = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise CatalogFormatError(f"{path}: not an Osiris catalog file")
+        if version != VERSION:
+            raise CatalogFormatError(f"{path}: unsupported catalog version {version}")
+        self.count = count
+        sections = {name: (fields[2 * i], fields[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+
+        def section(name: str) -> bytes:
+            offset, length = sections[name]
+            return self._mm[offset:offset + length]
+
+        self.ids: List[str] = section("ids").decode("utf-8").split("\n") if count else []
+        self.topics: List[Topic] = [TOPICS[i] for i in section("topics")]
+        self.difficulties: List[Difficulty] = [DIFFICULTIES[i] for i in section("diffs")]
+        self._offsets = array("Q", section("offsets"))
+        self._lengths = array("I", section("lengths"))
+
+        postings = array("I", section("postings"))
+        self.postings: Dict[Tuple[Optional[Topic], Optional[Difficulty]], array] = {}
+        cursor = 0
+        for key in posting_keys():
+            n = postings[cursor]
+            self.postings[key] = postings[cursor + 1:cursor + 1 + n]
+            cursor += 1 + n
+
+    def record(self, pos: int) -> Dict[str, Any]:
+        offset = self._offsets[pos]
+        return json.loads(self._mm[offset:offset + self._lengths[pos]])
+
+    def close(self) -> None:
+        self._mm.close()
@@ -0,0 +1,227 @@
+import os
+import socket
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Load backend/.env (if present) before any setting is read
+load_dotenv()
+
+
+def _env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    supabase_url: Optional[str]
+
+    # --- Auth (Supabase JWT verification) ---
+    jwks_url: Optional[str]
+    jwks_file: Optional[str]
+    jwt_secret: Optional[str]
+    jwt_audience: str
+    jwks_refresh_seconds: int
+    token_cache_size: int
+
+    # --- LLM (Ollama) ---
+    ollama_url: str
+    ollama_model: str
+    ollama_keep_alive: str
+    ollama_max_connections: int
+    ollama_timeout_seconds: int
+    llm_max_concurrency: int
+    llm_max_queue: int
+
+    # --- Guidance response cache ---
+    guidance_cache_max_entries: int
+    guidance_cache_max_bytes: int
+    guidance_cache_ttl_seconds: int
+
+    # --- Guidance sessions ---
+    guidance_session_token_budget: int
+    guidance_session_keep_turns: int
+    guidance_session_ttl_seconds: int
+    guidance_session_max_entries: int
+
+    # --- Code execution sandbox ---
+    sandbox_cpu_seconds: int
+    sandbox_memory_mb: int
+    sandbox_max_fds: int
+    sandbox_output_bytes: int
+    sandbox_wall_seconds: float
+    sandbox_max_children: int
+    sandbox_user: str
+    sandbox_network_isolation: str
+
+    # --- Attempt evaluation queue ---
+    attempt_workers: int
+    attempt_max_queue: int
+    attempt_retention: int
+    attempt_eval_timeout_seconds: float
+
+    # --- Problem catalog ---
+    catalog_path: Optional[str]
+    catalog_reload_seconds: float
+
+    # --- Skill estimation ---
+    skill_prior_variance: float
+    skill_drift: float
+    skill_max_users: int
+    skill_max_log_events: int
+
+    # --- Adaptive assessments ---
+    assessment_bank_path: Optional[str]
+    assessment_target_confidence: float
+    assessment_max_questions: int
+    assessment_open_questions: int
+    assessment_grading_deadline_ms: int
+    assessment_grading_batch: int
+
+    # --- Roadmap generation ---
+    roadmap_size: int
+    roadmap_target_success: float
+    roadmap_topic_quota: float
+    roadmap_store_depth: int
+    roadmap_store_max_entries: int
+
+    # --- Event log / Postgres ---
+    database_url: Optional[str]
+    eventlog_dir: Optional[str]
+    eventlog_node: str
+    eventlog_segment_bytes: int
+    eventlog_commit_events: int
+    eventlog_commit_ms: float
+    eventlog_upload_batch: int
+    eventlog_retention_hours: float
+    eventlog_max_bytes: int
+    db_pool_min: int
+    db_pool_max: int
+    db_timeout_ms: int
+    db_statement_cache_size: int
+
+    # --- Startup ---
+    startup_warmup: str
+
+    # --- Tracing ---
+    trace_exporter: str
+    trace_file: Optional[str]
+    trace_otlp_url: str
+    trace_sample_rate: float
+    trace_slow_ms: float
+
+    # --- Rate limiting ---
+    rate_limit_store: str
+    rate_limit_db: Optional[str]
+    rate_limit_max_keys: int
+    rate_limit_guidance: str
+    rate_limit_attempts: str
+
+    # --- Cross-worker cache invalidation ---
+    invalidation_heartbeat_seconds: float
+    invalidation_fallback_ttl_seconds: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        supabase_url = _env_str("NEXT_PUBLIC_SUPABASE_URL")
+        default_jwks_url = (
+            f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+            if supabase_url and supabase_url.startswith("http")
+            else None
+        )
+        return cls(
+            supabase_url=supabase_url,
+            jwks_url=_env_str("SUPABASE_JWKS_URL", default_jwks_url),
+            jwks_file=_env_str("SUPABASE_JWKS_FILE"),
+            jwt_secret=_env_str("SUPABASE_JWT_SECRET"),
+            jwt_audience=_env_str("SUPABASE_JWT_AUDIENCE", "authenticated"),
+            jwks_refresh_seconds=_env_int("AUTH_JWKS_REFRESH_SECONDS", 600),
+            token_cache_size=_env_int("AUTH_TOKEN_CACHE_SIZE", 10_000),
+            ollama_url=_env_str("OLLAMA_URL", "http://localhost:11434"),
+            ollama_model=_env_str("OLLAMA_MODEL", "gpt-oss:20b"),
+            ollama_keep_alive=_env_str("OLLAMA_KEEP_ALIVE", "30m"),
+            ollama_max_connections=_env_int("OLLAMA_MAX_CONNECTIONS", 8),
+            ollama_timeout_seconds=_env_int("OLLAMA_TIMEOUT_SECONDS", 120),
+            llm_max_concurrency=_env_int("LLM_MAX_CONCURRENCY", 2),
+            llm_max_queue=_env_int("LLM_MAX_QUEUE", 64),
+            guidance_cache_max_entries=_env_int("GUIDANCE_CACHE_MAX_ENTRIES", 5_000),
+            guidance_cache_max_bytes=_env_int("GUIDANCE_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+            guidance_cache_ttl_seconds=_env_int("GUIDANCE_CACHE_TTL_SECONDS", 24 * 3600),
+            guidance_session_token_budget=_env_int("GUIDANCE_SESSION_TOKEN_BUDGET", 2048),
+            guidance_session_keep_turns=_env_int("GUIDANCE_SESSION_KEEP_TURNS", 2),
+            guidance_session_ttl_seconds=_env_int("GUIDANCE_SESSION_TTL_SECONDS", 1800),
+            guidance_session_max_entries=_env_int("GUIDANCE_SESSION_MAX_ENTRIES", 5_000),
+            sandbox_cpu_seconds=_env_int("SANDBOX_CPU_SECONDS", 2),
+            sandbox_memory_mb=_env_int("SANDBOX_MEMORY_MB", 256),
+            sandbox_max_fds=_env_int("SANDBOX_MAX_FDS", 32),
+            sandbox_output_bytes=_env_int("SANDBOX_OUTPUT_BYTES", 64 * 1024),
+            sandbox_wall_seconds=_env_float("SANDBOX_WALL_SECONDS", 5.0),
+            sandbox_max_children=_env_int("SANDBOX_MAX_CHILDREN", 0),
+            sandbox_user=_env_str("SANDBOX_USER", "nobody"),
+            sandbox_network_isolation=_env_str("SANDBOX_NETWORK_ISOLATION", "required"),
+            attempt_workers=_env_int("ATTEMPT_WORKERS", 4),
+            attempt_max_queue=_env_int("ATTEMPT_MAX_QUEUE", 1_000),
+            attempt_retention=_env_int("ATTEMPT_RETENTION", 10_000),
+            attempt_eval_timeout_seconds=_env_float("ATTEMPT_EVAL_TIMEOUT_SECONDS", 60.0),
+            catalog_path=_env_str("CATALOG_PATH"),
+            catalog_reload_seconds=_env_float("CATALOG_RELOAD_SECONDS", 5.0),
+            skill_prior_variance=_env_float("SKILL_PRIOR_VARIANCE", 1.0),
+            skill_drift=_env_float("SKILL_DRIFT", 0.01),
+            skill_max_users=_env_int("SKILL_MAX_USERS", 100_000),
+            skill_max_log_events=_env_int("SKILL_MAX_LOG_EVENTS", 2_000_000),
+            assessment_bank_path=_env_str("ASSESSMENT_BANK_PATH"),
+            assessment_target_confidence=_env_float("ASSESSMENT_TARGET_CONFIDENCE", 0.5),
+            assessment_max_questions=_env_int("ASSESSMENT_MAX_QUESTIONS", 20),
+            assessment_open_questions=_env_int("ASSESSMENT_OPEN_QUESTIONS", 2),
+            assessment_grading_deadline_ms=_env_int("ASSESSMENT_GRADING_DEADLINE_MS", 8_000),
+            assessment_grading_batch=_env_int("ASSESSMENT_GRADING_BATCH", 8),
+            roadmap_size=_env_int("ROADMAP_SIZE", 10),
+            roadmap_target_success=_env_float("ROADMAP_TARGET_SUCCESS", 0.7),
+            roadmap_topic_quota=_env_float("ROADMAP_TOPIC_QUOTA", 0.4),
+            roadmap_store_depth=_env_int("ROADMAP_STORE_DEPTH", 100),
+            roadmap_store_max_entries=_env_int("ROADMAP_STORE_MAX_ENTRIES", 100_000),
+            database_url=_env_str("DATABASE_URL"),
+            eventlog_dir=_env_str("EVENTLOG_DIR"),
+            eventlog_node=_env_str("EVENTLOG_NODE", socket.gethostname()),
+            eventlog_segment_bytes=_env_int("EVENTLOG_SEGMENT_BYTES", 8 * 1024 * 1024),
+            eventlog_commit_events=_env_int("EVENTLOG_COMMIT_EVENTS", 256),
+            eventlog_commit_ms=_env_float("EVENTLOG_COMMIT_MS", 5.0),
+            eventlog_upload_batch=_env_int("EVENTLOG_UPLOAD_BATCH", 1_000),
+            eventlog_retention_hours=_env_float("EVENTLOG_RETENTION_HOURS", 7 * 24.0),
+            eventlog_max_bytes=_env_int("EVENTLOG_MAX_BYTES", 1024 * 1024 * 1024),
+            db_pool_min=_env_int("DB_POOL_MIN", 2),
+            db_pool_max=_env_int("DB_POOL_MAX", 10),
+            db_timeout_ms=_env_int("DB_TIMEOUT_MS", 2_000),
+            db_statement_cache_size=_env_int("DB_STATEMENT_CACHE_SIZE", 100),
+            startup_warmup=_env_str("STARTUP_WARMUP", "background"),
+            trace_exporter=_env_str("TRACE_EXPORTER", "off"),
+            trace_file=_env_str("TRACE_FILE"),
+            trace_otlp_url=_env_str("TRACE_OTLP_URL", "http://localhost:4318/v1/traces"),
+            trace_sample_rate=_env_float("TRACE_SAMPLE_RATE", 0.01),
+            trace_slow_ms=_env_float("TRACE_SLOW_MS", 1000.0),
+            rate_limit_store=_env_str("RATE_LIMIT_STORE", "memory"),
+            rate_limit_db=_env_str("RATE_LIMIT_DB"),
+            rate_limit_max_keys=_env_int("RATE_LIMIT_MAX_KEYS", 100_000),
+            rate_limit_guidance=_env_str("RATE_LIMIT_GUIDANCE", "bucket:10/1m,quota:300/1d"),
+            rate_limit_attempts=_env_str("RATE_LIMIT_ATTEMPTS", "window:30/1m,quota:1000/1d"),
+            invalidation_heartbeat_seconds=_env_float("INVALIDATION_HEARTBEAT_SECONDS", 5.0),
+            invalidation_fallback_ttl_seconds=_env_float("INVALIDATION_FALLBACK_TTL_SECONDS", 5.0),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -0,0 +1,565 @@
+"""
+Durable append-only log for attempt/progress events, shipped to Postgres.
+
+Events are appended to local segment files and made durable by a group
+commit: appends queue up in memory, and a single flusher writes everything
+queued so far and fsyncs once (after `commit_events` records or
+`commit_seconds`, whichever comes first). A burst of submissions therefore
+costs one fsync per batch instead of one database round trip per event.
+
+Committed records are shipped to Postgres in the background, one multi-row
+INSERT per batch (idempotent on (node, seq)), and the highest shipped sequence
+number is recorded in an `acked` file. Segments that are entirely acked are
+deleted. After a crash, opening the log truncates a torn tail, and shipping
+resumes from the acked position, so nothing committed is lost or duplicated.
+Without a database, segments are deleted by age and total size instead.
+
+Sequence numbers are per node, and every process is its own node
+(`<EVENTLOG_NODE or hostname>:<pid>:<random id>`) writing to its own
+directory under EVENTLOG_DIR, which it holds an exclusive lock on. A process
+that finds a node directory nobody holds (its process died) ships what is left
+in it under that node's id and removes it.
+
+Segment file `<first seq, 20 digits>.seg` holds frames:
+
+    u32 length, u32 crc32(payload), u64 seq, payload (compact JSON)
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.core.events import ASSESSMENT_SUBMITTED, ATTEMPT_GRADED, get_event_bus
+from backend.core.tracing import span
+
+if TYPE_CHECKING:
+    import asyncpg
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENTLOG_DIR = Path(__file__).resolve().parent.parent / "var" / "eventlog"
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema.sql"
+
+FRAME = struct.Struct("<IIQ")
+SEGMENT_SUFFIX = ".seg"
+
+# Event kinds written to the log (bus events are logged under their own names)
+ATTEMPT_SUBMITTED = "attempt.submitted"
+
+
+@dataclass(frozen=True)
+class LogRecord:
+    seq: int
+    kind: str
+    user_id: str
+    at: float
+    data: Dict[str, Any]
+
+
+def _encode(kind: str, user_id: str, at: float, data: Dict[str, Any]) -> bytes:
+    body = {"kind": kind, "user_id": user_id, "at": at, "data": data}
+    return json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _decode(seq: int, payload: bytes) -> LogRecord:
+    body = json.loads(payload)
+    return LogRecord(seq, body["kind"], body["user_id"], body["at"], body["data"])
+
+
+def read_frames(path: Path, start: int = 0):
+    """Yield (seq, payload, end offset) for each intact frame; stops at the first torn/corrupt one."""
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        offset = start
+        while True:
+            header = fh.read(FRAME.size)
+            if len(header) < FRAME.size:
+                return
+            length, crc, seq = FRAME.unpack(header)
+            payload = fh.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            offset += FRAME.size + length
+            yield seq, payload, offset
+
+
+class PostgresSink:
+    """Ships batches with one multi-row INSERT; reconnects lazily after errors."""
+
+    INSERT = """
+        INSERT INTO event_log (node, seq, kind, user_id, occurred_at, payload)
+        SELECT $1, e.seq, e.kind, e.user_id, to_timestamp(e.at), e.payload::jsonb
+        FROM unnest($2::bigint[], $3::text[], $4::text[], $5::float8[], $6::text[])
+            AS e(seq, kind, user_id, at, payload)
+        ON CONFLICT (node, seq) DO NOTHING
+    """
+
+    def __init__(self, dsn: str, node: str, timeout: float = 10.0):
+        self.dsn = dsn
+        self.node = node
+        self.timeout = timeout
+        self._conn: Optional["asyncpg.Connection"] = None
+
+    async def _connection(self) -> "asyncpg.Connection":
+        if self._conn is None or self._conn.is_closed():
+            import asyncpg
+
+            self._conn = await asyncpg.connect(self.dsn, timeout=self.timeout)
+            await self._conn.execute(SCHEMA_PATH.read_text())
+        return self._conn
+
+    async def insert(self, records: List[LogRecord]) -> None:
+        try:
+            conn = await self._connection()
+            await conn.execute(
+                self.INSERT,
+                self.node,
+                [r.seq for r in records],
+                [r.kind for r in records],
+                [r.user_id for r in records],
+                [r.at for r in records],
+                [json.dumps(r.data, separators=(",", ":"), default=str) for r in records],
+                timeout=self.timeout,
+            )
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.terminate()
+
+
+class EventLog:
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int,
+        commit_events: int,
+        commit_seconds: float,
+        upload_batch: int,
+        sink: Optional[PostgresSink] = None,
+        retention_seconds: float = 7 * 24 * 3600.0,
+        max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.commit_events = commit_events
+        self.commit_seconds = commit_seconds
+        self.upload_batch = upload_batch
+        self.sink = sink
+        # Only without a sink: how long, and how much, to keep
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[int, bytes, Optional[asyncio.Future]]] = []
+        self._next_seq = 1
+        self.durable_seq = 0  # highest seq fsynced to disk
+        self.acked_seq = 0  # highest seq stored in Postgres
+        self._segment: Optional[Any] = None
+        self._segment_size = 0
+        self._lock_fd: Optional[int] = None
+        self._cursor: Tuple[Optional[Path], int] = (None, 0)  # uploader read position
+        self._wake: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._committed: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._uploader_task: Optional[asyncio.Task] = None
+        self.commits = 0
+        self.uploads = 0
+
+    # --- recovery ---
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("*" + SEGMENT_SUFFIX))
+
+    def open(self, writable: bool = True) -> None:
+        """
+        Lock the directory and recover state from disk: acked position, torn-tail truncation,
+        next sequence number. Raises BlockingIOError if another live process holds the directory.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_directory()
+        try:
+            self.acked_seq = int((self.directory / "acked").read_text())
+        except (OSError, ValueError):
+            self.acked_seq = 0
+        last_seq = self.acked_seq
+        segments = self._segments()
+        for path in segments:
+            end = 0
+            for seq, _payload, end in read_frames(path):
+                last_seq = max(last_seq, seq)
+            if end < path.stat().st_size:
+                logger.warning("event log: truncating %s at %d (torn or corrupt frame)", path.name, end)
+                with open(path, "r+b") as fh:
+                    fh.truncate(end)
+                    os.fsync(fh.fileno())
+        self._next_seq = last_seq + 1
+        self.durable_seq = last_seq
+        if self.sink is None:
+            self.compact()
+        if not writable:
+            return
+        segments = self._segments()
+        if segments and segments[-1].stat().st_size < self.segment_bytes:
+            self._open_segment(segments[-1])
+        else:
+            self._open_segment(self._segment_path(self._next_seq))
+
+    def _lock_directory(self) -> None:
+        fd = os.open(self.directory / "lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            raise
+        self._lock_fd = fd
+
+    def close(self) -> None:
+        """Close the active segment and release the directory."""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:020d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self, path: Path) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = open(path, "ab")
+        self._segment_size = self._segment.tell()
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)  # make the new file's directory entry durable
+        finally:
+            os.close(dir_fd)
+
+    # --- appending ---
+
+    async def start(self) -> None:
+        self._wake, self._full, self._committed = asyncio.Event(), asyncio.Event(), asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        await asyncio.to_thread(self.open)
+        self._loop = asyncio.get_running_loop()
+        self._flusher_task = asyncio.create_task(self._flusher())
+        if self.sink is not None:
+            # Ships dead nodes' leftovers first, then our own log as it commits
+            self._uploader_task = asyncio.create_task(self._uploader())
+        else:
+            await self.adopt_orphans()
+
+    def _enqueue(self, kind: str, user_id: str, data: Dict[str, Any], at: float, fut: Optional[asyncio.Future]) -> None:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._pending.append((seq, _encode(kind, user_id, at, data), fut))
+        self._wake.set()
+        if len(self._pending) >= self.commit_events:
+            self._full.set()
+
+    async def append(self, kind: str, user_id: str, data: Dict[str, Any], at: Optional[float] = None) -> int:
+        """Append and wait until the record is on disk; returns its sequence number."""
+        with span("eventlog.append", **{"event.kind": kind}) as append_span:
+            fut = self._loop.create_future()
+            self._enqueue(kind, user_id, data, time.time() if at is None else at, fut)
+            seq = await fut
+            append_span.set("event.seq", seq)
+            return seq
+
+    def submit(self, kind: str, user_id: str, data: Dict[str, Any], at: Optional[float] = None) -> None:
+        """Fire-and-forget append; safe to call from any thread."""
+        if self._loop is None:
+            return  # not started (e.g. scripts using the stores directly)
+        at = time.time() if at is None else at
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue(kind, user_id, data, at, None)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, kind, user_id, data, at, None)
+
+    async def _flusher(self) -> None:
+        while not self._closing:
+            await self._wake.wait()
+            if not self._closing:
+                try:
+                    # Let the batch fill up, unless it is already full
+                    await asyncio.wait_for(self._full.wait(), self.commit_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.flush()
+            except OSError:
+                logger.exception("event log: commit failed")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            self._wake.clear()
+            self._full.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except OSError as exc:
+                for _seq, _payload, fut in batch:
+                    if fut is not None and not fut.done():
+                        fut.set_exception(exc)
+                raise
+            self.durable_seq = batch[-1][0]
+            self.commits += 1
+            for seq, _payload, fut in batch:
+                if fut is not None and not fut.done():
+                    fut.set_result(seq)
+            self._committed.set()
+
+    def _write(self, batch: List[Tuple[int, bytes, Optional[asyncio.Future]]]) -> None:
+        rotated = False
+        for seq, payload, _fut in batch:
+            if self._segment_size >= self.segment_bytes:
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+                self._open_segment(self._segment_path(seq))
+                rotated = True
+            frame = FRAME.pack(len(payload), zlib.crc32(payload), seq) + payload
+            self._segment.write(frame)
+            self._segment_size += len(frame)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        if rotated and self.sink is None:
+            self.compact()
+
+    # --- shipping / compaction ---
+
+    def read_unacked(self, limit: int) -> Tuple[List[LogRecord], Tuple[Optional[Path], int]]:
+        """
+        Up to `limit` durable records after `acked_seq`, in order, and the read
+        position just past them (adopted by `_ack` once they are shipped).
+        """
+        records: List[LogRecord] = []
+        cursor_path, cursor_offset = self._cursor
+        segments = self._segments()
+        if cursor_path not in segments:
+            cursor_path, cursor_offset = None, 0  # first read, or compacted away
+        position = (cursor_path, cursor_offset)
+        for path in segments:
+            if cursor_path is not None and path < cursor_path:
+                continue
+            for seq, payload, end in read_frames(path, cursor_offset if path == cursor_path else 0):
+                if seq > self.durable_seq:
+                    return records, position
+                position = (path, end)
+                if seq > self.acked_seq:
+                    records.append(_decode(seq, payload))
+                    if len(records) >= limit:
+                        return records, position
+        return records, position
+
+    def _ack(self, seq: int, position: Tuple[Optional[Path], int]) -> None:
+        tmp = self.directory / "acked.tmp"
+        tmp.write_text(str(seq))
+        os.replace(tmp, self.directory / "acked")
+        self.acked_seq = seq
+        self._cursor = position
+        self.compact()
+
+    def compact(self) -> int:
+        """
+        Delete old segments, oldest first; the active segment is always kept. With a sink, those
+        whose records are all acked; without one, those older than the retention or over the size cap.
+        """
+        segments = self._segments()
+        removed = 0
+        if self.sink is not None:
+            for path, following in zip(segments, segments[1:]):
+                if int(following.stem) - 1 > self.acked_seq:
+                    break
+                if path == self._cursor[0]:
+                    self._cursor = (None, 0)
+                path.unlink(missing_ok=True)
+                removed += 1
+            return removed
+        stats = [(path, path.stat()) for path in segments]
+        total = sum(stat.st_size for _path, stat in stats)
+        expired = time.time() - self.retention_seconds
+        for path, stat in stats:
+            if self._segment is not None and path.name == Path(self._segment.name).name:
+                break
+            if stat.st_mtime >= expired and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    async def _drain(self) -> None:
+        """Ship every durable record not yet acked, retrying until the sink takes them."""
+        backoff = 1.0
+        while self.acked_seq < self.durable_seq:
+            records, position = await asyncio.to_thread(self.read_unacked, self.upload_batch)
+            if not records:
+                break
+            try:
+                await self.sink.insert(records)
+            except Exception as exc:  # connection refused, timeouts, server errors: retry them all
+                logger.warning("event log: upload failed (%s), retrying in %.0fs", exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            self.uploads += 1
+            await asyncio.to_thread(self._ack, records[-1].seq, position)
+
+    def _open_orphan(self, directory: Path, node: str) -> Optional["EventLog"]:
+        orphan = EventLog(
+            directory,
+            self.segment_bytes,
+            self.commit_events,
+            self.commit_seconds,
+            self.upload_batch,
+            sink=PostgresSink(self.sink.dsn, node, self.sink.timeout) if self.sink is not None else None,
+            retention_seconds=self.retention_seconds,
+            max_bytes=self.max_bytes,
+        )
+        try:
+            orphan.open(writable=False)
+        except BlockingIOError:
+            return None  # its process is alive
+        return orphan
+
+    async def adopt_orphans(self) -> int:
+        """
+        Ship (or, without a sink, expire) what dead processes left in their node directories,
+        removing those that end up empty; returns how many directories were taken over.
+        """
+        root = self.directory.parent
+        candidates = [
+            (path, path.name)
+            for path in sorted(root.iterdir())
+            if path != self.directory and (path / "lock").is_file()
+        ]
+        if any(root.glob("*" + SEGMENT_SUFFIX)):
+            # Written before per-process nodes, under the bare EVENTLOG_NODE
+            candidates.append((root, self.directory.name.rsplit(":", 2)[0]))
+        adopted = 0
+        for directory, node in candidates:
+            orphan = await asyncio.to_thread(self._open_orphan, directory, node)
+            if orphan is None:
+                continue
+            adopted += 1
+            try:
+                if orphan.sink is not None:
+                    await orphan._drain()
+                if orphan.sink is not None and orphan.acked_seq >= orphan.durable_seq:
+                    for path in orphan._segments():
+                        path.unlink(missing_ok=True)
+                    (directory / "acked").unlink(missing_ok=True)
+                elif orphan.sink is None:
+                    for path in orphan._segments():
+                        if path.stat().st_size == 0:
+                            path.unlink(missing_ok=True)
+                if directory != root and not orphan._segments():
+                    # Still holding its lock, so no other process adopts it meanwhile
+                    await asyncio.to_thread(shutil.rmtree, directory, True)
+            finally:
+                orphan.close()
+                if orphan.sink is not None:
+                    await orphan.sink.close()
+        return adopted
+
+    async def _uploader(self) -> None:
+        await self.adopt_orphans()
+        while True:
+            await self._committed.wait()
+            self._committed.clear()
+            await self._drain()
+
+    async def stop(self) -> None:
+        if self._loop is None:
+            return
+        # Let the flusher commit what's queued and exit (cancelling it mid-write could
+        # leave a half-written batch racing a second flush)
+        self._closing = True
+        self._wake.set()
+        await self._flusher_task
+        if self._uploader_task is not None:
+            self._uploader_task.cancel()
+            await asyncio.gather(self._uploader_task, return_exceptions=True)
+        if self.sink is not None:
+            await self.sink.close()
+        self.close()
+        self._loop = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "next_seq": self._next_seq,
+            "durable_seq": self.durable_seq,
+            "acked_seq": self.acked_seq,
+            "pending": len(self._pending),
+            "commits": self.commits,
+            "uploads": self.uploads,
+            "segments": len(self._segments()),
+        }
+
+    def _on_event(self, payload: Dict[str, Any]) -> None:
+        data = {k: v for k, v in payload.items() if k not in ("event", "user_id", "at")}
+        self.submit(payload["event"], payload["user_id"], data, payload.get("at"))
+
+
+_log: Optional[EventLog] = None
+_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                settings = get_settings()
+                # Unique per process, so workers sharing a host (and a restarted worker) never reuse a seq
+                node = f"{settings.eventlog_node}:{os.getpid()}:{uuid.uuid4().hex}"
+                sink = PostgresSink(settings.database_url, node) if settings.database_url else None
+                root = Path(settings.eventlog_dir) if settings.eventlog_dir else DEFAULT_EVENTLOG_DIR
+                log = EventLog(
+                    root / node,
+                    segment_bytes=settings.eventlog_segment_bytes,
+                    commit_events=settings.eventlog_commit_events,
+                    commit_seconds=settings.eventlog_commit_ms / 1000,
+                    upload_batch=settings.eventlog_upload_batch,
+                    sink=sink,
+                    retention_seconds=settings.eventlog_retention_hours * 3600,
+                    max_bytes=settings.eventlog_max_bytes,
+                )
+                bus = get_event_bus()
+                bus.subscribe(ATTEMPT_GRADED, log._on_event)
+                bus.subscribe(ASSESSMENT_SUBMITTED, log._on_event)
+                _log = log
+    return _log
+
+
+async def stop_event_log() -> None:
+    if _log is not None:
+        await _log.stop()
@@ -0,0 +1,53 @@
+"""
+In-process domain events.
+
+Modules that keep derived state (materialized roadmaps, rollups, ...) subscribe
+to the events that change it instead of being called directly by every writer.
+Handlers run synchronously in the publisher's thread, so they must be cheap
+(drop a cache entry, bump a counter); a failing handler is logged and skipped.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event names; payloads always include user_id
+ATTEMPT_GRADED = "attempt.graded"  # attempt_id, problem_id, verdict, score, at (submission epoch seconds)
+ASSESSMENT_SUBMITTED = "assessment.submitted"  # assessment_id
+ROADMAP_REFRESHED = "roadmap.refreshed"
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class EventBus:
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event: str, handler: Handler) -> None:
+        with self._lock:
+            # Copy-on-write so publish can iterate without the lock
+            self._handlers = {**self._handlers, event: self._handlers.get(event, []) + [handler]}
+
+    def publish(self, event: str, **payload: Any) -> None:
+        payload["event"] = event
+        for handler in self._handlers.get(event, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("handler for %s failed", event)
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = EventBus()
+    return _bus
@@ -0,0 +1,162 @@
+"""
+Grading for open-ended assessment answers.
+
+Code answers run against the item's tests in the sandbox; conceptual answers
+are scored against the item's rubric by the LLM, `batch_size` answers per call
+so a whole assessment costs one or two generations. Every grader starts at
+once, and `grade()` waits at most `deadline_seconds`: answers graded by then
+go into the submit response, the rest keep running in the background and are
+handed to `on_late` when they finish.
+
+An outcome of None means the answer couldn't be graded (the sandbox or LLM
+failed); it is left out of the skill profile rather than counted as wrong.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, Set, Tuple
+
+from backend.core.adaptive import CODE, CONCEPT, BankItem
+from backend.core.config import get_settings
+from backend.core.llm import LLMUnavailable
+from backend.core.llm_scheduler import Priority, QueueFull, get_llm_scheduler
+from backend.core.sandbox import SandboxError, get_sandbox
+
+logger = logging.getLogger(__name__)
+
+GRADER_SYSTEM_PROMPT = (
+    "You grade short written answers to coding-interview concept questions. "
+    "Each answer comes with the key points a complete answer covers. Score every answer "
+    "from 0 to 1 by how many key points it gets right; ignore style and length. "
+    "Reply with one line per answer in the form `<number>: <score>` and nothing else."
+)
+
+_SCORE_LINE = re.compile(r"^\s*(\d+)\s*[:=.)-]\s*([01](?:\.\d+)?|\.\d+)\s*$", re.MULTILINE)
+
+
+@dataclass(eq=False)
+class GradingJob:
+    item: BankItem
+    answer: str
+    outcome: Optional[float] = None
+
+
+def concept_prompt(jobs: Sequence[GradingJob]) -> str:
+    blocks = [
+        f"### Answer {i}\nQuestion: {job.item.prompt}\nKey points: {job.item.rubric}\nResponse: {job.answer.strip()}"
+        for i, job in enumerate(jobs, 1)
+    ]
+    return "\n\n".join(blocks)
+
+
+def parse_scores(text: str, n: int) -> List[Optional[float]]:
+    scores: List[Optional[float]] = [None] * n
+    for number, score in _SCORE_LINE.findall(text):
+        i = int(number) - 1
+        if 0 <= i < n:
+            scores[i] = min(1.0, max(0.0, float(score)))
+    return scores
+
+
+class GradingPipeline:
+    def __init__(self, deadline_seconds: float, batch_size: int):
+        self.deadline_seconds = deadline_seconds
+        self.batch_size = max(1, batch_size)
+        self._background: Set[asyncio.Task] = set()
+
+    async def _grade_code(self, job: GradingJob) -> None:
+        try:
+            result = await get_sandbox().run(job.answer, job.item.entry_point, list(job.item.tests))
+        except SandboxError:
+            return
+        job.outcome = result.score
+
+    async def _grade_concepts(self, jobs: Sequence[GradingJob]) -> None:
+        try:
+            generation = await get_llm_scheduler().generate(
+                concept_prompt(jobs),
+                system=GRADER_SYSTEM_PROMPT,
+                priority=Priority.ASSESSMENT,
+                options={"temperature": 0},
+            )
+        except (LLMUnavailable, QueueFull):
+            return
+        for job, score in zip(jobs, parse_scores(generation.text, len(jobs))):
+            job.outcome = score
+
+    async def grade(
+        self,
+        jobs: Sequence[GradingJob],
+        on_late: Callable[[List[GradingJob]], Awaitable[None]],
+    ) -> Tuple[List[GradingJob], List[GradingJob]]:
+        """Grade concurrently; returns (graded within the deadline, still running)."""
+        tasks = {}
+        concepts = []
+        for job in jobs:
+            if not job.answer.strip():
+                job.outcome = 0.0
+            elif job.item.kind == CODE:
+                tasks[asyncio.create_task(self._grade_code(job))] = [job]
+            elif job.item.kind == CONCEPT:
+                concepts.append(job)
+        for start in range(0, len(concepts), self.batch_size):
+            batch = concepts[start:start + self.batch_size]
+            tasks[asyncio.create_task(self._grade_concepts(batch))] = batch
+
+        pending: Set[asyncio.Task] = set()
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline_seconds)
+            for task in done:
+                if task.exception() is not None:
+                    logger.error("grader failed", exc_info=task.exception())
+        late = [job for task in pending for job in tasks[task]]
+        if pending:
+            task = asyncio.create_task(self._finish_late(pending, late, on_late))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        late_ids = {id(job) for job in late}
+        return [job for job in jobs if id(job) not in late_ids], late
+
+    async def _finish_late(
+        self,
+        pending: Set[asyncio.Task],
+        late: List[GradingJob],
+        on_late: Callable[[List[GradingJob]], Awaitable[None]],
+    ) -> None:
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error("grader failed", exc_info=result)
+        try:
+            await on_late(late)
+        except Exception:
+            logger.exception("finishing late assessment grades failed")
+
+    async def stop(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+
+_pipeline: Optional[GradingPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_grading_pipeline() -> GradingPipeline:
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                settings = get_settings()
+                _pipeline = GradingPipeline(
+                    deadline_seconds=settings.assessment_grading_deadline_ms / 1000,
+                    batch_size=settings.assessment_grading_batch,
+                )
+    return _pipeline
+
+
+async def stop_grading_pipeline() -> None:
+    if _pipeline is not None:
+        await _pipeline.stop()
@@ -0,0 +1,253 @@
+"""
+Streaming check that guidance replies don't hand out the solution.
+
+`SolutionGuard` reads a reply as it streams and trips on:
+
+- a fenced code block (``` or ~~~);
+- a function body: the problem's entry point with MAX_ENTRY_BODY_LINES body
+  lines, or any function with MAX_BODY_LINES;
+- overlap with the reference solution: at least half (and at least two) of
+  its statements, compared line by line on their AST with variables renamed
+  positionally, appearing in code lines or inline `code` spans.
+
+Prose passes through as it arrives, except an inline `code` span, which is
+held until it closes and is checked before it's released. Lines that start
+like code are held back until complete and checked (a function is held until
+it ends), so a tripping reply never reaches the learner, and the caller can
+stop the generation straight away instead of paying for the rest of it.
+"""
+
+import ast
+import builtins
+import math
+import re
+from contextlib import aclosing
+from functools import lru_cache
+from typing import AsyncIterator, FrozenSet, List, Optional, Set, Tuple
+
+from backend.core.llm import StreamChunk
+from backend.core.metrics import GUARDRAIL_TRIPS
+
+MAX_ENTRY_BODY_LINES = 2
+MAX_BODY_LINES = 4
+# Statements smaller than this (e.g. `return []`, `seen = {}`) say nothing about the solution
+MIN_STATEMENT_NODES = 4
+
+_BUILTINS = frozenset(dir(builtins))
+_CODE_WORDS = frozenset({
+    "def", "class", "for", "while", "if", "elif", "else", "return", "import", "from", "with", "try",
+    "except", "finally", "lambda", "yield", "raise", "assert", "del", "pass", "break", "continue",
+})
+_LIST_MARKER_RE = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+_WORD_RE = re.compile(r"[A-Za-z_]\w*")
+_DEF_RE = re.compile(r"^(\s*)(?:async\s+)?def\s+(\w+)\s*\(")
+_INLINE_CODE_RE = re.compile(r"`([^`\n]+)`")
+
+
+def _indent(line: str) -> int:
+    return len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip())
+
+
+def statement_fingerprint(line: str) -> Optional[str]:
+    """Canonical form of a one-line statement (compound ones by their header), or None if it isn't one."""
+    text = line.strip()
+    if text.startswith("elif "):
+        text = text[2:]
+    if text.endswith(":"):
+        text += " pass"
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    if len(tree.body) != 1:
+        return None
+    node = tree.body[0]
+    for name in ("body", "orelse", "finalbody", "handlers"):
+        if hasattr(node, name):
+            setattr(node, name, [])
+    names: dict = {}
+    size = 0
+    for child in ast.walk(node):
+        if isinstance(child, ast.expr_context):
+            continue
+        size += 1
+        if isinstance(child, ast.Name) and child.id not in _BUILTINS:
+            child.id = names.setdefault(child.id, f"v{len(names)}")
+        elif isinstance(child, ast.arg):
+            child.arg = names.setdefault(child.arg, f"v{len(names)}")
+    if size < MIN_STATEMENT_NODES:
+        return None
+    return ast.dump(node, annotate_fields=False)
+
+
+@lru_cache(maxsize=1024)
+def solution_fingerprints(solution: str) -> FrozenSet[str]:
+    fingerprints = set()
+    for line in solution.splitlines():
+        fingerprint = statement_fingerprint(line)
+        # The signature alone is in the problem statement; the entry point check covers it
+        if fingerprint is not None and not fingerprint.startswith(("FunctionDef(", "AsyncFunctionDef(")):
+            fingerprints.add(fingerprint)
+    return frozenset(fingerprints)
+
+
+def _classify(line: str) -> Optional[str]:
+    """'code' or 'prose' for a (possibly partial) line; None until there's enough of it to tell."""
+    if _indent(line) >= 4:
+        return "code"
+    text = _LIST_MARKER_RE.sub("", line.lstrip(), count=1)
+    if not text:
+        return None
+    if text[0] in "`~":
+        if len(text) < 3:
+            return None
+        return "code" if text.startswith(("```", "~~~")) else "prose"
+    match = _WORD_RE.match(text)
+    if match is None:
+        return "prose"
+    rest = text[match.end():]
+    if not rest:
+        return None
+    if match.group() in _CODE_WORDS:
+        return "code"
+    if rest[0] == ".":
+        # `seen.get(...)` vs. the end of a sentence
+        return None if len(rest) == 1 else ("code" if rest[1].isalpha() else "prose")
+    if rest[0] in ",:;!?'\"":
+        return "prose"
+    stripped = rest.lstrip()
+    if not stripped:
+        return None
+    # "Try `x` ..." reads as a sentence; its inline span is checked on its own
+    return "prose" if rest[0] == " " and (stripped[0].isalpha() or stripped[0] == "`") else "code"
+
+
+class SolutionGuard:
+    def __init__(self, entry_point: Optional[str] = None, solution: Optional[str] = None):
+        self.entry_point = entry_point
+        self._solution = solution_fingerprints(solution) if solution else frozenset()
+        self._needed = max(2, math.ceil(len(self._solution) / 2))
+        self._matched: Set[str] = set()
+        self._partial = ""
+        self._kind: Optional[str] = None  # of the partial line
+        self._emitted = 0  # chars of the partial line already released
+        self._scanned = 0  # chars of the partial line whose inline spans were checked
+        self._held: List[str] = []
+        self._function: Optional[Tuple[str, int, int]] = None  # (name, indent, body lines) while inside a def
+        self.tripped: Optional[str] = None
+
+    def feed(self, text: str) -> str:
+        """Take the next streamed text; returns what is safe to show now ("" once tripped)."""
+        if self.tripped:
+            return ""
+        out = []
+        *lines, tail = (self._partial + text).split("\n")
+        for line in lines:
+            out.append(self._complete(line + "\n"))
+            if self.tripped:
+                return "".join(out[:-1])
+        self._partial = tail
+        out.append(self._release_partial())
+        return "".join(out)
+
+    def finish(self) -> str:
+        """End of the reply: check and release whatever is still held back."""
+        if self.tripped:
+            return ""
+        out = self._complete(self._partial) if self._partial else ""
+        if self.tripped:
+            return ""
+        self._function = None
+        held, self._held = "".join(self._held), []
+        return out + held
+
+    def _trip(self, reason: str) -> str:
+        self.tripped = reason
+        self._held = []
+        return ""
+
+    def _release_partial(self) -> str:
+        if self._kind is None:
+            self._kind = _classify(self._partial)
+            if self._kind == "prose" and self._function is not None and _indent(self._partial) <= self._function[1]:
+                self._function = None
+        if self._kind != "prose":
+            return ""
+        # Up to an inline span that hasn't closed yet; the complete ones before it are checked first
+        safe = len(self._partial) if self._partial.count("`") % 2 == 0 else self._partial.rindex("`")
+        self._check_spans(self._partial, self._scanned, safe)
+        self._scanned = max(self._scanned, safe)
+        if self.tripped or self._function is not None:
+            return ""
+        held, self._held = "".join(self._held), []
+        out = held + self._partial[self._emitted:safe]
+        self._emitted = max(self._emitted, safe)
+        return out
+
+    def _complete(self, line: str) -> str:
+        kind = self._kind or _classify(line) or "prose"
+        emitted, scanned = self._emitted, self._scanned
+        self._partial, self._kind, self._emitted, self._scanned = "", None, 0, 0
+        # Inline spans count on code-like lines too (a sentence can start like code)
+        self._check_spans(line, scanned, len(line))
+        if self.tripped:
+            return ""
+        if kind == "prose":
+            if self._function is not None and line.strip() and _indent(line) <= self._function[1]:
+                self._function = None
+            if self._function is not None:
+                self._held.append(line)
+                return ""
+            held, self._held = "".join(self._held), []
+            return held + line[emitted:]
+        return self._code_line(line)
+
+    def _code_line(self, line: str) -> str:
+        if line.lstrip().startswith(("```", "~~~")):
+            return self._trip("code_block")
+        if self._function is not None and line.strip():
+            name, indent, body = self._function
+            if _indent(line) > indent:
+                body += 1
+                self._function = (name, indent, body)
+                if body >= (MAX_ENTRY_BODY_LINES if name == self.entry_point else MAX_BODY_LINES):
+                    return self._trip("function_body")
+            else:
+                self._function = None
+        match = _DEF_RE.match(line)
+        if match is not None:
+            self._function = (match.group(2), _indent(line), 0)
+        self._overlap(line)
+        if self.tripped:
+            return ""
+        self._held.append(line)
+        if self._function is not None:
+            return ""
+        held, self._held = "".join(self._held), []
+        return held
+
+    def _check_spans(self, line: str, start: int, end: int) -> None:
+        for code in _INLINE_CODE_RE.findall(line, start, end):
+            self._overlap(code)
+
+    def _overlap(self, code: str) -> None:
+        if not self._solution:
+            return
+        fingerprint = statement_fingerprint(code)
+        if fingerprint in self._solution:
+            self._matched.add(fingerprint)
+            if len(self._matched) >= self._needed:
+                self._trip("solution_overlap")
+
+
+async def guard_stream(chunks: AsyncIterator[StreamChunk], guard: SolutionGuard) -> AsyncIterator[StreamChunk]:
+    """`chunks` with only the text `guard` lets through; on a trip, closes the generation (Ollama stops) and ends."""
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            text = guard.feed(chunk.text)
+            if chunk.generation is not None and not guard.tripped:
+                text += guard.finish()
+            if guard.tripped:
+                GUARDRAIL_TRIPS.inc((guard.tripped,))
+                return
+            yield StreamChunk(text=text, done=chunk.done, generation=chunk.generation)
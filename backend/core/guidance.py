@@ -0,0 +1,79 @@
+"""Prompt construction for Socratic AI guidance (hints only, never solutions)."""
+
+from typing import Optional, Sequence, Tuple
+
+from backend.models.schemas import GuidanceRequest, ProblemDetail
+
+SYSTEM_PROMPT = (
+    "You are Osiris, a Socratic coding tutor for interview practice. "
+    "Never write a full or near-complete solution and never output runnable code for the problem. "
+    "Guide the learner with short questions, one next step at a time, and point at concepts "
+    "(data structures, invariants, complexity) rather than answers. Keep replies under 150 words."
+)
+
+# Served when the model is unreachable so the learner still gets a useful nudge
+FALLBACK_MESSAGE = (
+    "Let’s do this step-by-step.\n\n"
+    "1) What time complexity are you aiming for?\n"
+    "2) What condition are you checking, in one sentence?\n"
+    "3) What data structure helps you remember what you've seen before?\n\n"
+    "If you paste your current approach (even partial), I’ll guide the next step."
+)
+
+# Replaces a reply the guardrail stopped for giving away code
+GUARDRAIL_MESSAGE = (
+    "I was about to write code for you, and working it out yourself is the point of the exercise.\n\n"
+    "Instead, tell me in a sentence or two how you plan to solve it, or which step you're unsure about, "
+    "and I'll help you check that step."
+)
+
+
+def _code_part(payload: GuidanceRequest) -> str:
+    return f"Learner's current code ({payload.language or 'python'}):\n{payload.code_snippet}"
+
+
+def build_prompt(
+    payload: GuidanceRequest,
+    problem: Optional[ProblemDetail] = None,
+    summary: str = "",
+    turns: Sequence[Tuple[str, str]] = (),
+) -> str:
+    """Opening prompt of a conversation: the problem, what was said so far, then the new message."""
+    if problem is not None:
+        parts = [f"Problem: {problem.title} ({problem.problem_id})\n{problem.statement}"]
+    else:
+        parts = [f"Problem: {payload.problem_id}"]
+    if payload.topic is not None:
+        parts.append(f"Topic: {payload.topic.value}")
+    if summary:
+        parts.append(f"Earlier in this conversation (summary): {summary}")
+    for learner, tutor in turns:
+        parts.append(f"Learner: {learner}\n\nTutor: {tutor}")
+    if payload.code_snippet:
+        parts.append(_code_part(payload))
+    parts.append(f"Learner: {payload.user_message}")
+    return "\n\n".join(parts)
+
+
+def build_followup(payload: GuidanceRequest, include_code: bool) -> str:
+    """Next turn of a conversation the model already holds (via Ollama's context)."""
+    parts = []
+    if include_code and payload.code_snippet:
+        parts.append(_code_part(payload))
+    parts.append(f"Learner: {payload.user_message}")
+    return "\n\n".join(parts)
+
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You summarize tutoring conversations for the tutor's own notes. In under 100 words, record what "
+    "the learner tried, what they now understand, what they are stuck on and which hints were given. "
+    "No code, no solution."
+)
+
+
+def build_summary_prompt(summary: str, turns: Sequence[Tuple[str, str]]) -> str:
+    parts = [f"Notes so far: {summary}"] if summary else []
+    for learner, tutor in turns:
+        parts.append(f"Learner: {learner}\n\nTutor: {tutor}")
+    parts.append("Update the notes with the exchange above.")
+    return "\n\n".join(parts)
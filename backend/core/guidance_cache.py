@@ -0,0 +1,156 @@
+"""
+Response cache for AI guidance.
+
+Learners on the same problem ask near-identical questions, and every repeat
+would otherwise cost a full model inference. Requests are keyed on
+(problem_id, topic, normalized user_message, code fingerprint), where the code
+fingerprint ignores whitespace and comments: Python that parses is hashed by
+its AST, anything else by its token stream.
+
+Eviction is LRU, bounded by entry count and approximate bytes, with a TTL per
+entry. All access happens on the event loop, so no locking is needed.
+"""
+
+import ast
+import hashlib
+import io
+import re
+import time
+import tokenize
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.models.schemas import GuidanceRequest
+
+CacheKey = Tuple[str, str, str, str]
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+_SKIP_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT}
+# Rough per-entry overhead (key tuple, entry object, dict slot) on top of the strings
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def normalize_message(message: str) -> str:
+    text = unicodedata.normalize("NFKC", message).casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def _token_stream(code: str) -> str:
+    try:
+        toks = tokenize.generate_tokens(io.StringIO(code).readline)
+        return " ".join(t.string for t in toks if t.type not in _SKIP_TOKENS and t.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        no_comments = "\n".join(line.split("#", 1)[0] for line in code.splitlines())
+        return _SPACE_RE.sub("", no_comments)
+
+
+def code_fingerprint(code: Optional[str], language: Optional[str] = "python") -> str:
+    """Hash of the code with formatting and comments removed ("" when there is no code)."""
+    if not code or not code.strip():
+        return ""
+    canonical = None
+    if (language or "python").lower() in ("python", "py", "python3"):
+        try:
+            canonical = ast.dump(ast.parse(code), annotate_fields=False, include_attributes=False)
+        except (SyntaxError, ValueError):
+            # Work-in-progress code often doesn't parse yet
+            canonical = None
+    if canonical is None:
+        canonical = _token_stream(code)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cache_key(payload: GuidanceRequest) -> CacheKey:
+    return (
+        payload.problem_id,
+        payload.topic.value if payload.topic is not None else "",
+        normalize_message(payload.user_message),
+        code_fingerprint(payload.code_snippet, payload.language),
+    )
+
+
+@dataclass
+class _Entry:
+    message: str
+    expires_at: float
+    size: int
+
+
+class GuidanceCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.message
+
+    def put(self, key: CacheKey, message: str) -> None:
+        size = _ENTRY_OVERHEAD_BYTES + len(message.encode("utf-8")) + sum(len(part) for part in key)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(message, time.monotonic() + self.ttl_seconds, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[GuidanceCache] = None
+
+
+def get_guidance_cache() -> GuidanceCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = GuidanceCache(
+            max_entries=settings.guidance_cache_max_entries,
+            max_bytes=settings.guidance_cache_max_bytes,
+            ttl_seconds=settings.guidance_cache_ttl_seconds,
+        )
+    return _cache
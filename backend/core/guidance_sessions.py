@@ -0,0 +1,200 @@
+"""
+Per-(user, problem) conversation memory for AI guidance.
+
+A session keeps the turns so far, a running summary of older ones, and the
+`context` Ollama returned after the last reply (the conversation already
+encoded as tokens). A follow-up passes that context back with only the new
+message, plus the learner's code when it changed, so the model resumes where
+it left off instead of re-reading the problem and the whole history: prompt
+tokens per follow-up drop from the conversation's length to the message's.
+
+The context grows every turn. Once it passes GUIDANCE_SESSION_TOKEN_BUDGET,
+all but the last GUIDANCE_SESSION_KEEP_TURNS turns are folded into the summary
+by a background generation at the lowest priority, and the context is dropped;
+the next turn re-primes the model with the problem, the summary and the recent
+turns (one full prompt), then continues from the new, shorter context.
+
+Sessions live in process memory: LRU-bounded and dropped after
+GUIDANCE_SESSION_TTL_SECONDS idle. Losing one (eviction, restart, a request
+landing on another worker) costs one full prompt and the older turns. All
+access happens on the event loop; a per-session lock keeps one user's
+concurrent requests from interleaving their turns.
+"""
+
+import asyncio
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.core.config import get_settings
+from backend.core.guidance import (
+    SUMMARY_SYSTEM_PROMPT,
+    build_followup,
+    build_prompt,
+    build_summary_prompt,
+)
+from backend.core.guidance_cache import code_fingerprint
+from backend.core.llm import Generation, LLMUnavailable
+from backend.core.llm_scheduler import LLMScheduler, Priority, QueueFull
+from backend.models.schemas import GuidanceRequest, ProblemDetail
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English and code; only used when Ollama didn't tell us
+    return len(text) // 4 + 1
+
+
+@dataclass(eq=False)
+class GuidanceSession:
+    user_id: str
+    problem_id: str
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    summary: str = ""
+    # Ollama's context after the last reply, as 4-byte token ids; None when the next turn must re-prime
+    context: Optional[array] = None
+    # Size of the conversation the model holds (or would, once re-primed)
+    tokens: int = 0
+    code_fingerprint: str = ""
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    summarizing: bool = False
+
+    def next_prompt(
+        self, payload: GuidanceRequest, problem: Optional[ProblemDetail]
+    ) -> Tuple[str, Optional[List[int]]]:
+        """(prompt, context) for the next turn: just the message when the model holds the conversation."""
+        if self.context is not None:
+            changed = code_fingerprint(payload.code_snippet, payload.language) != self.code_fingerprint
+            return build_followup(payload, include_code=changed), self.context.tolist()
+        return build_prompt(payload, problem, self.summary, self.turns), None
+
+    def _estimate(self) -> int:
+        return _estimate_tokens(self.summary) + sum(
+            _estimate_tokens(learner) + _estimate_tokens(tutor) for learner, tutor in self.turns
+        )
+
+
+class GuidanceSessions:
+    def __init__(self, max_entries: int, ttl_seconds: float, token_budget: int, keep_turns: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self._sessions: "OrderedDict[SessionKey, GuidanceSession]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self.continued = 0  # turns sent as a follow-up to Ollama's context
+        self.primed = 0  # turns sent with the full prompt
+        self.compactions = 0
+        self.expired = 0
+
+    def get(self, user_id: str, problem_id: str, fresh: bool = False) -> GuidanceSession:
+        """The user's conversation on this problem; a new one if `fresh`, idle too long or never started."""
+        key = (user_id, problem_id)
+        now = time.monotonic()
+        session = self._sessions.get(key)
+        if session is not None and (fresh or now - session.last_used > self.ttl_seconds):
+            if not fresh:
+                self.expired += 1
+            del self._sessions[key]
+            session = None
+        if session is None:
+            session = self._sessions[key] = GuidanceSession(user_id, problem_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(key)
+        session.last_used = now
+        return session
+
+    def record(
+        self,
+        session: GuidanceSession,
+        payload: GuidanceRequest,
+        reply: str,
+        generation: Optional[Generation],
+        scheduler: LLMScheduler,
+    ) -> None:
+        """Append a served turn; `generation` is None for replies that came from the response cache."""
+        if session.context is not None and generation is not None:
+            self.continued += 1
+        else:
+            self.primed += 1
+        session.turns.append((payload.user_message, reply))
+        session.code_fingerprint = code_fingerprint(payload.code_snippet, payload.language)
+        if generation is not None and generation.context:
+            session.context = array("I", generation.context)
+            session.tokens = len(session.context)
+        else:
+            session.context = None
+            session.tokens = session._estimate()
+        if session.tokens > self.token_budget and len(session.turns) > self.keep_turns and not session.summarizing:
+            session.summarizing = True
+            task = asyncio.create_task(self._compact(session, scheduler))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session: GuidanceSession, scheduler: LLMScheduler) -> None:
+        # Not under the session lock: the learner keeps chatting on the old context meanwhile
+        older = session.turns[:len(session.turns) - self.keep_turns]
+        try:
+            generation = await scheduler.generate(
+                build_summary_prompt(session.summary, older),
+                system=SUMMARY_SYSTEM_PROMPT,
+                priority=Priority.SUMMARY,
+            )
+            summary = generation.text.strip()
+        except (LLMUnavailable, QueueFull) as exc:
+            # Keep the session bounded anyway; only the older turns are forgotten
+            logger.info("guidance summary failed, dropping %d older turns: %s", len(older), exc)
+            summary = session.summary
+        finally:
+            session.summarizing = False
+        if session.turns[:len(older)] != older:
+            return  # restarted while we were summarizing
+        del session.turns[:len(older)]
+        session.summary = summary
+        session.context = None
+        session.tokens = session._estimate()
+        self.compactions += 1
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "sessions": len(self._sessions),
+            "continued": self.continued,
+            "primed": self.primed,
+            "compactions": self.compactions,
+            "expired": self.expired,
+        }
+
+
+_sessions: Optional[GuidanceSessions] = None
+
+
+def get_guidance_sessions() -> GuidanceSessions:
+    global _sessions
+    if _sessions is None:
+        settings = get_settings()
+        _sessions = GuidanceSessions(
+            max_entries=settings.guidance_session_max_entries,
+            ttl_seconds=settings.guidance_session_ttl_seconds,
+            token_budget=settings.guidance_session_token_budget,
+            keep_turns=settings.guidance_session_keep_turns,
+        )
+    return _sessions
+
+
+async def stop_guidance_sessions() -> None:
+    if _sessions is not None:
+        await _sessions.stop()
@@ -0,0 +1,266 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Caches stay per process. A worker that changes something another worker
+may have cached calls `publish(topic, key)`, e.g. ("roadmap", user_id), and
+every other worker runs the handlers it subscribed for that topic, which
+evict locally. The writer's own cache is expected to be up to date already,
+so its handlers are not run.
+
+One dedicated connection (outside the pool) listens on a single channel and
+also sends: publishes are batched into as few NOTIFY payloads as fit in
+Postgres' 8000-byte limit. Sending is fire-and-forget and safe from any
+thread.
+
+NOTIFY has no replay, so the bus bounds staleness instead:
+
+- the listener pings itself every INVALIDATION_HEARTBEAT_SECONDS; a missing
+  echo, or a dropped connection, marks the bus down and it reconnects with
+  backoff;
+- while it is down, `max_age()` returns INVALIDATION_FALLBACK_TTL_SECONDS,
+  which caches apply as a TTL to their entries;
+- on every (re)connect, subscribers get key None ("drop everything"), since
+  whatever was published while it was down was missed;
+- publishes made while disconnected are queued (up to OUTBOX_LIMIT, then
+  collapsed into one drop-everything per topic) and sent on reconnect.
+
+Without DATABASE_URL there is one process and nothing to keep coherent: the
+bus never starts, `publish()` is a no-op and `max_age()` is None.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "osiris_invalidate"
+PAYLOAD_LIMIT = 7900  # bytes; NOTIFY payloads must stay under 8000
+OUTBOX_LIMIT = 10_000
+
+# Called with the invalidated key, or None when everything cached for the topic may be stale
+Handler = Callable[[Optional[str]], None]
+
+
+class InvalidationBus:
+    def __init__(self, dsn: Optional[str], heartbeat: float, fallback_ttl: float):
+        self.dsn = dsn
+        self.heartbeat = heartbeat
+        self.fallback_ttl = fallback_ttl
+        # Unique per process: several workers share a hostname
+        self.node = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._lock = threading.Lock()
+        self._outbox: List[Tuple[str, Optional[str]]] = []
+        self._overflowed: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._conn = None
+        self._last_echo = 0.0
+        self.up = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    # --- subscribers ---
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        with self._lock:
+            # Copy-on-write, as in backend.core.events
+            self._handlers = {**self._handlers, topic: self._handlers.get(topic, []) + [handler]}
+
+    def _dispatch(self, topic: str, key: Optional[str]) -> None:
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(key)
+            except Exception:
+                logger.exception("invalidation handler for %s failed", topic)
+
+    def _dispatch_all(self) -> None:
+        for topic in list(self._handlers):
+            self._dispatch(topic, None)
+
+    def max_age(self) -> Optional[float]:
+        """Longest a cache entry may be served; None while invalidations are being delivered."""
+        if self.dsn is None or self.up:
+            return None
+        return self.fallback_ttl
+
+    # --- publishers ---
+
+    def publish(self, topic: str, key: Optional[str]) -> None:
+        if self._loop is None:
+            return
+        with self._lock:
+            if topic in self._overflowed:
+                pass  # a drop-everything for this topic is already queued
+            elif len(self._outbox) >= OUTBOX_LIMIT:
+                self._overflowed.add(topic)
+                self._outbox = [(t, k) for t, k in self._outbox if t != topic] + [(topic, None)]
+            else:
+                self._outbox.append((topic, key))
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _batches(self, items: List[Tuple[str, Optional[str]]]) -> List[str]:
+        batches, batch = [], []
+        for item in items:
+            candidate = json.dumps({"n": self.node, "i": batch + [item]}, separators=(",", ":"))
+            if batch and len(candidate.encode()) > PAYLOAD_LIMIT:
+                batches.append(json.dumps({"n": self.node, "i": batch}, separators=(",", ":")))
+                batch = [item]
+            else:
+                batch.append(item)
+        if batch:
+            batches.append(json.dumps({"n": self.node, "i": batch}, separators=(",", ":")))
+        return batches
+
+    async def _send_outbox(self, conn) -> None:
+        with self._lock:
+            items, self._outbox = self._outbox, []
+            self._overflowed = set()
+        try:
+            for payload in self._batches(items):
+                await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+        except BaseException:
+            with self._lock:
+                self._outbox = items + self._outbox
+            raise
+
+    # --- connection ---
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("n") == self.node:
+            if message.get("ping"):
+                self._last_echo = time.monotonic()
+            return
+        for topic, key in message.get("i", ()):
+            self.received += 1
+            self._dispatch(topic, key)
+
+    def _on_terminate(self, _conn) -> None:
+        self.up = False
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self.dsn is None or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        backoff = 0.5
+        while not self._closing:
+            try:
+                self._conn = await asyncpg.connect(self.dsn, timeout=self.heartbeat)
+                self._conn.add_termination_listener(self._on_terminate)
+                await self._conn.add_listener(CHANNEL, self._on_notify)
+                self._last_echo = time.monotonic()
+                self.up = True
+                # Whatever other workers published while we weren't listening is lost
+                self._dispatch_all()
+                backoff = 0.5
+                await self._serve(self._conn)
+            except Exception as exc:
+                if self.up or not self.reconnects:
+                    logger.warning("invalidation bus down, caches fall back to a %ss TTL: %s", self.fallback_ttl, exc)
+            finally:
+                self.up = False
+                conn, self._conn = self._conn, None
+                if conn is not None:
+                    conn.terminate()
+            if not self._closing:
+                self.reconnects += 1
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _serve(self, conn) -> None:
+        ping = json.dumps({"n": self.node, "ping": True})
+        next_ping = time.monotonic()
+        while self.up:
+            await self._send_outbox(conn)
+            if self._closing:
+                return
+            now = time.monotonic()
+            if now >= next_ping:
+                if now - self._last_echo > 2 * self.heartbeat:
+                    raise ConnectionError("heartbeat not echoed")
+                await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, ping)
+                next_ping = now + self.heartbeat
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, next_ping - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+        raise ConnectionError("connection closed")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            self._closing = True
+            self._wake.set()
+            if not self.up:
+                task.cancel()
+            try:
+                # Normally returns right after sending what's queued, so peers don't stay stale
+                await asyncio.wait_for(task, timeout=2.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "up": self.up,
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "outbox": len(self._outbox),
+        }
+
+
+_bus: Optional[InvalidationBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                settings = get_settings()
+                _bus = InvalidationBus(
+                    settings.database_url,
+                    heartbeat=settings.invalidation_heartbeat_seconds,
+                    fallback_ttl=settings.invalidation_fallback_ttl_seconds,
+                )
+    return _bus
+
+
+async def stop_invalidation_bus() -> None:
+    if _bus is not None:
+        await _bus.stop()
@@ -0,0 +1,178 @@
+"""
+Async Ollama client.
+
+One httpx.AsyncClient (and so one keep-alive connection pool) is shared by the
+whole process; generations never block a worker thread. `stream()` yields
+tokens as Ollama produces them so callers can forward them straight away.
+
+httpx is imported when the client is first built, not with this module: it
+costs ~50 ms of start-up (its CLI pulls in click, rich and pygments) that
+processes which never call the LLM shouldn't pay.
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from backend.core.config import Settings, get_settings
+from backend.core.metrics import LLM_TOKEN_RATE, LLM_TOKENS
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class LLMUnavailable(Exception):
+    """Ollama could not be reached or answered with an error."""
+
+
+@dataclass
+class Generation:
+    text: str
+    # Ollama's encoded conversation state; pass it back to continue without re-prefill
+    context: Optional[List[int]] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    duration_ns: int = 0
+
+
+@dataclass
+class StreamChunk:
+    text: str
+    done: bool = False
+    # Only set on the final chunk
+    generation: Optional[Generation] = field(default=None)
+
+
+def _generation_from(data: Dict[str, Any], text: str) -> Generation:
+    LLM_TOKENS.inc(("prompt",), data.get("prompt_eval_count", 0))
+    LLM_TOKENS.inc(("completion",), data.get("eval_count", 0))
+    # eval_duration covers generating only; fall back to the whole call when it's missing
+    eval_ns = data.get("eval_duration") or data.get("total_duration")
+    if eval_ns and data.get("eval_count"):
+        LLM_TOKEN_RATE.observe((), data["eval_count"] / (eval_ns / 1e9))
+    return Generation(
+        text=text,
+        context=data.get("context"),
+        prompt_tokens=data.get("prompt_eval_count", 0),
+        completion_tokens=data.get("eval_count", 0),
+        duration_ns=data.get("total_duration", 0),
+    )
+
+
+class OllamaClient:
+    def __init__(self, settings: Settings):
+        self.base_url = settings.ollama_url.rstrip("/")
+        self.model = settings.ollama_model
+        self.keep_alive = settings.ollama_keep_alive
+        import httpx
+
+        self._httpx = httpx
+        self._limits = httpx.Limits(
+            max_connections=settings.ollama_max_connections,
+            max_keepalive_connections=settings.ollama_max_connections,
+            keepalive_expiry=60.0,
+        )
+        # Generations can legitimately take a long time between bytes; connecting shouldn't
+        self._timeout = httpx.Timeout(settings.ollama_timeout_seconds, connect=3.0, pool=10.0)
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # Warm-up builds it on a worker thread, possibly while a request needs it
+            with self._lock:
+                if self._client is None:
+                    self._client = self._httpx.AsyncClient(
+                        base_url=self.base_url, limits=self._limits, timeout=self._timeout
+                    )
+        return self._client
+
+    def _body(
+        self,
+        prompt: str,
+        system: Optional[str],
+        context: Optional[List[int]],
+        options: Optional[Dict[str, Any]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if system:
+            body["system"] = system
+        if context:
+            body["context"] = context
+        if options:
+            body["options"] = options
+        return body
+
+    async def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Generation:
+        try:
+            resp = await self.http.post("/api/generate", json=self._body(prompt, system, context, options, False))
+            resp.raise_for_status()
+        except self._httpx.HTTPError as exc:
+            raise LLMUnavailable(str(exc)) from exc
+        data = resp.json()
+        return _generation_from(data, data.get("response", ""))
+
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[StreamChunk]:
+        body = self._body(prompt, system, context, options, True)
+        parts: List[str] = []
+        try:
+            async with self.http.stream("POST", "/api/generate", json=body) as resp:
+                resp.raise_for_status()
+                # Ollama streams one JSON object per line
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise LLMUnavailable(data["error"])
+                    text = data.get("response", "")
+                    parts.append(text)
+                    if data.get("done"):
+                        yield StreamChunk(text=text, done=True, generation=_generation_from(data, "".join(parts)))
+                        return
+                    yield StreamChunk(text=text)
+        except self._httpx.HTTPError as exc:
+            raise LLMUnavailable(str(exc)) from exc
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> OllamaClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient(get_settings())
+    return _client
+
+
+async def close_llm_client() -> None:
+    if _client is not None:
+        await _client.aclose()
@@ -0,0 +1,276 @@
+"""
+Admission control in front of the LLM.
+
+A single Ollama instance can only run a few generations at once, so every model
+call goes through an LLMScheduler:
+
+- at most `max_concurrency` generations run at a time;
+- waiting requests sit in a bounded priority queue (assessment analysis is
+  served before free-form hints); when it is full, callers get QueueFull
+  immediately with a Retry-After estimate instead of piling up work;
+- identical in-flight non-streaming requests share one generation.
+
+Queue depth, wait times and rejections are kept for sizing hardware.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.core.llm import Generation, OllamaClient, StreamChunk, get_llm_client
+from backend.core.metrics import LLM_QUEUE_WAIT
+from backend.core.tracing import current_span, span, start_span
+
+
+class Priority(IntEnum):
+    ASSESSMENT = 0
+    GUIDANCE = 10
+    SUMMARY = 20
+
+
+_PRIORITY_LABELS = {p.value: p.name.lower() for p in Priority}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    enqueued_at: float = field(compare=False)
+    # Resolved when the ticket is handed a slot
+    granted: asyncio.Future = field(compare=False)
+
+
+class LLMScheduler:
+    def __init__(self, client: OllamaClient, max_concurrency: int, max_queue: int):
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._heap: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._service_ewma = 5.0  # seconds; refined from observed generations
+
+    # --- slots ---
+
+    def admit_or_raise(self) -> None:
+        """Cheap pre-check so callers can fail fast before doing any work."""
+        if self._running >= self.max_concurrency and len(self._heap) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    async def _acquire(self, priority: int) -> _Ticket:
+        ticket = _Ticket(int(priority), next(self._seq), time.monotonic(), asyncio.get_running_loop().create_future())
+
+        if self._running < self.max_concurrency and not self._heap:
+            self._running += 1
+            ticket.granted.set_result(True)
+        else:
+            if len(self._heap) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(self.retry_after())
+            heapq.heappush(self._heap, ticket)
+            try:
+                await ticket.granted
+            except asyncio.CancelledError:
+                if ticket.granted.done() and not ticket.granted.cancelled():
+                    # The slot was handed over just as we were cancelled
+                    self._release()
+                else:
+                    self._discard(ticket)
+                raise
+
+        self.admitted += 1
+        wait = time.monotonic() - ticket.enqueued_at
+        self._waits.append(wait)
+        LLM_QUEUE_WAIT.observe((_PRIORITY_LABELS.get(ticket.priority, str(ticket.priority)),), wait)
+        return ticket
+
+    def _discard(self, ticket: _Ticket) -> None:
+        try:
+            self._heap.remove(ticket)
+            heapq.heapify(self._heap)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        while self._heap:
+            ticket = heapq.heappop(self._heap)
+            if ticket.granted.done():
+                continue
+            ticket.granted.set_result(True)
+            return
+        self._running -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.GUIDANCE):
+        """Hold one generation slot, e.g. for the duration of a stream."""
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._observe(time.monotonic() - started)
+            self._release()
+
+    # --- model calls ---
+
+    async def generate(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        priority: Priority = Priority.GUIDANCE,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Generation:
+        with span("llm.generate", **{"llm.priority": _PRIORITY_LABELS.get(int(priority), str(priority))}) as llm_span:
+            generation = await self._shared_generate(prompt, system, priority, context, options)
+            llm_span.set("llm.prompt_tokens", generation.prompt_tokens)
+            llm_span.set("llm.completion_tokens", generation.completion_tokens)
+            return generation
+
+    async def _shared_generate(
+        self,
+        prompt: str,
+        system: Optional[str],
+        priority: Priority,
+        context: Optional[List[int]],
+        options: Optional[Dict[str, Any]],
+    ) -> Generation:
+        key = (prompt, system, tuple(context or ()), tuple(sorted((options or {}).items())))
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            current_span().set("llm.coalesced", True)
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Only the request we piggybacked on went away; generate on our own
+                return await self._shared_generate(prompt, system, priority, context, options)
+
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[key] = shared
+        try:
+            generation = await self._generate(priority, prompt, system, context, options)
+            shared.set_result(generation)
+            return generation
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as exc:
+            shared.set_exception(exc)
+            shared.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _generate(
+        self,
+        priority: int,
+        prompt: str,
+        system: Optional[str],
+        context: Optional[List[int]],
+        options: Optional[Dict[str, Any]],
+    ) -> Generation:
+        ticket = await self._acquire(priority)
+        current_span().set("llm.queue_wait_ms", round((time.monotonic() - ticket.enqueued_at) * 1000, 3))
+        started = time.monotonic()
+        try:
+            return await self.client.generate(prompt, system=system, context=context, options=options)
+        finally:
+            self._observe(time.monotonic() - started)
+            self._release()
+
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        priority: Priority = Priority.GUIDANCE,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[StreamChunk]:
+        # Not current for the caller: this generator's frames interleave with the consumer's
+        llm_span = start_span("llm.stream", **{"llm.priority": _PRIORITY_LABELS.get(int(priority), str(priority))})
+        queued = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            async with self.slot(priority):
+                llm_span.set("llm.queue_wait_ms", round((time.monotonic() - queued) * 1000, 3))
+                async for chunk in self.client.stream(prompt, system=system, context=context, options=options):
+                    if chunk.generation is not None:
+                        llm_span.set("llm.prompt_tokens", chunk.generation.prompt_tokens)
+                        llm_span.set("llm.completion_tokens", chunk.generation.completion_tokens)
+                    yield chunk
+        except GeneratorExit:
+            # The consumer stopped early (e.g. the guardrail tripped): not an error
+            raise
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            llm_span.end(error)
+
+    # --- stats ---
+
+    def _observe(self, seconds: float) -> None:
+        self._service_ewma = 0.8 * self._service_ewma + 0.2 * seconds
+
+    def retry_after(self) -> int:
+        backlog = len(self._heap) + self._running
+        return max(1, math.ceil(self._service_ewma * backlog / self.max_concurrency))
+
+    def stats(self) -> Dict[str, float]:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "queue_depth": len(self._heap),
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "wait_p50_seconds": pct(0.50),
+            "wait_p95_seconds": pct(0.95),
+            "wait_max_seconds": waits[-1] if waits else 0.0,
+            "service_ewma_seconds": self._service_ewma,
+        }
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = LLMScheduler(
+            get_llm_client(),
+            max_concurrency=settings.llm_max_concurrency,
+            max_queue=settings.llm_max_queue,
+        )
+    return _scheduler
@@ -0,0 +1,251 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters, gauges and histograms keep one shard per thread (a plain dict
+reached through a threading.local), so recording is a dict update with no
+lock and no contention: the event loop thread, the sandbox reader and worker
+threads each write their own shard. A scrape sums the shards. Label values
+are passed as a tuple in `labelnames` order.
+
+Values other subsystems already count (cache hits, queue depth, pool size)
+aren't duplicated: `Registry.collect()` registers a callback that reads them
+at scrape time.
+
+Request metrics are recorded by `instrument_routes()`, which wraps each
+route's handler, so the route template is known without re-matching the path
+and in-flight requests can be counted per route.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+
+Labels = Tuple[str, ...]
+
+# Seconds; request and DB latencies
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; LLM queueing and generations run much longer
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_RATE_BUCKETS = (1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+class _Sharded:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def sample_labelnames(self, suffix: str) -> Tuple[str, ...]:
+        return self.labelnames
+
+    def _snapshots(self) -> List[Dict[Labels, Any]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() runs without releasing the GIL, so each copy is consistent
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        for labels, value in sorted(totals.items()):
+            yield "", labels, value
+
+
+class Gauge(Counter):
+    """Up/down counter (e.g. in-flight requests); shards hold each thread's net change."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # One count per bucket, then +Inf, then the sum
+            cell = shard[labels] = [0] * (len(self.buckets) + 2)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, cell in shard.items():
+                cell = cell[:]
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = cell
+                else:
+                    for i, value in enumerate(cell):
+                        total[i] += value
+        for labels, cell in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), cell):
+                cumulative += count
+                yield "_bucket", labels + (_format_value(bound),), cumulative
+            yield "_sum", labels, cell[-1]
+            yield "_count", labels, cumulative
+
+    def sample_labelnames(self, suffix: str) -> Tuple[str, ...]:
+        return self.labelnames + ("le",) if suffix == "_bucket" else self.labelnames
+
+
+# name, kind, help, labelnames, {labels: value}
+Collected = Tuple[str, str, str, Sequence[str], Dict[Labels, float]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Sharded] = []
+        self._collectors: List[Callable[[], Iterable[Collected]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, collector: Callable[[], Iterable[Collected]]) -> None:
+        """Register a scrape-time callback for values kept elsewhere."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                names = metric.sample_labelnames(suffix)
+                lines.append(f"{metric.name}{suffix}{_label_text(names, labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, help, labelnames, values in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values.items():
+                    lines.append(f"{name}{_label_text(labelnames, labels)} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "osiris_http_requests_total", "Requests handled, by route template and status code.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "osiris_http_request_duration_seconds", "Handler latency by route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "osiris_http_requests_in_flight", "Requests currently being handled, by route template.", ("method", "route")
+)
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "osiris_llm_queue_wait_seconds", "Time LLM calls waited for a generation slot.", ("priority",), SLOW_BUCKETS
+)
+LLM_TOKENS = REGISTRY.counter("osiris_llm_tokens_total", "Tokens processed by Ollama.", ("kind",))
+LLM_TOKEN_RATE = REGISTRY.histogram(
+    "osiris_llm_tokens_per_second", "Generation speed per LLM call (completion tokens / second).", (),
+    TOKEN_RATE_BUCKETS,
+)
+SANDBOX_EXECUTIONS = REGISTRY.histogram(
+    "osiris_sandbox_execution_seconds", "Sandboxed test runs, by outcome (submit to result).", ("status",),
+    SLOW_BUCKETS,
+)
+GUARDRAIL_TRIPS = REGISTRY.counter(
+    "osiris_guidance_guardrail_trips_total", "Guidance replies stopped for giving away code, by reason.", ("reason",)
+)
+DB_ACQUIRE = REGISTRY.histogram("osiris_db_acquire_seconds", "Wait for a pooled database connection.")
+
+
+def instrument(app, method_route: Tuple[str, str]):
+    """Wrap one route's ASGI handler to record latency, status and in-flight count."""
+    method, route = method_route
+    in_flight = (method, route)
+
+    async def instrumented(scope, receive, send):
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(in_flight)
+        started = time.perf_counter()
+        try:
+            await app(scope, receive, send_with_status)
+        finally:
+            HTTP_LATENCY.observe(in_flight, time.perf_counter() - started)
+            HTTP_IN_FLIGHT.dec(in_flight)
+            HTTP_REQUESTS.inc((method, route, str(status)))
+
+    return instrumented
+
+
+def instrument_routes(app) -> None:
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            method = "|".join(sorted(route.methods))
+            route.app = instrument(route.app, (method, route.path_format))
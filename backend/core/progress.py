@@ -0,0 +1,197 @@
+"""
+Per-user progress rollups.
+
+/progress/overview is answered from a small aggregate per user that is updated
+on every attempt.graded event, so reads are O(1) no matter how long the
+user's history is:
+
+- total attempts, and the set of problems with an accepted attempt;
+- the day streak, kept as (last active day, streak length) where days are
+  calendar days in the user's own timezone. A streak survives until the end of
+  the day after the last active day.
+
+Every event is also appended to a raw in-memory log, indexed by user.
+`rebuild()` recomputes the rollups from that log (for repair, or when a user's
+timezone changes, since the streak depends on where their day boundaries
+fall); rebuilding one user only reads that user's events.
+
+The log starts out empty in a new process: `restore()`, run in the background
+at startup, loads every attempt saved before the store was created from the
+attempt repository and rebuilds the rollups from it. Attempts graded after
+that arrive as events, so nothing is counted twice.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from backend.core.events import ATTEMPT_GRADED, get_event_bus
+from backend.database.pool import DatabaseUnavailable
+from backend.database.repositories import get_repositories
+
+logger = logging.getLogger(__name__)
+
+UTC = "UTC"
+
+
+def local_day(ts: float, tz: str) -> int:
+    """Ordinal of the calendar day `ts` falls on in timezone `tz`."""
+    return datetime.fromtimestamp(ts, ZoneInfo(tz)).date().toordinal()
+
+
+def valid_timezone(tz: Optional[str]) -> Optional[str]:
+    if not tz:
+        return None
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return tz
+
+
+@dataclass
+class Rollup:
+    total_attempts: int = 0
+    solved: Set[str] = field(default_factory=set)
+    last_day: int = 0  # local day ordinal of the latest attempt, 0 = never
+    streak: int = 0
+
+    def apply(self, problem_id: str, verdict: str, day: int) -> None:
+        self.total_attempts += 1
+        if verdict == "accepted":
+            self.solved.add(problem_id)
+        if day == self.last_day + 1:
+            self.streak += 1
+        elif day > self.last_day:
+            self.streak = 1
+        # day <= last_day: same day, or an out-of-order event from the past
+        self.last_day = max(self.last_day, day)
+
+    def current_streak(self, today: int) -> int:
+        return self.streak if self.last_day >= today - 1 else 0
+
+
+# Raw log entry, kept per user: (problem_id, verdict, submitted epoch seconds)
+LogEntry = Tuple[str, str, float]
+
+
+class ProgressStore:
+    def __init__(self):
+        self._rollups: Dict[str, Rollup] = {}
+        self._timezones: Dict[str, str] = {}
+        self._log: Dict[str, List[LogEntry]] = {}
+        self._lock = threading.Lock()
+        # Attempts submitted before this come from the repository (`restore`), later ones as events
+        self.created_at = time.time()
+
+    def timezone(self, user_id: str) -> str:
+        return self._timezones.get(user_id, UTC)
+
+    def set_timezone(self, user_id: str, tz: str) -> None:
+        """Remember the user's IANA timezone; a change re-derives their streak from the log."""
+        with self._lock:
+            if self._timezones.get(user_id, UTC) == tz:
+                return
+            self._timezones[user_id] = tz
+        self.rebuild([user_id])
+
+    def record(self, user_id: str, problem_id: str, verdict: str, at: float) -> None:
+        with self._lock:
+            self._log.setdefault(user_id, []).append((problem_id, verdict, at))
+            rollup = self._rollups.get(user_id)
+            if rollup is None:
+                rollup = self._rollups[user_id] = Rollup()
+            rollup.apply(problem_id, verdict, local_day(at, self._timezones.get(user_id, UTC)))
+
+    def _on_attempt(self, payload: Dict[str, Any]) -> None:
+        self.record(payload["user_id"], payload["problem_id"], payload["verdict"], payload["at"])
+
+    def overview(self, user_id: str) -> Tuple[int, int, int]:
+        """(problems_completed, total_attempts, current_streak_days)."""
+        tz = self.timezone(user_id)
+        today = datetime.now(timezone.utc).astimezone(ZoneInfo(tz)).date().toordinal()
+        with self._lock:
+            rollup = self._rollups.get(user_id)
+            if rollup is None:
+                return 0, 0, 0
+            return len(rollup.solved), rollup.total_attempts, rollup.current_streak(today)
+
+    def solved(self, user_id: str) -> Set[str]:
+        """Problems `user_id` has an accepted attempt on."""
+        with self._lock:
+            rollup = self._rollups.get(user_id)
+            return set(rollup.solved) if rollup is not None else set()
+
+    def rebuild(self, user_ids: Optional[Iterable[str]] = None) -> int:
+        """Recompute rollups from the raw log (all users, or just `user_ids`); returns users rebuilt."""
+        only = set(user_ids) if user_ids is not None else None
+        with self._lock:
+            users = list(self._log) if only is None else [u for u in only if u in self._log]
+            lengths = {user_id: len(self._log[user_id]) for user_id in users}
+            timezones = dict(self._timezones)
+
+        fresh: Dict[str, Rollup] = {}
+        for user_id, n in lengths.items():
+            rollup = fresh[user_id] = Rollup()
+            tz = timezones.get(user_id, UTC)
+            # Replay in submission order so streaks see days ascending
+            for problem_id, verdict, at in sorted(self._log[user_id][:n], key=lambda e: e[2]):
+                rollup.apply(problem_id, verdict, local_day(at, tz))
+
+        with self._lock:
+            if only is None:
+                self._rollups = fresh
+            else:
+                for user_id in only:
+                    self._rollups.pop(user_id, None)
+                self._rollups.update(fresh)
+            # Fold in whatever was recorded while rebuilding
+            for user_id, entries in self._log.items():
+                if only is None or user_id in only:
+                    for problem_id, verdict, at in entries[lengths.get(user_id, 0):]:
+                        rollup = self._rollups.setdefault(user_id, Rollup())
+                        rollup.apply(problem_id, verdict, local_day(at, self._timezones.get(user_id, UTC)))
+        return len(fresh)
+
+    async def restore(self) -> int:
+        """Load attempts saved by earlier processes and rebuild from them; retries until the database answers."""
+        before = datetime.fromtimestamp(self.created_at, timezone.utc)
+        backoff = 1.0
+        while True:
+            history: Dict[str, List[LogEntry]] = {}
+            try:
+                async for record in get_repositories().attempts.history(before):
+                    at = datetime.fromisoformat(record.response.submitted_at).timestamp()
+                    history.setdefault(record.user_id, []).append((record.problem_id, record.response.verdict, at))
+            except DatabaseUnavailable as exc:
+                logger.warning("progress: could not load attempt history (%s), retrying in %.0fs", exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            break
+        with self._lock:
+            for user_id, entries in history.items():
+                self._log[user_id] = entries + self._log.get(user_id, [])
+        # A full replay: CPU-bound, so off the event loop
+        return await asyncio.to_thread(self.rebuild)
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    """Created at startup (see main.lifespan) so no attempt event is missed."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = ProgressStore()
+                get_event_bus().subscribe(ATTEMPT_GRADED, store._on_attempt)
+                _store = store
+    return _store
@@ -0,0 +1,327 @@
+"""
+Per-user rate limits and daily quotas for the expensive endpoints.
+
+Each limited route has a name ("guidance", "attempts") and a list of policies,
+configured as comma-separated `kind:limit/period` specs, e.g.
+RATE_LIMIT_GUIDANCE=bucket:10/1m,quota:300/1d:
+
+- `bucket`: token bucket holding `limit` requests, refilled at limit/period;
+  absorbs bursts, caps the sustained rate;
+- `window`: sliding-window counter, at most ~`limit` requests in any `period`
+  (the previous fixed window's count is weighted by how much of it overlaps);
+- `quota`: `limit` requests per calendar period (UTC), e.g. per day.
+
+A request is admitted only if every policy admits it, and only then is it
+charged, so a rejected request doesn't eat into the quota. Responses carry
+RateLimit-Limit/-Remaining/-Reset (for the tightest policy) and
+RateLimit-Policy; rejections are 429 with Retry-After.
+
+Policy state is a short tuple per (route, policy, user), kept in a store:
+`MemoryStore` for a single worker, or `SQLiteStore` (RATE_LIMIT_STORE=sqlite)
+to share limits between workers on one host through a WAL-mode SQLite file.
+States are timestamped with wall-clock time so every process agrees on them.
+SQLite updates can wait on another worker's write lock, so they run on a
+worker thread, and a store that stays locked or fails admits the request
+rather than failing it.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "var" / "ratelimit.sqlite3"
+
+State = Tuple[float, ...]
+
+_PERIOD_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # seconds until the policy is fully replenished / its window ends
+    retry_after: float = 0.0  # seconds until a rejected request would be admitted
+
+
+class TokenBucket:
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    def apply(self, state: Optional[State], now: float, cost: int) -> Tuple[State, Decision]:
+        tokens, updated = state if state is not None else (float(self.limit), now)
+        tokens = min(float(self.limit), tokens + max(0.0, now - updated) * self.rate)
+        if tokens >= cost:
+            tokens -= cost
+            return (tokens, now), Decision(True, self.limit, int(tokens), (self.limit - tokens) / self.rate)
+        return (tokens, now), Decision(
+            False, self.limit, 0, (self.limit - tokens) / self.rate, (cost - tokens) / self.rate
+        )
+
+
+class SlidingWindow:
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+
+    def apply(self, state: Optional[State], now: float, cost: int) -> Tuple[State, Decision]:
+        window = math.floor(now / self.period)
+        start, current, previous = state if state is not None else (window, 0, 0)
+        if window == start + 1:
+            current, previous = 0, current
+        elif window != start:
+            current, previous = 0, 0
+        elapsed = now / self.period - window  # fraction of the current window gone
+        used = previous * (1 - elapsed) + current
+        reset = (window + 1) * self.period - now
+        if used + cost <= self.limit:
+            return (window, current + cost, previous), Decision(
+                True, self.limit, int(self.limit - used - cost), reset
+            )
+        if current + cost <= self.limit and previous:
+            # Admitted once enough of the previous window has slid out
+            wait = (1 - (self.limit - current - cost) / previous - elapsed) * self.period
+        else:
+            # Only after this window closes and part of it has slid out of the next one
+            wait = reset + (1 - (self.limit - cost) / current) * self.period if current else reset
+        return (window, current, previous), Decision(False, self.limit, 0, reset, max(0.0, wait))
+
+
+class Quota:
+    """`limit` per calendar period: days start at midnight UTC."""
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+
+    def apply(self, state: Optional[State], now: float, cost: int) -> Tuple[State, Decision]:
+        window = math.floor(now / self.period)
+        start, used = state if state is not None else (window, 0)
+        if start != window:
+            used = 0
+        reset = (window + 1) * self.period - now
+        if used + cost <= self.limit:
+            return (window, used + cost), Decision(True, self.limit, int(self.limit - used - cost), reset)
+        return (window, used), Decision(False, self.limit, 0, reset, reset)
+
+
+POLICIES = {"bucket": TokenBucket, "window": SlidingWindow, "quota": Quota}
+
+_SPEC = re.compile(r"^(bucket|window|quota):(\d+)/(\d*)([smhd])$")
+
+
+def parse_policies(spec: str) -> Tuple:
+    """'bucket:10/1m,quota:300/1d' -> (TokenBucket(10, 60), Quota(300, 86400)); '' -> no limits."""
+    policies = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        match = _SPEC.match(part)
+        if match is None:
+            raise ValueError(f"bad rate limit policy {part!r}; expected kind:limit/period, e.g. bucket:10/1m")
+        kind, limit, count, unit = match.groups()
+        policies.append(POLICIES[kind](int(limit), int(count or 1) * _PERIOD_UNITS[unit]))
+    return tuple(policies)
+
+
+# --- stores ---
+
+# Called with the current states (None = never seen); returns new states to write, or None to write nothing
+Update = Callable[[List[Optional[State]]], Optional[List[State]]]
+
+
+class MemoryStore:
+    """Process-local; least recently used keys are dropped past `max_keys`."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, State]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, keys: Sequence[str], update: Update) -> None:
+        with self._lock:
+            states = update([self._states.get(key) for key in keys])
+            if states is None:
+                return
+            for key, state in zip(keys, states):
+                self._states[key] = state
+                self._states.move_to_end(key)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+
+
+class SQLiteStore:
+    """Shared by every worker that opens the same file; each update is one write transaction."""
+
+    PURGE_EVERY = 10_000  # updates
+    MAX_AGE = 2 * 86400  # seconds untouched before a key is purged (longer than any daily quota)
+    # Waits for other workers' write locks, so callers keep it off the event loop
+    blocking = True
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._updates = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(key TEXT PRIMARY KEY, state TEXT NOT NULL, touched REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Limits survive a process crash but needn't survive power loss
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def update(self, keys: Sequence[str], update: Update) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            found = dict(conn.execute(
+                f"SELECT key, state FROM rate_limits WHERE key IN ({','.join('?' * len(keys))})", tuple(keys)
+            ))
+            states = update([tuple(json.loads(found[key])) if key in found else None for key in keys])
+            if states is not None:
+                conn.executemany(
+                    "INSERT INTO rate_limits (key, state, touched) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET state = excluded.state, touched = excluded.touched",
+                    [(key, json.dumps(state), now) for key, state in zip(keys, states)],
+                )
+            self._updates += 1
+            if self._updates % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE touched < ?", (now - self.MAX_AGE,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# --- limiter ---
+
+class RateLimiter:
+    def __init__(self, store, rules: Dict[str, Tuple]):
+        self.store = store
+        self.rules = {name: policies for name, policies in rules.items() if policies}
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, name: str, user_id: str, cost: int = 1) -> Optional[List[Tuple[object, Decision]]]:
+        """
+        Charge `cost` against every policy of `name` if all admit it; None when `name` isn't limited
+        (or the store failed, which admits the request).
+        """
+        policies = self.rules.get(name)
+        if policies is None:
+            return None
+        keys = [f"{name}:{i}:{user_id}" for i in range(len(policies))]
+        now = time.time()
+        decisions: List[Tuple[object, Decision]] = []
+
+        def update(states: List[Optional[State]]) -> Optional[List[State]]:
+            outcomes = [policy.apply(state, now, cost) for policy, state in zip(policies, states)]
+            decisions.extend((policy, decision) for policy, (_, decision) in zip(policies, outcomes))
+            if all(decision.allowed for _, decision in decisions):
+                return [new_state for new_state, _ in outcomes]
+            return None
+
+        try:
+            self.store.update(keys, update)
+        except sqlite3.Error as exc:
+            # Busy past the timeout, or a broken file: don't turn that into failed requests
+            logger.warning("rate limit store unavailable, admitting %s for %s: %s", name, user_id, exc)
+            return None
+        if all(decision.allowed for _, decision in decisions):
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return decisions
+
+
+def _headers(decisions: List[Tuple[object, Decision]]) -> Dict[str, str]:
+    # Report the policy closest to running out (among rejecting ones, the one that clears last)
+    rejecting = [d for _, d in decisions if not d.allowed]
+    tightest = (
+        max(rejecting, key=lambda d: d.retry_after) if rejecting
+        else min((d for _, d in decisions), key=lambda d: (d.remaining, -d.reset))
+    )
+    headers = {
+        "RateLimit-Limit": str(tightest.limit),
+        "RateLimit-Remaining": str(tightest.remaining),
+        "RateLimit-Reset": str(math.ceil(tightest.reset)),
+        "RateLimit-Policy": ", ".join(f"{policy.limit};w={int(policy.period)}" for policy, _ in decisions),
+    }
+    if rejecting:
+        headers["Retry-After"] = str(max(1, math.ceil(tightest.retry_after)))
+    return headers
+
+
+async def enforce_rate_limit(name: str, user_id: str) -> Dict[str, str]:
+    """
+    Charge one request of `name` to the user, or raise 429 if a limit is reached.
+
+    Returns the RateLimit-* headers for the response ({} if `name` has no limits).
+    """
+    limiter = get_rate_limiter()
+    if limiter.store.blocking:
+        decisions = await asyncio.to_thread(limiter.check, name, user_id)
+    else:
+        decisions = limiter.check(name, user_id)
+    if not decisions:
+        return {}
+    headers = _headers(decisions)
+    if "Retry-After" in headers:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit reached, please retry later",
+            headers=headers,
+        )
+    return headers
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                settings = get_settings()
+                rules = {
+                    "guidance": parse_policies(settings.rate_limit_guidance),
+                    "attempts": parse_policies(settings.rate_limit_attempts),
+                }
+                if settings.rate_limit_store == "off":
+                    rules = {}
+                if settings.rate_limit_store == "sqlite":
+                    store = SQLiteStore(Path(settings.rate_limit_db) if settings.rate_limit_db else DEFAULT_DB_PATH)
+                else:
+                    store = MemoryStore(settings.rate_limit_max_keys)
+                _limiter = RateLimiter(store, rules)
+    return _limiter
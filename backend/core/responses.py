@@ -0,0 +1,59 @@
+"""
+Fast path for responses the API builds itself.
+
+By default FastAPI re-validates a route's return value against its
+`response_model`, dumps it to plain Python objects and then runs json.dumps
+over those. For models we construct from already-validated data (catalog
+records, generated roadmaps, rollups) all three steps are overhead.
+
+Routes opt in by returning FastJSONResponse(content): a returned Response
+bypasses FastAPI's response processing, and pydantic-core serializes models,
+UUIDs and enums to JSON bytes in one native pass. Keep `response_model` on the
+route so the OpenAPI schema stays the same.
+
+`python -m backend.bench.serialization` compares both paths per endpoint.
+
+Bodies that are read far more often than they change (problem statements,
+meta enums, materialized roadmaps) go one step further: a CachedBody holds the
+rendered bytes and a strong ETag hashed from them, kept next to the data it
+was rendered from. `cached_json_response()` answers a matching If-None-Match
+with 304 and otherwise sends the stored bytes, so neither path serializes.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+import pydantic_core
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+class CachedBody:
+    """A JSON body rendered once, with a strong ETag derived from its bytes."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content: Any):
+        self.body = pydantic_core.to_json(content)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2), so W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_json_response(cached: CachedBody, if_none_match: Optional[str], cache_control: str) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,223 @@
+"""
+Roadmap generation.
+
+Every catalog problem is scored against the user's skill vector with array
+operations over per-problem feature columns (topic, difficulty):
+
+    p      = sigmoid(theta[topic] - b[difficulty])     predicted chance of solving
+    fit    = exp(-(p - target)^2 / 2 w^2)              close to the desired success rate
+    need   = 1 - sigmoid(theta[topic]) + sqrt(var[topic])   weak or not yet measured
+    score  = fit * (0.5 + need)                        solved problems get -inf
+
+The formula is evaluated once per (topic, difficulty) cell and gathered out to
+the problems, plus a fixed per-problem jitter that varies the picks within a
+cell. Candidates are the best `quota` problems of each topic plus the best k
+overall, each found with argpartition (no full sort); a greedy pass over them
+enforces the per-topic quota so one weak topic can't fill the whole roadmap.
+`generate_many` scores a block of users as one matrix for batch refreshes.
+"""
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from uuid import NAMESPACE_URL, uuid5
+
+import numpy as np
+
+from backend.core.catalog import CatalogSnapshot, get_catalog
+from backend.core.config import get_settings
+from backend.core.progress import ProgressStore, get_progress_store
+from backend.core.skills import DIFFICULTIES, DIFFICULTY_INDEX, TOPIC_INDEX, TOPICS, SkillEngine, get_skill_engine
+from backend.models.schemas import RoadmapItem, Topic
+
+# Users scored per matrix block in generate_many (block x catalog float32 scores)
+BATCH_BLOCK = 64
+# Width of the preference around the target success rate
+SUCCESS_WIDTH = 0.2
+
+TOPIC_LABELS = {
+    Topic.arrays_strings: "arrays & strings",
+    Topic.two_pointers: "two pointers",
+    Topic.stacks_queues: "stacks & queues",
+    Topic.linked_lists: "linked lists",
+    Topic.dp: "dynamic programming",
+    Topic.binary_search: "binary search",
+}
+
+
+@dataclass
+class CatalogFeatures:
+    """Per-problem feature columns, grouped by topic so each topic is one contiguous slice."""
+
+    snapshot: CatalogSnapshot
+    order: np.ndarray  # catalog position of each column
+    column: np.ndarray  # inverse of `order`: column of each catalog position
+    bounds: np.ndarray  # topic i occupies columns bounds[i]:bounds[i + 1]
+    cell: np.ndarray  # topic * len(DIFFICULTIES) + difficulty index, per column
+    jitter: np.ndarray  # fixed per-problem tie-breaker, per column
+
+
+def build_features(snapshot: CatalogSnapshot) -> CatalogFeatures:
+    n = len(snapshot)
+    topic = np.zeros(n, dtype=np.int64)
+    level = np.zeros(n, dtype=np.int64)
+    for (t, d), positions in snapshot.index.items():
+        if t is not None and d is not None:
+            pos = np.array(positions, dtype=np.int64)
+            topic[pos] = TOPIC_INDEX[t]
+            level[pos] = DIFFICULTY_INDEX[d]
+    order = np.argsort(topic, kind="stable")
+    column = np.empty(n, dtype=np.int64)
+    column[order] = np.arange(n)
+    bounds = np.searchsorted(topic[order], np.arange(len(TOPICS) + 1))
+    cell = (topic * len(DIFFICULTIES) + level)[order]
+    jitter = np.random.default_rng(0).random(n, dtype=np.float32) * np.float32(1e-3)
+    return CatalogFeatures(snapshot, order, column, bounds, cell, jitter)
+
+
+class RoadmapGenerator:
+    def __init__(self, skills: SkillEngine, progress: ProgressStore, target_success: float, topic_quota: float):
+        self.skills = skills
+        # Solved problems come from the progress rollups, which are restored from the attempt repository
+        self.progress = progress
+        self.target_success = target_success
+        self.topic_quota = topic_quota
+        self._features: Optional[CatalogFeatures] = None
+
+    def features(self) -> CatalogFeatures:
+        snapshot = get_catalog().snapshot
+        features = self._features
+        if features is None or features.snapshot is not snapshot:
+            features = self._features = build_features(snapshot)
+        return features
+
+    def solved(self, user_id: str) -> Set[str]:
+        return self.progress.solved(user_id)
+
+    def _scores(self, features: CatalogFeatures, theta: np.ndarray, var: np.ndarray) -> np.ndarray:
+        """theta/var: (users, topics) -> scores (users, feature columns), float32."""
+        b = np.array([self.skills.model.difficulty[d] for d in DIFFICULTIES])
+        need = 1.0 - 1.0 / (1.0 + np.exp(-theta)) + np.sqrt(var)
+        p = 1.0 / (1.0 + np.exp(b[None, None, :] - theta[:, :, None]))  # (users, topics, difficulties)
+        fit = np.exp(-np.square(p - self.target_success) / (2 * SUCCESS_WIDTH ** 2))
+        cells = (fit * (0.5 + need[:, :, None])).reshape(len(theta), -1).astype(np.float32)
+        return cells[:, features.cell] + features.jitter
+
+    def _pick(self, scores: np.ndarray, features: CatalogFeatures, k: int) -> List[int]:
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        quota = max(1, math.ceil(k * self.topic_quota))
+        # The k best of every topic contain both the global top k and each topic's top `quota`
+        candidates, candidate_topics = [], []
+        for t in range(len(TOPICS)):
+            lo, hi = features.bounds[t], features.bounds[t + 1]
+            m = min(k, hi - lo)
+            if m:
+                candidates.append(lo + np.argpartition(scores[lo:hi], hi - lo - m)[hi - lo - m:])
+                candidate_topics.append(np.full(m, t))
+        if not candidates:
+            return []
+        pool, pool_topics = np.concatenate(candidates), np.concatenate(candidate_topics)
+        ranked = np.argsort(-scores[pool], kind="stable")
+        ranked = ranked[np.isfinite(scores[pool[ranked]])]
+
+        picked: List[int] = []
+        per_topic = [0] * len(TOPICS)
+        leftovers: List[int] = []
+        for col, t in zip(pool[ranked].tolist(), pool_topics[ranked].tolist()):
+            if per_topic[t] < quota:
+                per_topic[t] += 1
+                picked.append(col)
+                if len(picked) == k:
+                    break
+            else:
+                leftovers.append(col)
+        picked += leftovers[:k - len(picked)]
+        return features.order[picked].tolist()
+
+    def _items(
+        self,
+        user_id: str,
+        features: CatalogFeatures,
+        picked: Sequence[int],
+        theta: np.ndarray,
+        var: np.ndarray,
+    ) -> List[RoadmapItem]:
+        items = []
+        for pos in picked:
+            record = features.snapshot.record(pos)
+            t = TOPIC_INDEX[record.detail.topic]
+            b = self.skills.model.difficulty[record.detail.difficulty]
+            p = 1.0 / (1.0 + math.exp(b - float(theta[t])))
+            items.append(
+                RoadmapItem(
+                    item_id=uuid5(NAMESPACE_URL, f"{user_id}/{record.problem_id}"),
+                    topic=record.detail.topic,
+                    difficulty=record.detail.difficulty,
+                    problem_id=record.problem_id,
+                    title=record.detail.title,
+                    rationale=self._rationale(record.detail.topic, float(theta[t]), float(var[t]), p),
+                    status="todo",
+                )
+            )
+        return items
+
+    def _rationale(self, topic: Topic, theta: float, var: float, p: float) -> str:
+        name = TOPIC_LABELS.get(topic, topic.value.replace("_", " "))
+        skill = 1.0 / (1.0 + math.exp(-theta))
+        odds = f"you should solve this about {round(p * 100)}% of the time"
+        if 1.0 - var / self.skills.model.prior_variance < 0.2:
+            return f"Little evidence on {name} yet; this calibrates your level ({odds})."
+        if skill < 0.45:
+            return f"{name.capitalize()} is a weak spot (skill {skill:.2f}); {odds}, enough to stretch without stalling."
+        return f"Keeps {name} sharp (skill {skill:.2f}) at a level where {odds}."
+
+    def generate(self, user_id: str, k: int) -> List[RoadmapItem]:
+        features = self.features()
+        theta, var = self.skills.vector(user_id)
+        scores = self._scores(features, theta[None, :], var[None, :])[0]
+        positions = features.snapshot.positions
+        solved = [positions[pid] for pid in self.solved(user_id) if pid in positions]
+        scores[features.column[solved]] = -np.inf
+        picked = self._pick(scores, features, k)
+        return self._items(user_id, features, picked, theta, var)
+
+    def generate_many(self, user_ids: Iterable[str], k: int) -> Dict[str, List[RoadmapItem]]:
+        """Roadmaps for many users, scoring BATCH_BLOCK users per matrix operation."""
+        features = self.features()
+        positions = features.snapshot.positions
+        user_ids = list(user_ids)
+        out: Dict[str, List[RoadmapItem]] = {}
+        for start in range(0, len(user_ids), BATCH_BLOCK):
+            block = user_ids[start:start + BATCH_BLOCK]
+            vectors = [self.skills.vector(u) for u in block]
+            theta = np.stack([v[0] for v in vectors])
+            var = np.stack([v[1] for v in vectors])
+            scores = self._scores(features, theta, var)
+            for row, user_id in enumerate(block):
+                solved = [positions[pid] for pid in self.solved(user_id) if pid in positions]
+                scores[row, features.column[solved]] = -np.inf
+                picked = self._pick(scores[row], features, k)
+                out[user_id] = self._items(user_id, features, picked, theta[row], var[row])
+        return out
+
+
+_generator: Optional[RoadmapGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_roadmap_generator() -> RoadmapGenerator:
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                settings = get_settings()
+                _generator = RoadmapGenerator(
+                    get_skill_engine(),
+                    get_progress_store(),
+                    target_success=settings.roadmap_target_success,
+                    topic_quota=settings.roadmap_topic_quota,
+                )
+    return _generator
@@ -0,0 +1,163 @@
+"""
+Materialized roadmaps.
+
+GET /roadmap is served from a precomputed RoadmapResponse per user (sliced to
+`limit`), so the hot path is one dict lookup. An entry is built on first read
+and dropped when something that affects it happens: a graded attempt or a
+submitted assessment (via backend.core.events), or a catalog reload (entries
+remember the catalog version they were built from). POST /roadmap/refresh
+rebuilds the entry eagerly.
+
+A per-user generation counter guards against a slow build storing a roadmap
+that was invalidated while it was being computed.
+
+Invalidations are also published on the cross-worker bus
+(backend.core.invalidation), so other workers drop their copy; while the bus
+is down, entries older than its fallback TTL are rebuilt on read. The store is
+created at startup (main.lifespan) so a worker publishes invalidations even if
+it never serves a roadmap. Only the invalidation crosses workers: a rebuild
+uses that worker's own inputs (skill profiles hydrated once per process, the
+solved sets in its progress rollups), which catch up on its next restart.
+
+`get_json()` also keeps each entry's rendered body and ETag per `limit`, so
+a poll that comes back with If-None-Match costs the lookup and a compare.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from backend.core.catalog import get_catalog
+from backend.core.config import get_settings
+from backend.core.events import ASSESSMENT_SUBMITTED, ATTEMPT_GRADED, ROADMAP_REFRESHED, get_event_bus
+from backend.core.invalidation import InvalidationBus, get_invalidation_bus
+from backend.core.responses import CachedBody
+from backend.core.roadmap import RoadmapGenerator, get_roadmap_generator
+from backend.models.schemas import RoadmapResponse, now_iso
+
+
+BUS_TOPIC = "roadmap"
+
+
+@dataclass(frozen=True)
+class _Entry:
+    roadmap: RoadmapResponse
+    catalog_version: str
+    bodies: Dict[int, CachedBody] = field(default_factory=dict)  # by limit
+    built_at: float = field(default_factory=time.monotonic)
+
+    def json(self, limit: int) -> CachedBody:
+        cached = self.bodies.get(limit)
+        if cached is None:
+            cached = self.bodies[limit] = CachedBody(_sliced(self.roadmap, limit))
+        return cached
+
+
+class RoadmapStore:
+    def __init__(self, generator: RoadmapGenerator, depth: int, max_entries: int, bus: InvalidationBus):
+        self.generator = generator
+        self.bus = bus
+        self.depth = depth  # items materialized per user; reads slice this
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str, limit: int) -> RoadmapResponse:
+        return _sliced(self._entry(user_id).roadmap, limit)
+
+    def get_json(self, user_id: str, limit: int) -> CachedBody:
+        return self._entry(user_id).json(limit)
+
+    def _entry(self, user_id: str) -> _Entry:
+        version = get_catalog().snapshot.version
+        max_age = self.bus.max_age()
+        oldest = time.monotonic() - max_age if max_age is not None else 0.0
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.catalog_version == version and entry.built_at >= oldest:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return self._build(user_id)
+
+    def refresh(self, user_id: str, limit: int) -> RoadmapResponse:
+        self.invalidate(user_id)
+        entry = self._build(user_id)
+        get_event_bus().publish(ROADMAP_REFRESHED, user_id=user_id)
+        return _sliced(entry.roadmap, limit)
+
+    def invalidate(self, user_id: str) -> None:
+        self._evict(user_id)
+        self.bus.publish(BUS_TOPIC, user_id)
+
+    def _evict(self, user_id: Optional[str]) -> None:
+        """Drop one user's entry, or every entry (user_id None)."""
+        with self._lock:
+            for uid in [user_id] if user_id is not None else list(self._entries):
+                self._generations[uid] = self._generations.get(uid, 0) + 1
+                if self._entries.pop(uid, None) is not None:
+                    self.invalidations += 1
+
+    def _build(self, user_id: str) -> _Entry:
+        with self._lock:
+            generation = self._generations.get(user_id, 0)
+        version = get_catalog().snapshot.version
+        items = self.generator.generate(user_id, self.depth)
+        entry = _Entry(RoadmapResponse(user_id=user_id, generated_at=now_iso(), items=items), version)
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._generations.pop(evicted, None)
+        return entry
+
+    def _on_event(self, payload: Dict[str, Any]) -> None:
+        self.invalidate(payload["user_id"])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+def _sliced(roadmap: RoadmapResponse, limit: int) -> RoadmapResponse:
+    if len(roadmap.items) <= limit:
+        return roadmap
+    return roadmap.model_copy(update={"items": roadmap.items[:limit]})
+
+
+_store: Optional[RoadmapStore] = None
+_store_lock = threading.Lock()
+
+
+def get_roadmap_store() -> RoadmapStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                store = RoadmapStore(
+                    get_roadmap_generator(),
+                    depth=settings.roadmap_store_depth,
+                    max_entries=settings.roadmap_store_max_entries,
+                    bus=get_invalidation_bus(),
+                )
+                bus = get_event_bus()
+                bus.subscribe(ATTEMPT_GRADED, store._on_event)
+                bus.subscribe(ASSESSMENT_SUBMITTED, store._on_event)
+                store.bus.subscribe(BUS_TOPIC, store._evict)
+                _store = store
+    return _store
@@ -0,0 +1,269 @@
+"""
+Executor for submitted Python code.
+
+Submissions run in children forked from a pre-warmed zygote process
+(backend/core/sandbox_zygote.py), so each run skips interpreter start-up and
+begins executing user code within a few milliseconds. The zygote is started in
+isolated mode (`python -I`) from a clean interpreter rather than forked from the
+API process, which has threads and open sockets.
+
+Limits (CPU, memory, open files, output size, wall clock) are enforced per
+child; see the zygote module for the details. The zygote gets a minimal
+environment, so submissions can't read the API's secrets, and children only
+ever see test inputs: return values are compared against expected outputs
+here, in the API process.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.core.metrics import SANDBOX_EXECUTIONS
+from backend.core.tracing import span
+
+ZYGOTE_PATH = Path(__file__).resolve().parent / "sandbox_zygote.py"
+
+# Zygote status -> attempt verdict
+_VERDICTS = {
+    "runtime_error": "runtime_error",
+    "compile_error": "compile_error",
+    "time_limit_exceeded": "time_limit_exceeded",
+    "memory_limit_exceeded": "memory_limit_exceeded",
+    "output_limit_exceeded": "output_limit_exceeded",
+}
+# Nothing of the API's environment (database URL, JWT secret, ...) reaches submissions
+_ZYGOTE_ENV = {"PATH": os.defpath, "LANG": "C.UTF-8"}
+_NOT_JSON = object()
+# Slack on top of the wall-clock limit before a run is given up on (the zygote enforces the limit itself)
+_ANSWER_MARGIN_SECONDS = 5.0
+
+
+class SandboxError(Exception):
+    """The sandbox itself failed (not the submitted code)."""
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    cpu_seconds: int = 2
+    memory_bytes: int = 256 * 1024 * 1024
+    max_fds: int = 32
+    output_bytes: int = 64 * 1024
+    wall_seconds: float = 5.0
+
+
+@dataclass
+class SandboxResult:
+    status: str
+    passed: int = 0
+    total: int = 0
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    stdout: str = ""
+    error: Optional[str] = None
+    startup_ms: Optional[float] = None
+
+    @property
+    def verdict(self) -> str:
+        if self.status == "ok":
+            return "accepted" if self.passed == self.total else "wrong_answer"
+        return _VERDICTS.get(self.status, "internal_error")
+
+    @property
+    def score(self) -> Optional[float]:
+        """Fraction of tests passed, 0.0 for limit/compile failures, None if the run says nothing about the code."""
+        if self.status in ("ok", "runtime_error"):
+            return self.passed / self.total if self.total else None
+        return 0.0 if self.status in _VERDICTS else None
+
+    @property
+    def feedback(self) -> str:
+        if self.status in ("ok", "runtime_error"):
+            msg = f"Passed {self.passed}/{self.total} tests."
+            first_error = next((r["error"] for r in self.results if r.get("error")), None)
+            return f"{msg} First error: {first_error}" if first_error else msg
+        return self.error or self.status.replace("_", " ").capitalize()
+
+
+def _result(report: Dict[str, Any], expected: List[Any]) -> SandboxResult:
+    """Grade the zygote's report of return values against the expected outputs."""
+    status = report.get("status", "internal_error")
+    outputs = report.get("outputs") or []
+    if status == "ok" and len(outputs) != len(expected):
+        status, report["error"] = "internal_error", "sandbox reported the wrong number of results"
+    results, passed = [], 0
+    for output, want in zip(outputs, expected):
+        entry = {"passed": False, "time_ms": output.get("time_ms")}
+        if "error" in output:
+            entry["error"] = output["error"]
+        elif output.get("value") is not None:
+            try:
+                got = json.loads(output["value"])
+            except (ValueError, RecursionError):
+                got = _NOT_JSON
+            entry["passed"] = got == want
+        passed += entry["passed"]
+        results.append(entry)
+    if status == "ok" and any("error" in r for r in results):
+        status = "runtime_error"
+    fields = {k: v for k, v in report.items() if k in _RESULT_FIELDS - _GRADED_FIELDS}
+    return SandboxResult(**fields, status=status, passed=passed, total=len(expected), results=results)
+
+
+class SandboxExecutor:
+    def __init__(self, limits: SandboxLimits, max_children: int, user: str = "nobody", network: str = "required"):
+        self.limits = limits
+        self.max_children = max_children
+        self.user = user
+        self.network = network
+        self._proc: Optional[subprocess.Popen] = None
+        self._pending: Dict[int, Tuple[concurrent.futures.Future, List[Any]]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.executions = 0
+
+    def start(self) -> None:
+        with self._lock:
+            self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        self._proc = subprocess.Popen(
+            [sys.executable, "-I", str(ZYGOTE_PATH), str(self.max_children), self.user, self.network],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd="/",
+            env=_ZYGOTE_ENV,
+        )
+        threading.Thread(target=self._read_results, args=(self._proc,), name="sandbox-reader", daemon=True).start()
+
+    def _read_results(self, proc: subprocess.Popen) -> None:
+        for line in proc.stdout:
+            data = json.loads(line)
+            with self._lock:
+                fut, expected = self._pending.pop(data.pop("id"), (None, None))
+            if fut is not None and not fut.done():
+                fut.set_result(_result(data, expected))
+        # Zygote exited: fail whatever it was still working on; the next submit restarts it
+        with self._lock:
+            if self._proc is proc:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {}
+        for fut, _ in pending.values():
+            if not fut.done():
+                fut.set_exception(SandboxError("sandbox process exited"))
+
+    def submit(self, code: str, entry_point: str, tests: List[Dict[str, Any]]) -> concurrent.futures.Future:
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        # Expected outputs stay in this process
+        job = {
+            "code": code,
+            "entry_point": entry_point,
+            "inputs": [test.get("input") for test in tests],
+            "limits": asdict(self.limits),
+        }
+        with self._lock:
+            self._ensure_started()
+            job_id = next(self._ids)
+            self._pending[job_id] = (fut, [test.get("output") for test in tests])
+            job["id"] = job_id
+            job["sent_ns"] = time.time_ns()
+            try:
+                self._proc.stdin.write(json.dumps(job).encode() + b"\n")
+                self._proc.stdin.flush()
+            except (BrokenPipeError, OSError) as exc:
+                self._pending.pop(job_id, None)
+                fut.set_exception(SandboxError(f"could not reach sandbox: {exc}"))
+            self.executions += 1
+        return fut
+
+    async def run(self, code: str, entry_point: str, tests: List[Dict[str, Any]]) -> SandboxResult:
+        started = time.perf_counter()
+        status = "sandbox_error"
+        with span("sandbox.run", **{"sandbox.tests": len(tests)}) as run_span:
+            try:
+                result = await self._wait(self.submit(code, entry_point, tests))
+                status = result.status
+                run_span.set("sandbox.passed", result.passed)
+                if result.startup_ms is not None:
+                    run_span.set("sandbox.startup_ms", result.startup_ms)
+                return result
+            finally:
+                run_span.set("sandbox.status", status)
+                SANDBOX_EXECUTIONS.observe((status,), time.perf_counter() - started)
+
+    async def _wait(self, fut: concurrent.futures.Future) -> SandboxResult:
+        """Await a submission, giving up if the zygote misses its own wall-clock deadline by a margin."""
+        with self._lock:
+            rounds = -(-len(self._pending) // max(self.max_children, 1))  # jobs queued ahead of this one
+        timeout = self.limits.wall_seconds * (rounds + 1) + _ANSWER_MARGIN_SECONDS
+        try:
+            async with asyncio.timeout(timeout):
+                return await asyncio.wrap_future(fut)
+        except asyncio.TimeoutError:
+            # A zygote that can't keep its deadlines is wedged: detach and kill it, fail the rest of
+            # its jobs, and let the next submission start a fresh one.
+            with self._lock:
+                proc, self._proc = self._proc, None
+                pending, self._pending = self._pending, {}
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+            for other, _ in pending.values():
+                if not other.done():
+                    other.set_exception(SandboxError("sandbox process was restarted"))
+            raise SandboxError(f"sandbox did not answer within {timeout:.0f}s") from None
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=self.limits.wall_seconds + 1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+_RESULT_FIELDS = set(SandboxResult.__dataclass_fields__)
+# Set by grading here, never taken from the zygote's report
+_GRADED_FIELDS = {"status", "passed", "total", "results"}
+
+_executor: Optional[SandboxExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_sandbox() -> SandboxExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                settings = get_settings()
+                limits = SandboxLimits(
+                    cpu_seconds=settings.sandbox_cpu_seconds,
+                    memory_bytes=settings.sandbox_memory_mb * 1024 * 1024,
+                    max_fds=settings.sandbox_max_fds,
+                    output_bytes=settings.sandbox_output_bytes,
+                    wall_seconds=settings.sandbox_wall_seconds,
+                )
+                _executor = SandboxExecutor(
+                    limits,
+                    settings.sandbox_max_children or os.cpu_count() or 1,
+                    user=settings.sandbox_user,
+                    network=settings.sandbox_network_isolation,
+                )
+    return _executor
+
+
+def close_sandbox() -> None:
+    if _executor is not None:
+        _executor.close()
@@ -0,0 +1,363 @@
+"""
+Sandbox zygote: a pre-warmed interpreter that forks one child per submission.
+
+Run as a standalone script (`python -I sandbox_zygote.py`) by
+backend.core.sandbox.SandboxExecutor; it must only import the standard library.
+Jobs arrive as JSON lines on stdin and results leave as JSON lines on stdout:
+
+    -> {"id": 1, "code": "...", "entry_point": "two_sum", "inputs": [...], "limits": {...}}
+    <- {"id": 1, "status": "ok", "outputs": [{"value": "[0, 1]", "time_ms": 0.01}, ...], ...}
+
+Each child moves into an empty network namespace (and refuses to run when it
+can't, unless started with network isolation "best_effort"), drops to an
+unprivileged user, applies rlimits (CPU, address space, open files, file
+size, processes), calls the entry point on each input and reports the return
+values, JSON-encoded, over a pipe. The zygote kills children that exceed
+their wall-clock budget.
+
+Children never see expected outputs: the executor compares in the API
+process. User code shares the child with the reporting code, so it can write
+its own report, but a report only carries values it could have returned
+anyway; the zygote passes on just the known fields, with their types checked.
+"""
+
+import ctypes
+import io
+import json
+import os
+import pwd
+import resource
+import selectors
+import signal
+import sys
+import time
+import traceback
+from typing import Optional
+
+# Pre-import what submissions commonly use so children don't pay for it
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import math  # noqa: F401
+import re  # noqa: F401
+import string  # noqa: F401
+import typing  # noqa: F401
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+MAX_ERROR_CHARS = 2000
+MAX_REPORT_BYTES = 8 * 1024 * 1024
+CHILD_STATUSES = ("ok", "compile_error", "memory_limit_exceeded", "isolation_error", "internal_error")
+
+
+class _CappedWriter(io.TextIOBase):
+    """stdout/stderr replacement that keeps at most `limit` characters."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def write(self, s):
+        room = self.limit - self.size
+        if room > 0:
+            self.parts.append(s[:room])
+            self.size += min(len(s), room)
+        if len(s) > room:
+            self.truncated = True
+        return len(s)
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+class IsolationError(Exception):
+    pass
+
+
+def _cut_network(best_effort: bool) -> bool:
+    """Move into an empty network namespace; without one, refuse unless `best_effort` (then disable sockets)."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.unshare(CLONE_NEWNET) == 0 or libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) == 0:
+            return True
+    except (OSError, AttributeError):
+        pass
+    if not best_effort:
+        raise IsolationError("network namespaces are unavailable; refusing to run untrusted code")
+    import socket
+
+    def _denied(*args, **kwargs):
+        raise PermissionError("network access is disabled in the sandbox")
+
+    # Only a speed bump (importlib.reload undoes it); the operator opted into this
+    for name in ("socket", "create_connection", "socketpair", "fromfd", "getaddrinfo"):
+        setattr(socket, name, _denied)
+    sys.modules["_socket"] = None
+    return False
+
+
+def _drop_privileges(uid: int, gid: int) -> None:
+    if os.geteuid() != 0:
+        return  # already unprivileged: the API's own (non-root) account
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+
+
+def _apply_limits(limits: dict) -> None:
+    cpu = int(limits.get("cpu_seconds", 2))
+    mem = int(limits.get("memory_bytes", 256 * 1024 * 1024))
+    fds = int(limits.get("max_fds", 32))
+    fsize = int(limits.get("output_bytes", 64 * 1024))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (fds, fds))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def _resolve_entry(ns: dict, entry_point: str):
+    fn = ns.get(entry_point)
+    if callable(fn):
+        return fn
+    # LeetCode style: class Solution with a method of that name
+    solution = ns.get("Solution")
+    if solution is not None and hasattr(solution, entry_point):
+        return getattr(solution(), entry_point)
+    raise NameError(f"function '{entry_point}' is not defined")
+
+
+def _call(fn, test_input):
+    if isinstance(test_input, dict):
+        return fn(**test_input)
+    if isinstance(test_input, list):
+        return fn(*test_input)
+    return fn(test_input)
+
+
+def _run_tests(job: dict, out: _CappedWriter) -> dict:
+    ns = {"__name__": "__submission__"}
+    sys.stdout = sys.stderr = out
+    startup_ms = (time.time_ns() - job["sent_ns"]) / 1e6 if "sent_ns" in job else None
+    try:
+        exec(compile(job["code"], "<submission>", "exec"), ns)
+        fn = _resolve_entry(ns, job["entry_point"])
+    except MemoryError:
+        return {"status": "memory_limit_exceeded", "error": "MemoryError"}
+    except BaseException as exc:
+        error = "".join(traceback.format_exception_only(type(exc), exc))
+        return {"status": "compile_error", "error": error[-MAX_ERROR_CHARS:]}
+    result = {"startup_ms": startup_ms}
+
+    outputs = []
+    for test_input in job["inputs"]:
+        started = time.perf_counter()
+        output = {}
+        try:
+            got = _call(fn, test_input)
+            try:
+                output["value"] = json.dumps(got)
+            except (TypeError, ValueError, RecursionError):
+                output["value"] = None  # can't equal any expected output
+        except MemoryError:
+            return dict(result, status="memory_limit_exceeded", error="MemoryError", outputs=outputs)
+        except RecursionError:
+            output["error"] = "RecursionError: maximum recursion depth exceeded"
+        except BaseException as exc:
+            output["error"] = f"{type(exc).__name__}: {exc}"[:MAX_ERROR_CHARS]
+        output["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        outputs.append(output)
+    return dict(result, status="ok", outputs=outputs)
+
+
+def _child(job: dict, write_fd: int, uid: int, gid: int, best_effort: bool) -> None:
+    limits = job.get("limits", {})
+    out = _CappedWriter(int(limits.get("output_bytes", 64 * 1024)))
+    network_isolated = False
+    try:
+        # Detach from the zygote's protocol pipes and every other child's result pipe
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.closerange(3, write_fd)
+        os.closerange(write_fd + 1, 1024)
+        os.setsid()
+        network_isolated = _cut_network(best_effort)
+        _drop_privileges(uid, gid)
+        _apply_limits(limits)
+        result = _run_tests(job, out)
+    except IsolationError as exc:
+        result = {"status": "isolation_error", "error": str(exc)}
+    except BaseException:
+        result = {"status": "internal_error", "error": traceback.format_exc(limit=-1)[-MAX_ERROR_CHARS:]}
+    result["stdout"] = out.getvalue()
+    result["stdout_truncated"] = out.truncated
+    result["network_namespace"] = network_isolated
+    data = json.dumps(result, default=repr).encode()
+    view = memoryview(data)
+    while view:
+        view = view[os.write(write_fd, view):]
+    os._exit(0)
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _report(data: bytes) -> dict:
+    """The fields of a child's report the executor reads, type-checked: user code may have written it."""
+    report = json.loads(data)
+    if not isinstance(report, dict):
+        raise ValueError("report is not an object")
+    outputs = []
+    for output in report.get("outputs") or ():
+        if not isinstance(output, dict):
+            raise ValueError("malformed output")
+        clean = {"time_ms": _number(output.get("time_ms"))}
+        if isinstance(output.get("error"), str):
+            clean["error"] = output["error"][:MAX_ERROR_CHARS]
+        else:
+            clean["value"] = output.get("value") if isinstance(output.get("value"), str) else None
+        outputs.append(clean)
+    status = report.get("status")
+    error = report.get("error")
+    stdout = report.get("stdout")
+    return {
+        "status": status if status in CHILD_STATUSES else "internal_error",
+        "error": error[-MAX_ERROR_CHARS:] if isinstance(error, str) else None,
+        "outputs": outputs,
+        "stdout": stdout if isinstance(stdout, str) else "",
+        "startup_ms": _number(report.get("startup_ms")),
+    }
+
+
+class Zygote:
+    def __init__(self, max_children: int, uid: int, gid: int, best_effort: bool):
+        self.max_children = max_children
+        self.uid = uid
+        self.gid = gid
+        self.best_effort = best_effort
+        self.selector = selectors.DefaultSelector()
+        self.children = {}  # read fd -> [job_id, pid, deadline, buffer]
+        self.pending = []
+        self.stdin = sys.stdin.buffer
+        self.stdout = sys.stdout.buffer
+        self._line = b""
+
+    def emit(self, payload: dict) -> None:
+        self.stdout.write(json.dumps(payload).encode() + b"\n")
+        self.stdout.flush()
+
+    def spawn(self, job: dict) -> None:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _child(job, write_fd, self.uid, self.gid, self.best_effort)
+        os.close(write_fd)
+        wall = float(job.get("limits", {}).get("wall_seconds", 5))
+        self.children[read_fd] = [job["id"], pid, time.monotonic() + wall, bytearray()]
+        self.selector.register(read_fd, selectors.EVENT_READ, "child")
+
+    def finish(self, read_fd: int, killed: Optional[dict] = None) -> None:
+        """Collect a child's report; with `killed`, kill it first and report that instead."""
+        job_id, pid, _, buf = self.children.pop(read_fd)
+        self.selector.unregister(read_fd)
+        os.close(read_fd)
+        # The report pipe closing doesn't mean the child exited (it can close every fd and keep
+        # running), so only wait once it is known to be gone: waiting on a live child would block
+        # the zygote, and with it every other child's wall-clock kill.
+        reaped, wait_status = os.waitpid(pid, os.WNOHANG)
+        self._kill(pid, group_only=bool(reaped) and killed is None)
+        if not reaped:
+            _, wait_status = os.waitpid(pid, 0)
+        if killed is not None:
+            result = dict(killed)
+        else:
+            try:
+                result = _report(bytes(buf))
+            except (ValueError, RecursionError):
+                sig = os.WTERMSIG(wait_status) if os.WIFSIGNALED(wait_status) else 0
+                if not reaped:
+                    result = {"status": "killed", "error": "sandbox closed its report channel without exiting"}
+                elif sig in (signal.SIGXCPU, signal.SIGKILL):
+                    result = {"status": "time_limit_exceeded", "error": "CPU limit exceeded"}
+                elif sig == signal.SIGXFSZ:
+                    result = {"status": "output_limit_exceeded", "error": "output limit exceeded"}
+                else:
+                    result = {"status": "killed", "error": f"sandbox exited abnormally (signal {sig})"}
+        result["id"] = job_id
+        self.emit(result)
+        self._drain_pending()
+
+    @staticmethod
+    def _kill(pid: int, group_only: bool = False) -> None:
+        """SIGKILL the child's process group (anything it left behind) and, unless `group_only`, the child."""
+        for kill in (os.killpg,) if group_only else (os.killpg, os.kill):
+            try:
+                kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _drain_pending(self) -> None:
+        while self.pending and len(self.children) < self.max_children:
+            self.spawn(self.pending.pop(0))
+
+    def on_stdin(self) -> bool:
+        chunk = os.read(self.stdin.fileno(), 1 << 16)
+        if not chunk:
+            return False
+        self._line += chunk
+        *lines, self._line = self._line.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self.pending.append(json.loads(line))
+        self._drain_pending()
+        return True
+
+    def serve(self) -> None:
+        self.selector.register(self.stdin.fileno(), selectors.EVENT_READ, "stdin")
+        alive = True
+        while alive or self.children:
+            now = time.monotonic()
+            timeout = min((c[2] for c in self.children.values()), default=None)
+            events = self.selector.select(None if timeout is None else max(0.0, timeout - now))
+            for key, _ in events:
+                if key.data == "stdin":
+                    if not self.on_stdin():
+                        alive = False
+                        self.selector.unregister(key.fd)
+                    continue
+                data = os.read(key.fd, 1 << 16)
+                if data:
+                    self.children[key.fd][3].extend(data)
+                    if len(self.children[key.fd][3]) > MAX_REPORT_BYTES:
+                        self.finish(key.fd, {"status": "output_limit_exceeded", "error": "return values too large"})
+                else:
+                    self.finish(key.fd)
+            now = time.monotonic()
+            for fd in [fd for fd, c in self.children.items() if c[2] <= now]:
+                self.finish(fd, {"status": "time_limit_exceeded", "error": "wall-clock limit exceeded"})
+
+
+def _user(name: str):
+    try:
+        entry = pwd.getpwuid(int(name)) if name.isdigit() else pwd.getpwnam(name)
+        return entry.pw_uid, entry.pw_gid
+    except KeyError:
+        if name.isdigit():
+            return int(name), int(name)
+        raise SystemExit(f"sandbox user {name!r} does not exist")
+
+
+if __name__ == "__main__":
+    # python -I sandbox_zygote.py MAX_CHILDREN [USER] [required|best_effort]
+    max_children = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    uid, gid = _user(sys.argv[2] if len(sys.argv) > 2 else "nobody")
+    best_effort = len(sys.argv) > 3 and sys.argv[3] == "best_effort"
+    Zygote(max_children, uid, gid, best_effort).serve()
@@ -0,0 +1,451 @@
+"""
+Online skill estimation.
+
+Each user has a fixed-size state per Topic: an ability estimate `theta` (on the
+logit scale) and its variance. An observation is "the user got `outcome` in
+[0, 1] on an item of difficulty `b`", and is folded in with a Gaussian
+approximation to the logistic IRT model (an Elo update whose step size shrinks
+as the estimate firms up):
+
+    p      = sigmoid(a (theta - b))
+    var'   = 1 / (1 / (var + drift) + a^2 p (1 - p))
+    theta' = theta + var' a (outcome - p)
+
+so an update is O(1) and never looks at history. `drift` keeps the variance
+from collapsing, letting old evidence fade as the user improves.
+
+Practice problems use the difficulty label's `b` and a = 1; calibrated
+assessment items (backend.core.adaptive) pass their own `a` and `b`.
+
+Every observation is also appended to a compact in-memory event log. When the
+model parameters change, `rebuild()` recomputes every resident user from the
+attempt repository (their practice attempts, graded under the new model) plus
+the assessment answers this process has seen, all at once with numpy: events
+are ranked within their (user, topic) pair, and rank r of every pair is applied
+in one vectorized step, so the Python loop runs once per rank rather than once
+per event.
+
+Profiles are saved through the skill profile repository, and a user this
+process hasn't seen yet is seeded from theirs on first access (`hydrate`). A
+seed is that user's starting point in place of the prior; a rebuild replaces it
+with the user's attempt history when they have one. Memory is bounded: past
+`max_users` users or `max_log_events` logged observations, the least recently
+seen users are dropped, to be seeded again from their saved profile.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.core.catalog import get_catalog
+from backend.core.config import get_settings
+from backend.database.pool import DatabaseUnavailable
+from backend.database.repositories import get_repositories
+from backend.models.schemas import Difficulty, SkillScore, Topic
+
+logger = logging.getLogger(__name__)
+
+TOPICS: List[Topic] = list(Topic)
+TOPIC_INDEX: Dict[Topic, int] = {t: i for i, t in enumerate(TOPICS)}
+DIFFICULTIES: List[Difficulty] = list(Difficulty)
+DIFFICULTY_INDEX: Dict[Difficulty, int] = {d: i for i, d in enumerate(DIFFICULTIES)}
+
+
+@dataclass(frozen=True)
+class SkillModel:
+    prior_mean: float = 0.0
+    prior_variance: float = 1.0
+    drift: float = 0.01
+    # Item difficulty on the logit scale
+    difficulty: Dict[Difficulty, float] = field(
+        default_factory=lambda: {Difficulty.easy: -1.0, Difficulty.medium: 0.0, Difficulty.hard: 1.0}
+    )
+
+
+def _update(theta, var, b, outcome, drift, a=1.0):
+    """One observation; works on floats and, elementwise, on numpy arrays."""
+    p = 1.0 / (1.0 + np.exp(a * (b - theta)))
+    var = 1.0 / (1.0 / (var + drift) + a * a * p * (1.0 - p))
+    return theta + var * a * (outcome - p), var
+
+
+def _replay(model: SkillModel, rows: int, seeds, users, topics, levels, outcomes, item_b, item_a):
+    """Vectorized replay of an event log (in order) from the prior, or a user's seed; returns (theta, var, count)."""
+    n = len(outcomes)
+    b_table = np.array([model.difficulty[d] for d in DIFFICULTIES])
+    b = np.where(np.isnan(item_b), b_table[levels], item_b)
+    cells = users * len(TOPICS) + topics
+
+    # Rank of each event within its (user, topic) cell, preserving log order
+    order = np.argsort(cells, kind="stable")
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    group_sizes = np.diff(np.r_[starts, n])
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - np.repeat(starts, group_sizes)
+
+    theta = np.full(rows * len(TOPICS), model.prior_mean)
+    var = np.full(rows * len(TOPICS), model.prior_variance)
+    count = np.bincount(cells, minlength=rows * len(TOPICS)).astype(np.uint32)
+    for row, (seed_theta, seed_var, seed_count) in seeds.items():
+        cols = slice(row * len(TOPICS), (row + 1) * len(TOPICS))
+        theta[cols], var[cols] = seed_theta, seed_var
+        count[cols] += seed_count
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(int(group_sizes.max(initial=0)) + 1))
+    for r in range(len(bounds) - 1):
+        idx = by_rank[bounds[r]:bounds[r + 1]]  # at most one event per cell
+        c = cells[idx]
+        theta[c], var[c] = _update(theta[c], var[c], b[idx], outcomes[idx], model.drift, item_a[idx])
+    return theta.reshape(rows, len(TOPICS)), var.reshape(rows, len(TOPICS)), count.reshape(rows, len(TOPICS))
+
+
+class SkillEngine:
+    def __init__(
+        self,
+        model: SkillModel,
+        initial_users: int = 1024,
+        max_users: int = 100_000,
+        max_log_events: int = 2_000_000,
+    ):
+        self.model = model
+        self.max_users = max_users
+        self.max_log_events = max_log_events
+        # user -> row, least recently seen first
+        self._users: "OrderedDict[str, int]" = OrderedDict()
+        self._theta = np.full((initial_users, len(TOPICS)), model.prior_mean)
+        self._var = np.full((initial_users, len(TOPICS)), model.prior_variance)
+        self._count = np.zeros((initial_users, len(TOPICS)), dtype=np.uint32)
+        # Event log, one column per field
+        self._log_user = array("I")
+        self._log_topic = array("B")
+        self._log_difficulty = array("B")
+        self._log_outcome = array("d")
+        self._log_b = array("d")  # NaN: use the difficulty label's b (a practice attempt)
+        self._log_a = array("d")
+        self._log_at = array("d")  # when the attempt was submitted / the answer observed
+        # Saved profiles users were seeded from: row -> (theta, var, count)
+        self._seeds: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._hydrated: Set[str] = set()
+        self._epoch = 0  # bumped whenever rows are renumbered (eviction)
+        self._lock = threading.Lock()
+
+    def _columns(self) -> List[array]:
+        return [
+            self._log_user,
+            self._log_topic,
+            self._log_difficulty,
+            self._log_outcome,
+            self._log_b,
+            self._log_a,
+            self._log_at,
+        ]
+
+    def _row(self, user_id: str) -> int:
+        row = self._users.get(user_id)
+        if row is not None:
+            self._users.move_to_end(user_id)
+            return row
+        if len(self._users) >= self.max_users:
+            self._evict(max(1, self.max_users // 10))
+        row = self._users[user_id] = len(self._users)
+        if row >= len(self._theta):
+            self._grow()
+        return row
+
+    def _grow(self) -> None:
+        n, t = self._theta.shape
+        self._theta = np.concatenate([self._theta, np.full((n, t), self.model.prior_mean)])
+        self._var = np.concatenate([self._var, np.full((n, t), self.model.prior_variance)])
+        self._count = np.concatenate([self._count, np.zeros((n, t), dtype=np.uint32)])
+
+    def _evict(self, k: int) -> None:
+        """Drop the `k` least recently seen users (never the most recent one), renumbering the rest."""
+        k = min(k, len(self._users) - 1)
+        if k <= 0:
+            return
+        victims = list(itertools.islice(self._users, k))
+        gone = np.zeros(len(self._theta), dtype=bool)
+        gone[[self._users[user_id] for user_id in victims]] = True
+        for user_id in victims:
+            del self._users[user_id]
+            self._hydrated.discard(user_id)
+        kept = np.array(list(self._users.values()), dtype=np.int64)
+        remap = np.full(len(self._theta), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+
+        for name, fill in (("_theta", self.model.prior_mean), ("_var", self.model.prior_variance), ("_count", 0)):
+            old = getattr(self, name)
+            new = np.full_like(old, fill)
+            new[:len(kept)] = old[kept]
+            setattr(self, name, new)
+        self._filter_log(~gone[np.asarray(self._log_user)], remap)
+        self._seeds = {int(remap[row]): seed for row, seed in self._seeds.items() if not gone[row]}
+        self._users = OrderedDict((user_id, i) for i, user_id in enumerate(self._users))
+        self._epoch += 1
+
+    def _checkpoint(self, target: int) -> None:
+        """
+        Shrink the log to `target` events by turning the least recently seen users' current state
+        into their seed and dropping their logged events.
+        """
+        log_users = np.asarray(self._log_user)
+        per_row = np.bincount(log_users, minlength=len(self._theta))
+        excess = len(log_users) - target
+        dropped = np.zeros(len(self._theta), dtype=bool)
+        for row in self._users.values():
+            if excess <= 0:
+                break
+            if per_row[row]:
+                self._seeds[row] = (self._theta[row].copy(), self._var[row].copy(), self._count[row].copy())
+                dropped[row] = True
+                excess -= per_row[row]
+        self._filter_log(~dropped[log_users])
+        self._epoch += 1
+
+    def _filter_log(self, keep: np.ndarray, remap: Optional[np.ndarray] = None) -> None:
+        for name in ("_log_user", "_log_topic", "_log_difficulty", "_log_outcome", "_log_b", "_log_a", "_log_at"):
+            values = np.asarray(getattr(self, name))[keep]
+            if name == "_log_user" and remap is not None:
+                values = remap[values].astype(values.dtype)
+            setattr(self, name, array(getattr(self, name).typecode, values.tobytes()))
+
+    def _apply(self, row: int, col: int, difficulty: Difficulty, outcome: float, b: float, a: float) -> None:
+        if math.isnan(b):
+            b = self.model.difficulty[difficulty]
+        theta, var = _update(
+            float(self._theta[row, col]), float(self._var[row, col]), b, outcome, self.model.drift, a
+        )
+        self._theta[row, col] = theta
+        self._var[row, col] = var
+        self._count[row, col] += 1
+
+    def observe(
+        self,
+        user_id: str,
+        topic: Topic,
+        difficulty: Difficulty,
+        outcome: float,
+        b: Optional[float] = None,
+        a: float = 1.0,
+        at: Optional[float] = None,
+    ) -> None:
+        """
+        Fold in one result (1.0 = solved, 0.0 = failed, partial credit in between).
+        `b`/`a` override the item's difficulty and discrimination when it is calibrated;
+        `at` is when a practice attempt was submitted (how `rebuild()` matches it to the saved one).
+        """
+        outcome = min(1.0, max(0.0, float(outcome)))
+        b = math.nan if b is None else float(b)
+        with self._lock:
+            row, col = self._row(user_id), TOPIC_INDEX[topic]
+            self._apply(row, col, difficulty, outcome, b, a)
+            self._log_user.append(row)
+            self._log_topic.append(col)
+            self._log_difficulty.append(DIFFICULTY_INDEX[difficulty])
+            self._log_outcome.append(outcome)
+            self._log_b.append(b)
+            self._log_a.append(a)
+            self._log_at.append(time.time() if at is None else at)
+            if len(self._log_outcome) > self.max_log_events:
+                self._checkpoint(int(self.max_log_events * 0.9))
+
+    def vector(self, user_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(theta, variance) per topic, in `TOPICS` order; the prior for unknown users."""
+        with self._lock:
+            row = self._users.get(user_id)
+            if row is None:
+                t = len(TOPICS)
+                return np.full(t, self.model.prior_mean), np.full(t, self.model.prior_variance)
+            self._users.move_to_end(user_id)
+            return self._theta[row].copy(), self._var[row].copy()
+
+    def profile(self, user_id: str, observed_only: bool = True) -> List[SkillScore]:
+        """
+        score = estimated chance of solving a medium problem in the topic;
+        confidence = how far the variance has shrunk from the prior.
+        """
+        with self._lock:
+            row = self._users.get(user_id)
+            if row is None:
+                if observed_only:
+                    return []
+                theta = np.full(len(TOPICS), self.model.prior_mean)
+                var = np.full(len(TOPICS), self.model.prior_variance)
+                count = np.zeros(len(TOPICS), dtype=np.uint32)
+            else:
+                self._users.move_to_end(user_id)
+                theta, var, count = self._theta[row].copy(), self._var[row].copy(), self._count[row].copy()
+        b = self.model.difficulty[Difficulty.medium]
+        score = 1.0 / (1.0 + np.exp(b - theta))
+        confidence = np.clip(1.0 - var / self.model.prior_variance, 0.0, 1.0)
+        return [
+            SkillScore(topic=topic, score=round(float(score[i]), 4), confidence=round(float(confidence[i]), 4))
+            for i, topic in enumerate(TOPICS)
+            if count[i] or not observed_only
+        ]
+
+    def seed(self, user_id: str, saved: List[SkillScore]) -> bool:
+        """
+        Start `user_id` from a saved profile (inverting `profile()`). Returns True when the
+        user already has observations in this process, which then need replaying on top.
+        """
+        b = self.model.difficulty[Difficulty.medium]
+        theta = np.full(len(TOPICS), self.model.prior_mean)
+        var = np.full(len(TOPICS), self.model.prior_variance)
+        count = np.zeros(len(TOPICS), dtype=np.uint32)
+        for score in saved:
+            col = TOPIC_INDEX[Topic(score.topic)]
+            p = min(max(score.score, 1e-4), 1.0 - 1e-4)
+            theta[col] = b + math.log(p / (1.0 - p))
+            var[col] = self.model.prior_variance * max(1.0 - score.confidence, 1e-4)
+            count[col] = 1
+        with self._lock:
+            if user_id in self._hydrated:
+                return False
+            self._hydrated.add(user_id)
+            if not saved:
+                return False
+            observed = user_id in self._users
+            row = self._row(user_id)
+            self._seeds[row] = (theta, var, count)
+            if observed:
+                return True
+            self._theta[row], self._var[row], self._count[row] = theta, var, count
+            return False
+
+    async def hydrate(self, user_id: str) -> None:
+        """Seed `user_id` from their saved profile the first time this process sees them."""
+        if user_id in self._hydrated:
+            return
+        try:
+            saved = await get_repositories().skills.get(user_id)
+        except DatabaseUnavailable as exc:
+            # Tried again on their next request
+            logger.warning("could not load the skill profile of %s: %s", user_id, exc)
+            return
+        if self.seed(user_id, saved):
+            await asyncio.to_thread(self._recompute)
+
+    async def rebuild(self, model: Optional[SkillModel] = None) -> int:
+        """
+        Recompute every resident user under `model` (default: the current one) from their saved practice
+        attempts plus the assessment answers logged here; returns how many saved attempts were replayed.
+        Raises DatabaseUnavailable when the attempt history can't be read.
+        """
+        catalog = get_catalog()
+        with self._lock:
+            resident = set(self._users)
+        history: Dict[str, List[Tuple[float, int, int, float]]] = {}
+        replayed = 0
+        async for record in get_repositories().attempts.history(datetime.now(timezone.utc)):
+            problem = catalog.get(record.problem_id) if record.user_id in resident else None
+            if problem is None or record.score is None:
+                continue
+            at = datetime.fromisoformat(record.response.submitted_at).timestamp()
+            history.setdefault(record.user_id, []).append((
+                at,
+                TOPIC_INDEX[Topic(problem.detail.topic)],
+                DIFFICULTY_INDEX[Difficulty(problem.detail.difficulty)],
+                min(1.0, max(0.0, float(record.score))),
+            ))
+            replayed += 1
+        # A full replay: CPU-bound, so off the event loop
+        await asyncio.to_thread(self._recompute, model, history)
+        return replayed
+
+    def _recompute(
+        self,
+        model: Optional[SkillModel] = None,
+        history: Optional[Dict[str, List[Tuple[float, int, int, float]]]] = None,
+    ) -> None:
+        """
+        Replay the event log; with `history` (user -> saved attempts), those users' logged practice attempts
+        are replaced by their saved ones, which also stand in for their seed.
+        """
+        model = model or self.model
+        while True:
+            with self._lock:
+                # Copies, so the log can keep growing while the batch runs
+                epoch = self._epoch
+                n = len(self._log_outcome)
+                users, topics, levels, outcomes, item_b, item_a, at = (
+                    np.array(col, dtype=np.float64 if col.typecode == "d" else np.int64) for col in self._columns()
+                )
+                rows = len(self._theta)
+                seeds = dict(self._seeds)
+                saved_rows = {self._users[u]: entries for u, entries in (history or {}).items() if u in self._users}
+
+            if saved_rows:
+                saved = np.array([(row, *entry) for row, entries in saved_rows.items() for entry in entries])
+                h_users, h_topics, h_levels = (saved[:, i].astype(np.int64) for i in (0, 2, 3))
+                h_at, h_outcomes = saved[:, 1], saved[:, 4]
+                # Logged practice attempts that were saved come from the history instead
+                # (user, submission time to the millisecond; timestamps round-trip through ISO strings)
+                keys = set(zip(h_users.tolist(), np.round(h_at, 3).tolist()))
+                keep = np.ones(n, dtype=bool)
+                for i in np.flatnonzero(np.isnan(item_b) & np.isin(users, list(saved_rows))):
+                    keep[i] = (int(users[i]), round(float(at[i]), 3)) not in keys
+                order = np.argsort(np.r_[h_at, at[keep]], kind="stable")
+                users = np.r_[h_users, users[keep]][order]
+                topics = np.r_[h_topics, topics[keep]][order]
+                levels = np.r_[h_levels, levels[keep]][order]
+                outcomes = np.r_[h_outcomes, outcomes[keep]][order]
+                item_b = np.r_[np.full(len(saved), np.nan), item_b[keep]][order]
+                item_a = np.r_[np.ones(len(saved)), item_a[keep]][order]
+                seeds = {row: seed for row, seed in seeds.items() if row not in saved_rows}
+
+            theta, var, count = _replay(model, rows, seeds, users, topics, levels, outcomes, item_b, item_a)
+
+            with self._lock:
+                if self._epoch != epoch:
+                    continue  # rows were renumbered meanwhile; start over
+                self.model = model
+                self._theta, self._var, self._count = theta, var, count
+                if saved_rows:
+                    for row in saved_rows:
+                        self._seeds.pop(row, None)
+                while len(self._theta) < len(self._users):
+                    self._grow()
+                # Fold in whatever arrived while the batch was running
+                for i in range(n, len(self._log_outcome)):
+                    self._apply(
+                        self._log_user[i],
+                        self._log_topic[i],
+                        DIFFICULTIES[self._log_difficulty[i]],
+                        self._log_outcome[i],
+                        self._log_b[i],
+                        self._log_a[i],
+                    )
+                return
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+_engine: Optional[SkillEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_skill_engine() -> SkillEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                settings = get_settings()
+                _engine = SkillEngine(
+                    SkillModel(prior_variance=settings.skill_prior_variance, drift=settings.skill_drift),
+                    max_users=settings.skill_max_users,
+                    max_log_events=settings.skill_max_log_events,
+                )
+    return _engine
@@ -0,0 +1,404 @@
+"""
+Request tracing.
+
+Every request gets a root span (TracingMiddleware); `span()` opens child spans
+around the parts worth timing (auth, DB, LLM, sandbox, skill updates). The
+current span lives in a contextvar, so it follows the request into tasks it
+creates and into asyncio.to_thread; work handed to long-lived workers (the
+attempt queue) carries its span along and re-enters it with `activate()`.
+
+A trace is kept when it was sampled (TRACE_SAMPLE_RATE, or the caller's W3C
+`traceparent` said so) or when it took at least TRACE_SLOW_MS, so slow
+requests are always captured. Spans are buffered per trace until the last
+open one ends, which lets background work (an attempt finishing grading
+seconds after its 202) count towards the decision. Kept traces go to a
+background exporter: JSON lines in TRACE_FILE, or OTLP/HTTP JSON to
+TRACE_OTLP_URL (`python -m backend.dev.trace_collector` is a local stand-in).
+
+The trace id is returned in the X-Trace-Id response header. With
+TRACE_EXPORTER=off (the default) the middleware isn't installed and `span()` is a
+contextvar lookup.
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = b"x-trace-id"
+SERVICE_NAME = "osiris-api"
+DEFAULT_TRACE_FILE = Path(__file__).resolve().parent.parent / "var" / "traces.jsonl"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("osiris_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "_Trace", parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns:
+            return
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.end_ns = time.time_ns()
+        self.trace.tracer._finished(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in outside traced requests so callers never check for None."""
+
+    trace_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("tracer", "trace_id", "sampled", "spans", "open", "keep")
+
+    def __init__(self, tracer: "Tracer", trace_id: str, sampled: bool):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.open = 0
+        self.keep: Optional[bool] = None  # decided when the last open span ends
+
+
+class Tracer:
+    def __init__(self, sample_rate: float, slow_ms: float, exporter: Optional["SpanExporter"]):
+        self.sample_rate = sample_rate
+        self.slow_ns = int(slow_ms * 1e6) if slow_ms > 0 else None
+        self.exporter = exporter
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Span:
+        trace_id, parent_id, sampled = _parse_traceparent(traceparent)
+        trace = _Trace(
+            self, trace_id or f"{random.getrandbits(128):032x}", sampled or random.random() < self.sample_rate
+        )
+        return self.start_span(trace, parent_id, name, attributes)
+
+    def start_span(self, trace: _Trace, parent_id: Optional[str], name: str, attributes: Dict[str, Any]) -> Span:
+        span = Span(trace, parent_id, name, attributes)
+        with self._lock:
+            trace.open += 1
+        return span
+
+    def _finished(self, span: Span) -> None:
+        trace = span.trace
+        with self._lock:
+            trace.open -= 1
+            if trace.keep is None:
+                trace.spans.append(span)
+                if trace.open:
+                    return
+                start = min(s.start_ns for s in trace.spans)
+                end = max(s.end_ns for s in trace.spans)
+                trace.keep = trace.sampled or (self.slow_ns is not None and end - start >= self.slow_ns)
+                spans, trace.spans = trace.spans, []
+                if trace.keep:
+                    self.kept += 1
+                else:
+                    self.dropped += 1
+            elif trace.keep:
+                # Started after the decision (e.g. a task the request left running)
+                spans = [span]
+            else:
+                return
+        if trace.keep:
+            self.exporter.export(spans)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+def _parse_traceparent(value: Optional[str]) -> Tuple[Optional[str], Optional[str], bool]:
+    """W3C trace context: 00-<trace id>-<parent span id>-<flags>."""
+    if not value:
+        return None, None, False
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None, None, False
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None, None, False
+    return parts[1], parts[2], sampled
+
+
+# --- spans in application code ---
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def start_span(name: str, **attributes: Any):
+    """A child of the current span that the caller ends itself (or NOOP_SPAN outside a trace)."""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return parent.trace.tracer.start_span(parent.trace, parent.span_id, name, attributes)
+
+
+@contextmanager
+def activate(span) -> Iterator[None]:
+    """Make `span` the current span, e.g. in a worker picking up a request's job."""
+    token = _current.set(span if isinstance(span, Span) else None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    parent = _current.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = parent.trace.tracer.start_span(parent.trace, parent.span_id, name, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.end(exc)
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+# --- export ---
+
+class FileSink:
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for s in spans:
+                fh.write(json.dumps(s.to_dict(), separators=(",", ":"), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPSink:
+    """OTLP/HTTP with the JSON encoding, as accepted by the OpenTelemetry collector on :4318."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "backend.core.tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                        "name": s.name,
+                        "kind": 2 if "http.method" in s.attributes else 1,  # SERVER / INTERNAL
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]}
+
+    def __call__(self, spans: List[Span]) -> None:
+        body = json.dumps(self.payload(spans), default=str).encode()
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class SpanExporter:
+    """Hands kept spans to a sink on a background thread, in batches; drops them if the sink can't keep up."""
+
+    def __init__(self, sink, max_queue: int = 10_000, batch_size: int = 512, interval: float = 1.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.extend(item)
+            if batch:
+                try:
+                    self.sink(batch)
+                except Exception as exc:
+                    logger.warning("exporting %d spans failed: %s", len(batch), exc)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+
+# --- requests ---
+
+class TracingMiddleware:
+    """Opens the root span for each HTTP request and returns its trace id in X-Trace-Id."""
+
+    def __init__(self, app):
+        self.app = app
+        self.tracer = get_tracer()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        method = scope["method"]
+        root = self.tracer.start_trace(method, traceparent, **{"http.method": method})
+        trace_id = root.trace_id.encode()
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+                message = {**message, "headers": [*message.get("headers", ()), (TRACE_HEADER, trace_id)]}
+            await send(message)
+
+        error: Optional[BaseException] = None
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as exc:
+            error = exc
+            root.attributes.setdefault("http.status_code", 500)
+            raise
+        finally:
+            _current.reset(token)
+            # The router has matched by now; name the span after the route template, not the raw path
+            route = scope.get("route")
+            if isinstance(route, APIRoute):
+                root.name = f"{method} {route.path_format}"
+                root.set("http.route", route.path_format)
+            root.end(error)
+
+
+def add_tracing(app) -> None:
+    """Trace every request; a no-op when tracing is off."""
+    if get_tracer().enabled:
+        app.add_middleware(TracingMiddleware)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                settings = get_settings()
+                exporter = None
+                if settings.trace_exporter == "file":
+                    path = Path(settings.trace_file) if settings.trace_file else DEFAULT_TRACE_FILE
+                    exporter = SpanExporter(FileSink(path))
+                elif settings.trace_exporter == "otlp":
+                    exporter = SpanExporter(OTLPSink(settings.trace_otlp_url))
+                _tracer = Tracer(settings.trace_sample_rate, settings.trace_slow_ms, exporter)
+    return _tracer
+
+
+def stop_tracer() -> None:
+    if _tracer is not None:
+        _tracer.close()
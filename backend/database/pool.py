@@ -0,0 +1,155 @@
+"""
+Shared asyncpg connection pool.
+
+One pool per process, opened at startup when DATABASE_URL is set. Every query
+goes through `acquire()`, which bounds both the wait for a free connection and
+the query itself by DB_TIMEOUT_MS, so a slow database turns into a 503 for
+that request instead of a pile-up of stuck handlers.
+
+Queries are module-level constants, so asyncpg's per-connection statement
+cache (DB_STATEMENT_CACHE_SIZE entries) turns each hot query into a server-side
+prepared statement after its first use on a connection: later calls skip
+parsing and planning and only send the parameters.
+
+If the database is down at start-up, the app starts anyway: requests that
+need it get a 503, /health reports it unavailable, and the pool keeps being
+retried in the background until it opens.
+
+asyncpg itself is imported when the pool opens, so deployments without a
+database don't load it at start-up.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Tuple
+
+from backend.core.config import get_settings
+from backend.core.metrics import DB_ACQUIRE
+from backend.core.tracing import span
+
+if TYPE_CHECKING:
+    import asyncpg
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
+
+
+class DatabaseUnavailable(Exception):
+    """The pool is missing, exhausted or the query timed out."""
+
+
+def connection_errors() -> Tuple[type, ...]:
+    """Raised when the server is down or the connection dropped mid-query."""
+    import asyncpg
+
+    return (
+        asyncio.TimeoutError,
+        OSError,
+        asyncpg.InterfaceError,
+        asyncpg.InternalClientError,
+        asyncpg.PostgresConnectionError,
+        asyncpg.CannotConnectNowError,
+    )
+
+
+_pool: Optional["asyncpg.Pool"] = None
+_reconnect: Optional[asyncio.Task] = None
+
+
+async def _create_pool() -> "asyncpg.Pool":
+    import asyncpg
+
+    settings = get_settings()
+    conn = await asyncpg.connect(settings.database_url, timeout=settings.db_timeout_ms / 1000)
+    try:
+        await conn.execute(SCHEMA_PATH.read_text())
+    finally:
+        await conn.close()
+    return await asyncpg.create_pool(
+        settings.database_url,
+        min_size=settings.db_pool_min,
+        max_size=settings.db_pool_max,
+        statement_cache_size=settings.db_statement_cache_size,
+        command_timeout=settings.db_timeout_ms / 1000,
+    )
+
+
+async def _keep_connecting() -> None:
+    global _pool, _reconnect
+    backoff = 1.0
+    while True:
+        await asyncio.sleep(backoff)
+        try:
+            _pool = await _create_pool()
+        except connection_errors() as exc:
+            backoff = min(backoff * 2, 30.0)
+            logger.warning("database still unavailable (%s), retrying in %.0fs", exc, backoff)
+            continue
+        logger.info("database pool opened")
+        _reconnect = None
+        return
+
+
+async def open_pool() -> Optional["asyncpg.Pool"]:
+    """The pool, or None: without DATABASE_URL, or while the database is down (retried in the background)."""
+    global _pool, _reconnect
+    if _pool is None and _reconnect is None and get_settings().database_url:
+        try:
+            _pool = await _create_pool()
+        except connection_errors() as exc:
+            logger.error("database unavailable at start-up (%s); serving degraded until it is reachable", exc)
+            _reconnect = asyncio.create_task(_keep_connecting())
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool, _reconnect
+    reconnect, _reconnect = _reconnect, None
+    if reconnect is not None:
+        reconnect.cancel()
+        try:
+            await reconnect
+        except asyncio.CancelledError:
+            pass
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def get_pool() -> Optional["asyncpg.Pool"]:
+    return _pool
+
+
+@asynccontextmanager
+async def acquire(timeout: Optional[float] = None) -> AsyncIterator["asyncpg.Connection"]:
+    if _pool is None:
+        raise DatabaseUnavailable("database is not connected yet" if _reconnect else "database is not configured")
+    timeout = timeout if timeout is not None else get_settings().db_timeout_ms / 1000
+    started = time.perf_counter()
+    with span("db") as db_span:
+        try:
+            async with _pool.acquire(timeout=timeout) as conn:
+                waited = time.perf_counter() - started
+                DB_ACQUIRE.observe((), waited)
+                db_span.set("db.acquire_ms", round(waited * 1000, 3))
+                yield conn
+        except connection_errors() as exc:
+            raise DatabaseUnavailable(str(exc) or type(exc).__name__) from exc
+
+
+async def probe(timeout: float = 1.0) -> str:
+    """'ok', 'disabled' (no DATABASE_URL) or 'unavailable' (including while the pool is still being retried)."""
+    if _pool is None:
+        return "unavailable" if _reconnect is not None else "disabled"
+    import asyncpg
+
+    try:
+        async with acquire(timeout) as conn:
+            await conn.fetchval("SELECT 1", timeout=timeout)
+    except (DatabaseUnavailable, asyncpg.PostgresError):
+        return "unavailable"
+    return "ok"
@@ -0,0 +1,432 @@
+"""
+Async repositories for assessments, attempts, roadmaps, skill profiles and problems.
+
+Each repository has a Postgres implementation (on the shared pool, see
+backend.database.pool) and an in-memory one with the same interface. The
+in-memory set is used when DATABASE_URL is unset, which keeps local runs and
+scripted checks free of a database. Problems always come from the in-memory
+catalog (backend.core.catalog); the repository only gives them the same async
+interface as everything else.
+"""
+
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from backend.core.catalog import ProblemRecord, get_catalog
+from backend.core.config import get_settings
+from backend.database.pool import acquire
+from backend.models.schemas import (
+    AssessmentResultResponse, AttemptSubmitResponse, Difficulty, RoadmapResponse, SkillScore, Topic
+)
+
+
+@dataclass(frozen=True)
+class AssessmentRecord:
+    assessment_id: UUID
+    user_id: str
+    created_at: str
+    level: str
+    topics: List[Topic]
+
+
+@dataclass(frozen=True)
+class AttemptRecord:
+    user_id: str
+    problem_id: str
+    language: str
+    score: Optional[float]
+    response: AttemptSubmitResponse
+
+
+def _ts(iso: str) -> datetime:
+    return datetime.fromisoformat(iso)
+
+
+# A submission claim with no result after this long is from a process that died mid-grading
+SUBMISSION_CLAIM_SECONDS = 600.0
+
+
+# --- interfaces ---
+
+class AssessmentRepository(ABC):
+    @abstractmethod
+    async def create(self, record: AssessmentRecord) -> None: ...
+
+    @abstractmethod
+    async def get(self, assessment_id: UUID) -> Optional[AssessmentRecord]: ...
+
+    @abstractmethod
+    async def claim_submission(self, assessment_id: UUID) -> bool:
+        """Atomically claim grading of an assessment; False if it was submitted (or is being graded) already."""
+
+    @abstractmethod
+    async def release_submission(self, assessment_id: UUID) -> None:
+        """Give up a claim whose grading failed before any result was saved."""
+
+    @abstractmethod
+    async def save_result(self, user_id: str, result: AssessmentResultResponse) -> None: ...
+
+    @abstractmethod
+    async def get_result(self, assessment_id: UUID) -> Optional[AssessmentResultResponse]: ...
+
+
+class AttemptRepository(ABC):
+    @abstractmethod
+    async def save(self, record: AttemptRecord) -> None: ...
+
+    @abstractmethod
+    async def get(self, attempt_id: UUID) -> Optional[AttemptRecord]: ...
+
+    @abstractmethod
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[AttemptRecord]: ...
+
+    @abstractmethod
+    def history(self, before: datetime) -> AsyncIterator[AttemptRecord]:
+        """Every attempt submitted before `before`, oldest first."""
+
+
+class RoadmapRepository(ABC):
+    @abstractmethod
+    async def save(self, roadmap: RoadmapResponse) -> None: ...
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[RoadmapResponse]: ...
+
+
+class SkillProfileRepository(ABC):
+    @abstractmethod
+    async def save(self, user_id: str, profile: List[SkillScore]) -> None: ...
+
+    @abstractmethod
+    async def get(self, user_id: str) -> List[SkillScore]: ...
+
+
+class ProblemRepository:
+    """Catalog-backed; lookups are in-memory and never wait."""
+
+    async def get(self, problem_id: str) -> Optional[ProblemRecord]:
+        return get_catalog().get(problem_id)
+
+    async def query(
+        self,
+        topic: Optional[Topic] = None,
+        difficulty: Optional[Difficulty] = None,
+        limit: int = 10,
+    ) -> List[ProblemRecord]:
+        return get_catalog().query(topic, difficulty, limit)
+
+
+# --- Postgres ---
+
+class PostgresAssessmentRepository(AssessmentRepository):
+    INSERT = """
+        INSERT INTO assessments (assessment_id, user_id, created_at, level, topics)
+        VALUES ($1, $2, $3, $4, $5)
+    """
+    SELECT = "SELECT assessment_id, user_id, created_at, level, topics FROM assessments WHERE assessment_id = $1"
+    UPSERT_RESULT = """
+        INSERT INTO assessment_results (assessment_id, user_id, submitted_at, result)
+        VALUES ($1, $2, $3, $4::jsonb)
+        ON CONFLICT (assessment_id) DO UPDATE
+            SET submitted_at = EXCLUDED.submitted_at, result = EXCLUDED.result
+    """
+    SELECT_RESULT = "SELECT result::text FROM assessment_results WHERE assessment_id = $1"
+    CLAIM = """
+        INSERT INTO assessment_submissions (assessment_id, claimed_at)
+        SELECT $1, now() WHERE NOT EXISTS (SELECT 1 FROM assessment_results WHERE assessment_id = $1)
+        ON CONFLICT (assessment_id) DO UPDATE SET claimed_at = EXCLUDED.claimed_at
+            WHERE assessment_submissions.claimed_at < now() - make_interval(secs => $2)
+        RETURNING 1
+    """
+    RELEASE = """
+        DELETE FROM assessment_submissions s WHERE s.assessment_id = $1
+            AND NOT EXISTS (SELECT 1 FROM assessment_results r WHERE r.assessment_id = s.assessment_id)
+    """
+
+    async def create(self, record: AssessmentRecord) -> None:
+        async with acquire() as conn:
+            await conn.execute(
+                self.INSERT,
+                record.assessment_id,
+                record.user_id,
+                _ts(record.created_at),
+                record.level,
+                [t.value for t in record.topics],
+            )
+
+    async def get(self, assessment_id: UUID) -> Optional[AssessmentRecord]:
+        async with acquire() as conn:
+            row = await conn.fetchrow(self.SELECT, assessment_id)
+        if row is None:
+            return None
+        return AssessmentRecord(
+            assessment_id=row["assessment_id"],
+            user_id=row["user_id"],
+            created_at=row["created_at"].isoformat(),
+            level=row["level"],
+            topics=[Topic(t) for t in row["topics"]],
+        )
+
+    async def claim_submission(self, assessment_id: UUID) -> bool:
+        async with acquire() as conn:
+            return await conn.fetchval(self.CLAIM, assessment_id, SUBMISSION_CLAIM_SECONDS) is not None
+
+    async def release_submission(self, assessment_id: UUID) -> None:
+        async with acquire() as conn:
+            await conn.execute(self.RELEASE, assessment_id)
+
+    async def save_result(self, user_id: str, result: AssessmentResultResponse) -> None:
+        async with acquire() as conn:
+            await conn.execute(
+                self.UPSERT_RESULT,
+                result.assessment_id,
+                user_id,
+                _ts(result.submitted_at),
+                result.model_dump_json(),
+            )
+
+    async def get_result(self, assessment_id: UUID) -> Optional[AssessmentResultResponse]:
+        async with acquire() as conn:
+            raw = await conn.fetchval(self.SELECT_RESULT, assessment_id)
+        return None if raw is None else AssessmentResultResponse.model_validate_json(raw)
+
+
+class PostgresAttemptRepository(AttemptRepository):
+    UPSERT = """
+        INSERT INTO attempts (attempt_id, user_id, problem_id, language, submitted_at, verdict, feedback, score)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        ON CONFLICT (attempt_id) DO UPDATE
+            SET verdict = EXCLUDED.verdict, feedback = EXCLUDED.feedback, score = EXCLUDED.score
+    """
+    COLUMNS = "attempt_id, user_id, problem_id, language, submitted_at, verdict, feedback, score"
+    SELECT = f"SELECT {COLUMNS} FROM attempts WHERE attempt_id = $1"
+    SELECT_FOR_USER = f"SELECT {COLUMNS} FROM attempts WHERE user_id = $1 ORDER BY submitted_at DESC LIMIT $2"
+    SELECT_HISTORY = f"SELECT {COLUMNS} FROM attempts WHERE submitted_at < $1 ORDER BY submitted_at"
+    HISTORY_BATCH = 5000
+
+    async def save(self, record: AttemptRecord) -> None:
+        r = record.response
+        async with acquire() as conn:
+            await conn.execute(
+                self.UPSERT,
+                r.attempt_id,
+                record.user_id,
+                record.problem_id,
+                record.language,
+                _ts(r.submitted_at),
+                r.verdict,
+                r.feedback,
+                record.score,
+            )
+
+    @staticmethod
+    def _record(row) -> AttemptRecord:
+        return AttemptRecord(
+            user_id=row["user_id"],
+            problem_id=row["problem_id"],
+            language=row["language"],
+            score=row["score"],
+            response=AttemptSubmitResponse(
+                attempt_id=row["attempt_id"],
+                submitted_at=row["submitted_at"].isoformat(),
+                verdict=row["verdict"],
+                feedback=row["feedback"],
+            ),
+        )
+
+    async def get(self, attempt_id: UUID) -> Optional[AttemptRecord]:
+        async with acquire() as conn:
+            row = await conn.fetchrow(self.SELECT, attempt_id)
+        return None if row is None else self._record(row)
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[AttemptRecord]:
+        async with acquire() as conn:
+            rows = await conn.fetch(self.SELECT_FOR_USER, user_id, limit)
+        return [self._record(row) for row in rows]
+
+    async def history(self, before: datetime) -> AsyncIterator[AttemptRecord]:
+        # A cursor, so each round trip stays within the query timeout however long the history is
+        async with acquire() as conn, conn.transaction():
+            cursor = await conn.cursor(self.SELECT_HISTORY, before)
+            while rows := await cursor.fetch(self.HISTORY_BATCH):
+                for row in rows:
+                    yield self._record(row)
+
+
+class PostgresRoadmapRepository(RoadmapRepository):
+    UPSERT = """
+        INSERT INTO roadmaps (user_id, generated_at, items) VALUES ($1, $2, $3::jsonb)
+        ON CONFLICT (user_id) DO UPDATE SET generated_at = EXCLUDED.generated_at, items = EXCLUDED.items
+    """
+    SELECT = "SELECT user_id, generated_at, items::text FROM roadmaps WHERE user_id = $1"
+
+    async def save(self, roadmap: RoadmapResponse) -> None:
+        items = json.dumps([item.model_dump(mode="json") for item in roadmap.items])
+        async with acquire() as conn:
+            await conn.execute(self.UPSERT, roadmap.user_id, _ts(roadmap.generated_at), items)
+
+    async def get(self, user_id: str) -> Optional[RoadmapResponse]:
+        async with acquire() as conn:
+            row = await conn.fetchrow(self.SELECT, user_id)
+        if row is None:
+            return None
+        return RoadmapResponse(
+            user_id=row["user_id"], generated_at=row["generated_at"].isoformat(), items=json.loads(row["items"])
+        )
+
+
+class PostgresSkillProfileRepository(SkillProfileRepository):
+    UPSERT = """
+        INSERT INTO skill_profiles (user_id, topic, score, confidence, updated_at)
+        SELECT $1, p.topic, p.score, p.confidence, now()
+        FROM unnest($2::text[], $3::float8[], $4::float8[]) AS p(topic, score, confidence)
+        ON CONFLICT (user_id, topic) DO UPDATE
+            SET score = EXCLUDED.score, confidence = EXCLUDED.confidence, updated_at = EXCLUDED.updated_at
+    """
+    SELECT = "SELECT topic, score, confidence FROM skill_profiles WHERE user_id = $1 ORDER BY topic"
+
+    async def save(self, user_id: str, profile: List[SkillScore]) -> None:
+        async with acquire() as conn:
+            await conn.execute(
+                self.UPSERT,
+                user_id,
+                [s.topic.value for s in profile],
+                [s.score for s in profile],
+                [s.confidence for s in profile],
+            )
+
+    async def get(self, user_id: str) -> List[SkillScore]:
+        async with acquire() as conn:
+            rows = await conn.fetch(self.SELECT, user_id)
+        return [SkillScore(topic=r["topic"], score=r["score"], confidence=r["confidence"]) for r in rows]
+
+
+# --- in-memory stand-ins ---
+
+class InMemoryAssessmentRepository(AssessmentRepository):
+    def __init__(self):
+        self._assessments: Dict[UUID, AssessmentRecord] = {}
+        self._results: Dict[UUID, AssessmentResultResponse] = {}
+        self._claims: Dict[UUID, float] = {}  # assessment -> monotonic time claimed
+
+    async def create(self, record: AssessmentRecord) -> None:
+        self._assessments[record.assessment_id] = record
+
+    async def get(self, assessment_id: UUID) -> Optional[AssessmentRecord]:
+        return self._assessments.get(assessment_id)
+
+    async def claim_submission(self, assessment_id: UUID) -> bool:
+        # No await between the check and the claim, so this is atomic on the event loop
+        if assessment_id in self._results:
+            return False
+        now = time.monotonic()
+        if now - self._claims.get(assessment_id, -math.inf) < SUBMISSION_CLAIM_SECONDS:
+            return False
+        self._claims[assessment_id] = now
+        return True
+
+    async def release_submission(self, assessment_id: UUID) -> None:
+        if assessment_id not in self._results:
+            self._claims.pop(assessment_id, None)
+
+    async def save_result(self, user_id: str, result: AssessmentResultResponse) -> None:
+        self._results[result.assessment_id] = result
+
+    async def get_result(self, assessment_id: UUID) -> Optional[AssessmentResultResponse]:
+        return self._results.get(assessment_id)
+
+
+class InMemoryAttemptRepository(AttemptRepository):
+    def __init__(self):
+        self._attempts: Dict[UUID, AttemptRecord] = {}
+
+    async def save(self, record: AttemptRecord) -> None:
+        self._attempts[record.response.attempt_id] = record
+
+    async def get(self, attempt_id: UUID) -> Optional[AttemptRecord]:
+        return self._attempts.get(attempt_id)
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[AttemptRecord]:
+        mine = [r for r in self._attempts.values() if r.user_id == user_id]
+        return sorted(mine, key=lambda r: r.response.submitted_at, reverse=True)[:limit]
+
+    async def history(self, before: datetime) -> AsyncIterator[AttemptRecord]:
+        for record in sorted(self._attempts.values(), key=lambda r: _ts(r.response.submitted_at)):
+            if _ts(record.response.submitted_at) < before:
+                yield record
+
+
+class InMemoryRoadmapRepository(RoadmapRepository):
+    def __init__(self):
+        self._roadmaps: Dict[str, RoadmapResponse] = {}
+
+    async def save(self, roadmap: RoadmapResponse) -> None:
+        self._roadmaps[roadmap.user_id] = roadmap
+
+    async def get(self, user_id: str) -> Optional[RoadmapResponse]:
+        return self._roadmaps.get(user_id)
+
+
+class InMemorySkillProfileRepository(SkillProfileRepository):
+    def __init__(self):
+        self._profiles: Dict[Tuple[str, Topic], SkillScore] = {}
+
+    async def save(self, user_id: str, profile: List[SkillScore]) -> None:
+        for score in profile:
+            self._profiles[(user_id, score.topic)] = score
+
+    async def get(self, user_id: str) -> List[SkillScore]:
+        return sorted(
+            (s for (uid, _), s in self._profiles.items() if uid == user_id), key=lambda s: s.topic.value
+        )
+
+
+@dataclass(frozen=True)
+class Repositories:
+    assessments: AssessmentRepository
+    attempts: AttemptRepository
+    roadmaps: RoadmapRepository
+    skills: SkillProfileRepository
+    problems: ProblemRepository
+
+
+def postgres_repositories() -> Repositories:
+    return Repositories(
+        assessments=PostgresAssessmentRepository(),
+        attempts=PostgresAttemptRepository(),
+        roadmaps=PostgresRoadmapRepository(),
+        skills=PostgresSkillProfileRepository(),
+        problems=ProblemRepository(),
+    )
+
+
+def in_memory_repositories() -> Repositories:
+    return Repositories(
+        assessments=InMemoryAssessmentRepository(),
+        attempts=InMemoryAttemptRepository(),
+        roadmaps=InMemoryRoadmapRepository(),
+        skills=InMemorySkillProfileRepository(),
+        problems=ProblemRepository(),
+    )
+
+
+_repositories: Optional[Repositories] = None
+
+
+def get_repositories() -> Repositories:
+    """Postgres-backed when DATABASE_URL is set (503s until the pool opens, see main.lifespan), in-memory otherwise."""
+    global _repositories
+    if _repositories is None:
+        _repositories = postgres_repositories() if get_settings().database_url else in_memory_repositories()
+    return _repositories
+
+
+def reset_repositories() -> None:
+    global _repositories
+    _repositories = None
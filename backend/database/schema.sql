@@ -0,0 +1,63 @@
+-- Attempt/progress events shipped from each API instance's local event log
+-- (backend/core/eventlog.py). (node, seq) makes re-shipping after a crash idempotent.
+CREATE TABLE IF NOT EXISTS event_log (
+    node        text        NOT NULL,
+    seq         bigint      NOT NULL,
+    kind        text        NOT NULL,
+    user_id     text        NOT NULL,
+    occurred_at timestamptz NOT NULL,
+    payload     jsonb       NOT NULL,
+    PRIMARY KEY (node, seq)
+);
+
+CREATE INDEX IF NOT EXISTS event_log_user_time ON event_log (user_id, occurred_at);
+
+-- Repositories (backend/database/repositories.py)
+CREATE TABLE IF NOT EXISTS assessments (
+    assessment_id uuid        PRIMARY KEY,
+    user_id       text        NOT NULL,
+    created_at    timestamptz NOT NULL,
+    level         text        NOT NULL,
+    topics        text[]      NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS assessment_results (
+    assessment_id uuid        PRIMARY KEY REFERENCES assessments (assessment_id),
+    user_id       text        NOT NULL,
+    submitted_at  timestamptz NOT NULL,
+    result        jsonb       NOT NULL
+);
+
+-- One row per submission being graded or graded; inserting it is what admits a submit
+CREATE TABLE IF NOT EXISTS assessment_submissions (
+    assessment_id uuid        PRIMARY KEY REFERENCES assessments (assessment_id),
+    claimed_at    timestamptz NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    attempt_id   uuid        PRIMARY KEY,
+    user_id      text        NOT NULL,
+    problem_id   text        NOT NULL,
+    language     text        NOT NULL,
+    submitted_at timestamptz NOT NULL,
+    verdict      text        NOT NULL,
+    feedback     text        NOT NULL,
+    score        double precision
+);
+
+CREATE INDEX IF NOT EXISTS attempts_user_time ON attempts (user_id, submitted_at DESC);
+
+CREATE TABLE IF NOT EXISTS roadmaps (
+    user_id      text        PRIMARY KEY,
+    generated_at timestamptz NOT NULL,
+    items        jsonb       NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS skill_profiles (
+    user_id    text             NOT NULL,
+    topic      text             NOT NULL,
+    score      double precision NOT NULL,
+    confidence double precision NOT NULL,
+    updated_at timestamptz      NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, topic)
+);
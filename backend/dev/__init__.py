@@ -0,0 +1 @@
+# dev package: local fixtures and fakes (test keypair/JWKS, fake services)
@@ -0,0 +1,126 @@
+"""
+Minimal fake Ollama HTTP server for local development and benchmarks.
+
+Implements the parts of the Ollama API the backend uses (`POST /api/generate`,
+streaming and non-streaming, and `GET /api/tags`). Replies are a fixed Socratic
+hint emitted word by word with a configurable per-token delay; assessment
+grading prompts get a score of 0.5 for every answer, and a learner message
+asking to "give me the code" gets a reply that spells the solution out (to
+exercise the guidance guardrail).
+
+Usage:
+    python -m backend.dev.fake_ollama [port] [token_delay_ms]
+    OLLAMA_URL=http://127.0.0.1:<port> uvicorn backend.main:app
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+REPLY = (
+    "Good start. Before writing more code, think about what you need to remember "
+    "as you scan the input. Which data structure gives you constant-time lookups, "
+    "and what exactly would you store in it?"
+)
+
+LEAKY_REPLY = (
+    "Sure, here is the whole thing:\n\n```python\ndef two_sum(nums, target):\n    seen = {}\n"
+    "    for i, n in enumerate(nums):\n        if target - n in seen:\n            return [seen[target - n], i]\n"
+    "        seen[n] = i\n    return []\n```\n\nIt runs in O(n) time using a hash map to remember the values "
+    "seen so far, so each complement lookup is constant time on average."
+)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.01
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "gpt-oss:20b"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt = body.get("prompt", "")
+        prior = body.get("context") or []
+        # Fake "encoded" context: one id per prompt word, appended to the prior context
+        context = prior + list(range(len(prompt.split())))
+        graded = re.findall(r"^### Answer (\d+)$", prompt, re.MULTILINE)
+        if graded:
+            tokens = [f"{n}: 0.5\n" for n in graded]
+        elif "give me the code" in prompt.lower():
+            tokens = re.findall(r"\S+\s*", LEAKY_REPLY)
+        else:
+            tokens = [w + " " for w in REPLY.split()]
+        final = {
+            "model": body.get("model"),
+            "done": True,
+            "context": context,
+            "prompt_eval_count": len(prompt.split()),
+            "eval_count": len(tokens),
+            "total_duration": int(self.token_delay * len(tokens) * 1e9),
+        }
+
+        if not body.get("stream", True):
+            time.sleep(self.token_delay * len(tokens))
+            self._send_json(dict(final, response="".join(tokens)))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for tok in tokens:
+                time.sleep(self.token_delay)
+                self._write_chunk({"model": body.get("model"), "response": tok, "done": False})
+            self._write_chunk(dict(final, response=""))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading; a real Ollama aborts the generation here
+
+    def _write_chunk(self, payload: dict) -> None:
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_fake_ollama(port: int = 0, token_delay: float = 0.01) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the server on a background thread; returns (server, base_url)."""
+    handler = type("Handler", (FakeOllamaHandler,), {"token_delay": token_delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 11434
+    delay_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    server, url = start_fake_ollama(port, delay_ms / 1000)
+    print(f"Fake Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,40 @@
+"""
+Mint Supabase-shaped access tokens signed with the bundled dev keypair.
+
+Point the API at the matching key set with:
+    SUPABASE_JWKS_FILE=backend/dev/jwks.json
+
+Usage:
+    python -m backend.dev.tokens <user_id> [ttl_seconds]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import jwt
+
+DEV_DIR = Path(__file__).resolve().parent
+PRIVATE_KEY_PATH = DEV_DIR / "jwt_test_key.pem"
+JWKS_PATH = DEV_DIR / "jwks.json"
+KEY_ID = "osiris-dev-key"
+
+
+def mint_token(user_id: str, ttl_seconds: int = 3600, audience: str = "authenticated") -> str:
+    now = int(time.time())
+    claims = {
+        "sub": user_id,
+        "aud": audience,
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + ttl_seconds,
+    }
+    return jwt.encode(claims, PRIVATE_KEY_PATH.read_text(), algorithm="ES256", headers={"kid": KEY_ID})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    ttl = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+    print(mint_token(sys.argv[1], ttl))
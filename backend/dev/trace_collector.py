@@ -0,0 +1,126 @@
+"""
+Minimal stand-in for an OpenTelemetry collector, for local development.
+
+Accepts OTLP/HTTP JSON on `POST /v1/traces` (what TRACE_EXPORTER=otlp sends),
+prints one indented span tree per trace and optionally appends every span as
+a JSON line to a file. Spans of the same trace may arrive in several exports
+(e.g. an attempt graded after its request returned); each export is printed
+as it comes.
+
+Usage:
+    python -m backend.dev.trace_collector [port] [spans.jsonl]
+    TRACE_EXPORTER=otlp TRACE_OTLP_URL=http://127.0.0.1:<port>/v1/traces uvicorn backend.main:app
+"""
+
+import json
+import sys
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _value(attr: Dict[str, Any]) -> Any:
+    (kind, value), = attr["value"].items()
+    return int(value) if kind == "intValue" else value
+
+
+def flatten(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """OTLP JSON -> flat span dicts (ids, name, times in ns, attributes, error)."""
+    spans = []
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                status = s.get("status", {})
+                spans.append({
+                    "trace_id": s["traceId"],
+                    "span_id": s["spanId"],
+                    "parent_id": s.get("parentSpanId"),
+                    "name": s["name"],
+                    "start_ns": int(s["startTimeUnixNano"]),
+                    "end_ns": int(s["endTimeUnixNano"]),
+                    "attributes": {a["key"]: _value(a) for a in s.get("attributes", [])},
+                    "error": status.get("message") if status.get("code") == 2 else None,
+                })
+    return spans
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    ids = {s["span_id"] for s in spans}
+    children = defaultdict(list)
+    for s in sorted(spans, key=lambda s: s["start_ns"]):
+        children[s["parent_id"] if s["parent_id"] in ids else None].append(s)
+    start = min(s["start_ns"] for s in spans)
+    lines = [f"trace {spans[0]['trace_id']}"]
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for s in children[parent]:
+            offset = (s["start_ns"] - start) / 1e6
+            duration = (s["end_ns"] - s["start_ns"]) / 1e6
+            attrs = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+            error = f" ERROR {s['error']}" if s["error"] else ""
+            lines.append(f"  {'  ' * depth}{s['name']}  +{offset:.1f}ms {duration:.1f}ms  {attrs}{error}")
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    out_path: Optional[str] = None
+    quiet = False
+    received: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        spans = flatten(json.loads(self.rfile.read(length) or b"{}"))
+        by_trace = defaultdict(list)
+        for s in spans:
+            by_trace[s["trace_id"]].append(s)
+        with self.lock:
+            self.received.extend(spans)
+            if self.out_path:
+                with open(self.out_path, "a", encoding="utf-8") as fh:
+                    fh.writelines(json.dumps(s) + "\n" for s in spans)
+            if not self.quiet:
+                for trace in by_trace.values():
+                    print(format_trace(trace), flush=True)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_trace_collector(
+    port: int = 0, out_path: Optional[str] = None, quiet: bool = False
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the server on a background thread; returns (server, traces_url). Spans land in server.received."""
+    handler = type("Handler", (CollectorHandler,), {"out_path": out_path, "quiet": quiet, "received": []})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.received = handler.received
+    threading.Thread(target=server.serve_forever, name="trace-collector", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/traces"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 4318
+    out = sys.argv[2] if len(sys.argv) > 2 else None
+    server, url = start_trace_collector(port, out)
+    print(f"Trace collector listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
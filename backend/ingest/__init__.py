@@ -0,0 +1,4 @@
+# ingest package: bulk problem import into the compact catalog format
+from backend.ingest.pipeline import ImportReport, run_import
+
+__all__ = ["ImportReport", "run_import"]
@@ -0,0 +1,42 @@
+"""
+Import problems into a compact catalog file.
+
+    python -m backend.ingest SOURCE [SOURCE ...] -o backend/data/catalog.osc
+
+SOURCE may be a .jsonl/.md file or a directory searched recursively. Point the
+API at the result with CATALOG_PATH; running servers pick it up on their next
+catalog check.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from backend.ingest.pipeline import run_import
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.ingest", description="Import problems into a .osc catalog.")
+    parser.add_argument("sources", nargs="+", type=Path, help=".jsonl/.md files or directories")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="catalog file to write")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="reprocess every source, ignoring the cache")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = run_import(args.sources, args.output, workers=args.workers, full=args.full)
+    elapsed = time.perf_counter() - started
+
+    for line in report.errors + report.conflicts:
+        print(f"warning: {line}", file=sys.stderr)
+    print(
+        f"{report.problems} problems from {report.sources} sources "
+        f"({report.reprocessed} reprocessed, {report.duplicates} duplicates, "
+        f"{len(report.conflicts)} conflicts, {len(report.errors)} rejected) in {elapsed:.2f}s -> {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
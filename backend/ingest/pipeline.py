@@ -0,0 +1,336 @@
+"""
+Bulk problem import: sources -> parse -> normalize -> validate -> .osc catalog.
+
+Sources are JSONL files (one problem per line) or Markdown files (one problem
+per file, see `parse_markdown`). Changed sources are processed on a process
+pool; unchanged ones (same size and mtime as last run) are served from a
+per-source cache, so refreshing a large bank only pays for what changed.
+Problems are deduplicated by a hash of their content, and the result is
+written as a compact, memory-mappable catalog (backend.core.catalog_file).
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from backend.core.catalog_file import CatalogEntry, encode_record, write_catalog
+from backend.models.schemas import Difficulty, ProblemDetail, Topic
+
+SOURCE_SUFFIXES = (".jsonl", ".md")
+
+TOPIC_ALIASES = {
+    "arrays": "arrays_strings",
+    "strings": "arrays_strings",
+    "array": "arrays_strings",
+    "string": "arrays_strings",
+    "hash_table": "hashing",
+    "hash_map": "hashing",
+    "stack": "stacks_queues",
+    "queue": "stacks_queues",
+    "linked_list": "linked_lists",
+    "tree": "trees",
+    "binary_tree": "trees",
+    "graph": "graphs",
+    "dynamic_programming": "dp",
+    "sort": "sorting",
+}
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_FRONT_MATTER_RE = re.compile(r"\A---\s*\n(.*?)\n---\s*\n", re.S)
+_SECTION_RE = re.compile(r"^##\s+(.+?)\s*$", re.M)
+_FENCE_RE = re.compile(r"```[a-zA-Z0-9_+-]*\n(.*?)```", re.S)
+
+
+@dataclass
+class SourceResult:
+    path: str
+    # (content hash, encoded record); records are serialized in the worker, once
+    records: List[Tuple[str, CatalogEntry]] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    sources: int = 0
+    reprocessed: int = 0
+    problems: int = 0
+    duplicates: int = 0
+    conflicts: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+# --- parse ---
+
+def parse_jsonl(text: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, parsed value) per non-blank line; a line that isn't JSON yields its ValueError instead."""
+    for n, line in enumerate(text.splitlines(), 1):
+        if line.strip():
+            try:
+                yield n, json.loads(line)
+            except ValueError as exc:
+                yield n, exc
+
+
+def parse_markdown(text: str) -> Dict[str, Any]:
+    """
+    One problem per file:
+
+        ---
+        title: Two Sum
+        topic: hashing
+        difficulty: easy
+        entry_point: two_sum
+        ---
+        Statement paragraphs...
+
+        ## Constraints
+        - 2 <= nums.length <= 10^4
+        ## Examples            (```json list of {"input", "output"})
+        ## Tests               (```json list, hidden)
+        ## Solution            (```python reference solution)
+    """
+    raw: Dict[str, Any] = {}
+    match = _FRONT_MATTER_RE.match(text)
+    if match:
+        for line in match.group(1).splitlines():
+            if ":" in line:
+                key, value = line.split(":", 1)
+                raw[key.strip()] = value.strip()
+        text = text[match.end():]
+
+    parts = _SECTION_RE.split(text)
+    raw["statement"] = parts[0].strip()
+    for heading, body in zip(parts[1::2], parts[2::2]):
+        name = heading.strip().lower()
+        fence = _FENCE_RE.search(body)
+        if name == "constraints":
+            raw["constraints"] = [ln.lstrip("-* ").strip() for ln in body.splitlines() if ln.strip()]
+        elif name in ("examples", "tests") and fence:
+            raw[name] = json.loads(fence.group(1))
+        elif name == "solution" and fence:
+            raw["solution"] = fence.group(1)
+    return raw
+
+
+# --- normalize / validate ---
+
+def slugify(text: str) -> str:
+    return _SLUG_RE.sub("-", text.lower()).strip("-")
+
+
+def _list_field(raw: Dict[str, Any], name: str) -> List[Any]:
+    value = raw.get(name)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"{name!r} must be a list, got {type(value).__name__}")
+    return value
+
+
+def normalize(raw: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Canonical record from a parsed problem; raises ValueError for fields of the wrong type."""
+    title = " ".join(str(raw.get("title", "")).split())
+    topic = _SLUG_RE.sub("_", str(raw.get("topic", "")).lower()).strip("_")
+    difficulty = str(raw.get("difficulty", "")).strip().lower()
+    record = {
+        "problem_id": slugify(str(raw.get("problem_id") or title)),
+        "title": title,
+        "topic": TOPIC_ALIASES.get(topic, topic),
+        "difficulty": difficulty,
+        "statement": str(raw.get("statement", "")).strip(),
+        "constraints": [str(c).strip() for c in _list_field(raw, "constraints") if str(c).strip()],
+        "examples": list(_list_field(raw, "examples")),
+        "source": str(raw.get("source") or source),
+        "entry_point": raw.get("entry_point") or None,
+        "tests": list(_list_field(raw, "tests")),
+        "solution": raw.get("solution") or None,
+    }
+    if raw.get("source_url"):
+        record["source_url"] = str(raw["source_url"])
+    return record
+
+
+def validate(record: Dict[str, Any]) -> Optional[str]:
+    """Return an error message, or None when the record is usable."""
+    if record["topic"] not in Topic.__members__:
+        return f"unknown topic {record['topic']!r}"
+    if record["difficulty"] not in Difficulty.__members__:
+        return f"unknown difficulty {record['difficulty']!r}"
+    if not record["problem_id"] or not record["statement"]:
+        return "missing problem_id/title or statement"
+    if record["tests"] and not record["entry_point"]:
+        return "tests given without an entry_point"
+    if any(not isinstance(t, dict) or "input" not in t or "output" not in t for t in record["tests"]):
+        return "every test needs 'input' and 'output'"
+    try:
+        ProblemDetail(**{k: record[k] for k in ProblemDetail.model_fields})
+    except ValidationError as exc:
+        return str(exc).splitlines()[0]
+    return None
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash of what the problem *is*, ignoring where it was imported from."""
+    content = {k: v for k, v in record.items() if k not in ("source", "source_url")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def process_source(path: str) -> SourceResult:
+    """parse -> normalize -> validate for one source file (runs in a worker process)."""
+    result = SourceResult(path)
+    source = Path(path).stem
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+        # A bad line rejects only that problem; a Markdown source is a single problem
+        raws = parse_jsonl(text) if path.endswith(".jsonl") else [(1, parse_markdown(text))]
+    except (OSError, ValueError) as exc:
+        result.errors.append(f"{path}: {exc}")
+        return result
+    for n, raw in raws:
+        if isinstance(raw, ValueError):
+            result.errors.append(f"{path}:{n}: invalid JSON: {raw}")
+            continue
+        if not isinstance(raw, dict):
+            result.errors.append(f"{path}:{n}: expected a JSON object, got {type(raw).__name__}")
+            continue
+        try:
+            record = normalize(raw, source)
+            error = validate(record)
+        except (TypeError, ValueError) as exc:
+            # Whatever a malformed field trips over rejects that problem, not the whole source
+            error = str(exc) or type(exc).__name__
+        if error:
+            result.errors.append(f"{path}:{n}: {error}")
+        else:
+            result.records.append((content_hash(record), encode_record(record)))
+    return result
+
+
+# --- incremental driver ---
+
+def discover(sources: Sequence[Path]) -> List[Path]:
+    found: List[Path] = []
+    for src in sources:
+        if src.is_dir():
+            found.extend(p for p in sorted(src.rglob("*")) if p.suffix in SOURCE_SUFFIXES and p.is_file())
+        elif src.suffix in SOURCE_SUFFIXES:
+            found.append(src)
+    return found
+
+
+class ImportState:
+    """Per-source fingerprints and processed records from the previous run."""
+
+    def __init__(self, output: Path):
+        self.dir = output.with_name(output.name + ".cache")
+        self.manifest_path = self.dir / "manifest.json"
+        try:
+            self.manifest: Dict[str, Dict[str, Any]] = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    @staticmethod
+    def fingerprint(path: Path) -> Tuple[int, int]:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def _cache_file(self, path: str) -> Path:
+        return self.dir / (hashlib.sha1(path.encode()).hexdigest() + ".tsv")
+
+    def cached(self, path: Path) -> Optional[SourceResult]:
+        entry = self.manifest.get(str(path))
+        if entry is None or tuple(entry["fingerprint"]) != self.fingerprint(path):
+            return None
+        result = SourceResult(str(path), errors=entry["errors"])
+        try:
+            # One record per line: hash, id, topic, difficulty, compact JSON (tab-separated)
+            with open(self._cache_file(str(path)), "rb") as fh:
+                for line in fh:
+                    digest, pid, topic, difficulty, blob = line.rstrip(b"\n").split(b"\t", 4)
+                    entry_ = CatalogEntry(pid.decode(), topic.decode(), difficulty.decode(), blob)
+                    result.records.append((digest.decode(), entry_))
+        except (OSError, ValueError):
+            return None
+        return result
+
+    def store(self, path: Path, result: SourceResult) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self._cache_file(str(path)), "wb") as fh:
+            for digest, e in result.records:
+                fh.write(b"\t".join((digest.encode(), e.problem_id.encode(), e.topic.encode(), e.difficulty.encode(), e.blob)))
+                fh.write(b"\n")
+        self.manifest[str(path)] = {"fingerprint": list(self.fingerprint(path)), "errors": result.errors}
+
+    def save(self, live: Sequence[Path]) -> None:
+        keep = {str(p) for p in live}
+        for stale in set(self.manifest) - keep:
+            self._cache_file(stale).unlink(missing_ok=True)
+            del self.manifest[stale]
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.write_text(json.dumps(self.manifest))
+
+
+def run_import(
+    sources: Sequence[Path],
+    output: Path,
+    workers: Optional[int] = None,
+    full: bool = False,
+) -> ImportReport:
+    report = ImportReport()
+    paths = discover(sources)
+    report.sources = len(paths)
+    state = ImportState(output)
+
+    results: Dict[str, SourceResult] = {}
+    todo: List[Path] = []
+    for path in paths:
+        cached = None if full else state.cached(path)
+        if cached is not None:
+            results[str(path)] = cached
+        else:
+            todo.append(path)
+
+    if todo:
+        workers = workers or min(len(todo), os.cpu_count() or 1)
+        if workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                processed = pool.map(process_source, [str(p) for p in todo], chunksize=max(1, len(todo) // (4 * workers)))
+                for path, result in zip(todo, processed):
+                    results[str(path)] = result
+                    state.store(path, result)
+        else:
+            for path in todo:
+                result = process_source(str(path))
+                results[str(path)] = result
+                state.store(path, result)
+    report.reprocessed = len(todo)
+
+    # Deduplicate in stable source order: identical content collapses silently,
+    # a reused problem_id with different content keeps the first and is reported.
+    seen_hashes, seen_ids, catalog = set(), {}, []
+    for path in paths:
+        result = results[str(path)]
+        report.errors.extend(result.errors)
+        for digest, entry in result.records:
+            if digest in seen_hashes:
+                report.duplicates += 1
+                continue
+            if entry.problem_id in seen_ids:
+                report.conflicts.append(f"{entry.problem_id}: {path} conflicts with {seen_ids[entry.problem_id]}")
+                continue
+            seen_hashes.add(digest)
+            seen_ids[entry.problem_id] = path
+            catalog.append(entry)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_catalog(output, catalog)
+    state.save(paths)
+    report.problems = len(catalog)
+    return report
@@ -1,40 +1,195 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+"""
+The API application: `uvicorn backend.main:app`.
 
-from backend.routers import assessments, roadmap, problems, progress, ai, meta
-from backend.database import db
+`create_app()` is the one place the app is assembled (middleware, error
+handlers, routers). Startup does only what must happen before the first
+request: open the database pool, subscribe the progress rollups (their
+history is restored in the background) and the roadmap store, and recover the
+event log. Everything
+else (JWKS, problem catalog, question bank, sandbox zygote, LLM client) loads
+on first use or in `warm_up()`, which STARTUP_WARMUP runs in the background
+(default), before serving (blocking) or not at all.
 
-app = FastAPI(
-    title="Interview Prep Roadmap API",
-    version="0.1.0",
-    description="Assessment-driven coding practice with Socratic AI guidance (no full solutions).",
-)
+`python -m backend.bench.startup` profiles imports and checks the time from
+process start to the first /health response against a budget.
+"""
+
+import gc
+
+# Nothing allocated while importing is garbage, but the heap grows enough to
+# trigger full collections that rescan all of it (~20 ms each); see the end.
+# Every exit from here on re-enables it, so a failed import can't leave it off
+gc.disable()
+
+try:
+    import asyncio
+    import logging
+    from contextlib import asynccontextmanager
+    from typing import Optional
+
+    from fastapi import FastAPI, Request, status
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+
+    from backend.core.adaptive import get_adaptive_assessments
+    from backend.core.attempts import stop_attempt_queue
+    from backend.core.auth import get_verifier
+    from backend.core.catalog import get_catalog
+    from backend.core.config import get_settings
+    from backend.core.eventlog import get_event_log, stop_event_log
+    from backend.core.grading import stop_grading_pipeline
+    from backend.core.guidance_sessions import stop_guidance_sessions
+    from backend.core.invalidation import get_invalidation_bus, stop_invalidation_bus
+    from backend.core.llm import close_llm_client, get_llm_client
+    from backend.core.metrics import instrument_routes
+    from backend.core.progress import get_progress_store
+    from backend.core.roadmap import get_roadmap_generator
+    from backend.core.roadmap_store import get_roadmap_store
+    from backend.core.sandbox import close_sandbox, get_sandbox
+    from backend.core.tracing import add_tracing, stop_tracer
+    from backend.routers import assessments, roadmap, problems, progress, ai, meta, me, metrics
+    from backend.database import db
+    from backend.database.pool import DatabaseUnavailable, close_pool, open_pool, probe
+    from backend.database.repositories import reset_repositories
+except BaseException:
+    gc.enable()
+    raise
 
-# Allow your frontend to talk to this backend
-# (In production, replace "*" with your actual frontend domain)
-# IMPORTANT: CORS middleware must be added BEFORE routers
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"], 
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+logger = logging.getLogger(__name__)
+
+ROUTERS = (
+    assessments.router,
+    roadmap.router,
+    problems.router,
+    progress.router,
+    ai.router,
+    meta.router,
+    me.router,
+    metrics.router,
+    db.router,
 )
 
-# Keep your original endpoints
-@app.get("/")
-def root():
+
+def warm_up() -> None:
+    """Load what the first real requests would otherwise pay for. Blocking; safe to run on a worker thread."""
+    try:
+        get_verifier().jwks.load()
+    except Exception:
+        logger.warning("JWKS load failed; retried on first use", exc_info=True)
+    get_catalog().load()
+    get_adaptive_assessments()
+    get_roadmap_generator()
+    # Fork the sandbox zygote now so the first submission doesn't pay interpreter start-up
+    get_sandbox().start()
+    get_llm_client().http
+
+
+async def _warm_up() -> None:
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        logger.exception("warm-up failed; subsystems load on first use")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool first: repositories pick Postgres or the in-memory stand-in from it
+    await open_pool()
+    # Listens for other workers' cache invalidations (only with a database)
+    await get_invalidation_bus().start()
+    # Subscribe the progress rollups before any attempt can finish; earlier attempts load meanwhile
+    restoring = asyncio.create_task(get_progress_store().restore())
+    # Likewise the roadmap store, so every graded attempt here also invalidates other workers' roadmaps
+    get_roadmap_store()
+    # Recovers the local log (and re-ships anything a crash left unacked)
+    await get_event_log().start()
+
+    mode = get_settings().startup_warmup
+    warming: Optional[asyncio.Task] = None
+    if mode == "blocking":
+        await _warm_up()
+    elif mode == "background":
+        warming = asyncio.create_task(_warm_up())
+    yield
+    if warming is not None:
+        # Let it finish: a sandbox it starts after close_sandbox() would be orphaned
+        await warming
+    restoring.cancel()
+    await asyncio.gather(restoring, return_exceptions=True)
+    await stop_attempt_queue()
+    await stop_grading_pipeline()
+    await stop_event_log()
+    await stop_guidance_sessions()
+    await close_llm_client()
+    await stop_invalidation_bus()
+    await close_pool()
+    reset_repositories()
+    close_sandbox()
+    # Last: flushes spans from everything above
+    stop_tracer()
+
+
+async def database_unavailable(_request: Request, _exc: DatabaseUnavailable):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database unavailable, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+async def root():
     return {"message": "Hello World"}
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
-
-# Routers
-app.include_router(assessments.router)
-app.include_router(roadmap.router)
-app.include_router(problems.router)
-app.include_router(progress.router)
-app.include_router(ai.router)
-app.include_router(meta.router)
-app.include_router(db.router)
+
+async def health_check():
+    database = await probe()
+    if database == "unavailable":
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "degraded", "database": database},
+        )
+    return {"status": "healthy", "database": database}
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Interview Prep Roadmap API",
+        version="0.1.0",
+        description="Assessment-driven coding practice with Socratic AI guidance (no full solutions).",
+        lifespan=lifespan,
+    )
+
+    # Allow your frontend to talk to this backend
+    # (In production, replace "*" with your actual frontend domain)
+    # IMPORTANT: CORS middleware must be added BEFORE routers
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "X-Trace-Id",
+            "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After",
+        ],
+    )
+    # Outermost, so the root span covers CORS and error handling too
+    add_tracing(app)
+    app.add_exception_handler(DatabaseUnavailable, database_unavailable)
+
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    for router in ROUTERS:
+        app.include_router(router)
+    # Per-route latency, status and in-flight metrics for /metrics
+    instrument_routes(app)
+    return app
+
+
+try:
+    app = create_app()
+    # Park the start-up heap outside the collector's generations: later full
+    # collections, and their pauses on the request path, skip it
+    gc.freeze()
+finally:
+    gc.enable()
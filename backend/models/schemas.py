@@ -44,11 +44,19 @@ class Question(BaseModel):
     topic: Topic
     prompt: str
     difficulty: Difficulty
+    kind: str = Field(default="choice", description="choice | code | concept")
+    choices: Optional[List[str]] = Field(default=None, description="Multiple-choice options, if any.")
 
 class AssessmentGetResponse(BaseModel):
     assessment_id: UUID
     created_at: str
-    questions: List[Question]
+    questions: List[Question] = Field(description="The question(s) to answer next; empty once done.")
+    answered: int = 0
+    done: bool = False
+
+class AssessmentAnswerRequest(BaseModel):
+    question_id: UUID
+    answer: str = Field(description="The chosen option (index, letter or text), code, or a written answer.")
 
 class AssessmentSubmitRequest(BaseModel):
     answers: Dict[UUID, str] = Field(description="Map of question_id -> user's answer (text/code).")
@@ -65,6 +73,9 @@ class AssessmentResultResponse(BaseModel):
     overall_score: float
     skill_profile: List[SkillScore]
     recommended_focus: List[Topic]
+    pending_answers: int = Field(
+        default=0, description="Answers still being graded; GET /assessments/{id}/result has the final result."
+    )
 
 # --- Roadmap ---
 class RoadmapItem(BaseModel):
@@ -128,6 +139,8 @@ class GuidanceRequest(BaseModel):
     code_snippet: Optional[str] = None
     language: Optional[str] = "python"
     topic: Optional[Topic] = None
+    # Start over instead of continuing this problem's conversation
+    new_session: bool = False
 
 class GuidanceResponse(BaseModel):
     response_id: UUID
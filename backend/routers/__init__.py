@@ -1 +1 @@
-from backend.routers import assessments, roadmap, problems, progress, ai, meta
+from backend.routers import assessments, roadmap, problems, progress, ai, meta, me, metrics
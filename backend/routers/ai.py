@@ -1,27 +1,160 @@
+import json
+from typing import List, Optional, Tuple
 from uuid import uuid4
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
 from backend.core.auth import require_user
+from backend.core.catalog import ProblemRecord, get_catalog
+from backend.core.guardrail import SolutionGuard, guard_stream
+from backend.core.guidance import FALLBACK_MESSAGE, GUARDRAIL_MESSAGE, SYSTEM_PROMPT
+from backend.core.guidance_cache import cache_key, get_guidance_cache
+from backend.core.guidance_sessions import GuidanceSession, get_guidance_sessions
+from backend.core.llm import LLMUnavailable
+from backend.core.llm_scheduler import Priority, QueueFull, get_llm_scheduler
+from backend.core.ratelimit import enforce_rate_limit
 from backend.models.schemas import GuidanceRequest, GuidanceResponse, now_iso
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-@router.post("/guidance", response_model=GuidanceResponse)
-def ai_guidance(payload: GuidanceRequest, authorization: str | None = Header(default=None)):
-    _user_id = require_user(authorization)
-
-    # TODO: Call Ollama with strict "no solutions" prompts + output validation.
-    msg = (
-        "Let’s do this step-by-step.\n\n"
-        "1) What time complexity are you aiming for?\n"
-        "2) What condition are you checking, in one sentence?\n"
-        "3) What data structure helps you remember what you've seen before?\n\n"
-        "If you paste your current approach (even partial), I’ll guide the next step."
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _queue_full(exc: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="AI guidance is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)},
     )
 
+def _turn(session: GuidanceSession, payload: GuidanceRequest) -> Tuple[str, Optional[List[int]], SolutionGuard]:
+    """(prompt, context, guard) for the next turn of `session`."""
+    record: Optional[ProblemRecord] = get_catalog().get(payload.problem_id)
+    prompt, context = session.next_prompt(payload, record.detail if record is not None else None)
+    guard = SolutionGuard(record.entry_point, record.solution) if record is not None else SolutionGuard()
+    return prompt, context, guard
+
+@router.post("/guidance", response_model=GuidanceResponse)
+async def ai_guidance(payload: GuidanceRequest, response: Response, authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
+    response.headers.update(await enforce_rate_limit("guidance", user_id))
+
+    sessions = get_guidance_sessions()
+    session = sessions.get(user_id, payload.problem_id, fresh=payload.new_session)
+    scheduler = get_llm_scheduler()
+    cache = get_guidance_cache()
+    key = cache_key(payload)
+    mode = "socratic"
+    async with session.lock:
+        # Replies depend on the conversation so far; only opening questions are shared between learners
+        opening = not session.turns
+        msg = cache.get(key) if opening else None
+        generation = None
+        if msg is None:
+            prompt, context, guard = _turn(session, payload)
+            try:
+                # Streamed even here, so the guardrail can stop a reply that starts giving away code
+                chunks = scheduler.stream(prompt, system=SYSTEM_PROMPT, priority=Priority.GUIDANCE, context=context)
+                async for chunk in guard_stream(chunks, guard):
+                    generation = chunk.generation or generation
+                if guard.tripped:
+                    msg, mode = GUARDRAIL_MESSAGE, "guarded"
+                elif generation is None:
+                    raise LLMUnavailable("stream ended without a final chunk")
+                else:
+                    msg = generation.text
+                    if opening:
+                        cache.put(key, msg)
+            except QueueFull as exc:
+                raise _queue_full(exc)
+            except LLMUnavailable:
+                msg, mode = FALLBACK_MESSAGE, "fallback"
+        if mode != "fallback":
+            sessions.record(session, payload, msg, generation, scheduler)
+
     return GuidanceResponse(
         response_id=uuid4(),
         created_at=now_iso(),
         message=msg,
-        mode="socratic",
+        mode=mode,
     )
+
+@router.post("/guidance/stream")
+async def ai_guidance_stream(payload: GuidanceRequest, authorization: str | None = Header(default=None)):
+    """
+    Server-Sent Events version of /ai/guidance.
+
+    Emits `token` events ({"text": ...}) as the model produces them, then one
+    `done` event carrying the GuidanceResponse fields minus `message`. Lines
+    that look like code are sent once complete and checked; if the reply
+    starts giving away the solution, generation stops and a `replace` event
+    ({"text": ...}) carries the message to show instead of what was sent so
+    far (mode "guarded").
+    """
+    user_id = require_user(authorization)
+    limit_headers = await enforce_rate_limit("guidance", user_id)
+    response_id, created_at = uuid4(), now_iso()
+    sessions = get_guidance_sessions()
+    session = sessions.get(user_id, payload.problem_id, fresh=payload.new_session)
+    cache = get_guidance_cache()
+    key = cache_key(payload)
+    opening = not session.turns
+    cached = cache.get(key) if opening else None
+    scheduler = get_llm_scheduler()
+    if cached is None:
+        try:
+            scheduler.admit_or_raise()
+        except QueueFull as exc:
+            raise _queue_full(exc)
+
+    async def events():
+        mode = "socratic"
+        # Held for the whole stream, so a second tab's question waits for this reply
+        async with session.lock:
+            if cached is not None:
+                sessions.record(session, payload, cached, None, scheduler)
+                yield _sse("token", {"text": cached})
+                yield _sse("done", {"response_id": str(response_id), "created_at": created_at, "mode": mode})
+                return
+
+            prompt, context, guard = _turn(session, payload)
+            sent_any = finished = False
+            try:
+                chunks = scheduler.stream(prompt, system=SYSTEM_PROMPT, priority=Priority.GUIDANCE, context=context)
+                async for chunk in guard_stream(chunks, guard):
+                    if chunk.text:
+                        sent_any = True
+                        yield _sse("token", {"text": chunk.text})
+                    if chunk.generation is not None:
+                        finished = True
+                        if opening:
+                            cache.put(key, chunk.generation.text)
+                        sessions.record(session, payload, chunk.generation.text, chunk.generation, scheduler)
+                if guard.tripped:
+                    mode = "guarded"
+                    sessions.record(session, payload, GUARDRAIL_MESSAGE, None, scheduler)
+                    yield _sse("replace", {"text": GUARDRAIL_MESSAGE})
+                elif not finished:
+                    raise LLMUnavailable("stream ended without a final chunk")
+            except (LLMUnavailable, QueueFull):
+                if sent_any:
+                    yield _sse("error", {"detail": "Guidance stream interrupted"})
+                    return
+                mode = "fallback"
+                yield _sse("token", {"text": FALLBACK_MESSAGE})
+        yield _sse("done", {"response_id": str(response_id), "created_at": created_at, "mode": mode})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **limit_headers},
+    )
+
+@router.get("/stats")
+async def ai_stats():
+    """LLM queue depth/wait times, guidance cache and session counters, for capacity planning."""
+    return {
+        "scheduler": get_llm_scheduler().stats(),
+        "cache": get_guidance_cache().stats(),
+        "sessions": get_guidance_sessions().stats(),
+    }
@@ -1,18 +1,70 @@
+import asyncio
+from typing import List
 from uuid import uuid4, UUID
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException, status
 
+from backend.core.adaptive import AssessmentSession, get_adaptive_assessments
 from backend.core.auth import require_user
+from backend.core.events import ASSESSMENT_SUBMITTED, get_event_bus
+from backend.core.grading import GradingJob, get_grading_pipeline
+from backend.core.responses import FastJSONResponse
+from backend.core.skills import get_skill_engine
+from backend.database.repositories import AssessmentRecord, get_repositories
 from backend.models.schemas import (
     AssessmentStartRequest, AssessmentStartResponse,
-    AssessmentGetResponse, AssessmentSubmitRequest, AssessmentResultResponse,
-    Question, Topic, Difficulty, SkillScore, now_iso
+    AssessmentGetResponse, AssessmentAnswerRequest, AssessmentSubmitRequest, AssessmentResultResponse,
+    Topic, now_iso
 )
 
 router = APIRouter(prefix="/assessments", tags=["assessments"])
 
+async def _owned_assessment(assessment_id: UUID, user_id: str) -> AssessmentRecord:
+    record = await get_repositories().assessments.get(assessment_id)
+    if record is None or record.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    return record
+
+def _session(record: AssessmentRecord) -> AssessmentSession:
+    adaptive = get_adaptive_assessments()
+    session = adaptive.get(record.assessment_id)
+    if session is None:
+        # Evicted or lost on restart; answers so far already live in the skill profile
+        session = adaptive.start(record.assessment_id, record.user_id, record.topics)
+    return session
+
+def _next(record: AssessmentRecord, session: AssessmentSession) -> FastJSONResponse:
+    items = get_adaptive_assessments().next_questions(session)
+    return FastJSONResponse(AssessmentGetResponse(
+        assessment_id=record.assessment_id,
+        created_at=record.created_at,
+        questions=[item.question for item in items],
+        answered=session.answered,
+        done=not items,
+    ))
+
+async def _save_result(assessment_id: UUID, user_id: str, pending_answers: int) -> AssessmentResultResponse:
+    skills = get_skill_engine()
+    profile = skills.profile(user_id)
+    ranked = sorted(profile or skills.profile(user_id, observed_only=False), key=lambda s: s.score)
+    overall = sum(s.score for s in profile) / len(profile) if profile else 0.0
+
+    result = AssessmentResultResponse(
+        assessment_id=assessment_id,
+        submitted_at=now_iso(),
+        overall_score=round(overall, 4),
+        skill_profile=profile,
+        recommended_focus=[s.topic for s in ranked[:3]],
+        pending_answers=pending_answers,
+    )
+    repos = get_repositories()
+    await repos.assessments.save_result(user_id, result)
+    await repos.skills.save(user_id, profile)
+    get_event_bus().publish(ASSESSMENT_SUBMITTED, user_id=user_id, assessment_id=assessment_id)
+    return result
+
 @router.post("", response_model=AssessmentStartResponse)
-def start_assessment(payload: AssessmentStartRequest, authorization: str | None = Header(default=None)):
-    _user_id = require_user(authorization)
+async def start_assessment(payload: AssessmentStartRequest, authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
 
     topics = payload.topics or [
         Topic.arrays_strings,
@@ -22,60 +74,108 @@ def start_assessment(payload: AssessmentStartRequest, authorization: str | None
         Topic.dp,
     ]
 
-    assessment_id = uuid4()
-    return AssessmentStartResponse(
-        assessment_id=assessment_id,
+    record = AssessmentRecord(
+        assessment_id=uuid4(),
+        user_id=user_id,
         created_at=now_iso(),
         level=payload.level,
         topics=topics,
-        instructions="Answer each question as best you can. Used to build your skill profile and roadmap.",
+    )
+    await get_repositories().assessments.create(record)
+    await get_skill_engine().hydrate(user_id)
+    get_adaptive_assessments().start(record.assessment_id, user_id, topics)
+    return AssessmentStartResponse(
+        assessment_id=record.assessment_id,
+        created_at=record.created_at,
+        level=record.level,
+        topics=record.topics,
+        instructions=(
+            "Answer one question at a time; each question adapts to your previous answers. "
+            "Once your skill profile is confident enough for every topic, a few open questions "
+            "(code or a short explanation) follow, graded when you submit."
+        ),
     )
 
 @router.get("/{assessment_id}", response_model=AssessmentGetResponse)
-def get_assessment(assessment_id: UUID, authorization: str | None = Header(default=None)):
-    _user_id = require_user(authorization)
-
-    questions = [
-        Question(
-            question_id=uuid4(),
-            topic=Topic.arrays_strings,
-            difficulty=Difficulty.easy,
-            prompt="Explain the difference between an array and a linked list. When would you choose each?",
-        ),
-        Question(
-            question_id=uuid4(),
-            topic=Topic.hashing,
-            difficulty=Difficulty.medium,
-            prompt="Given a list of integers, return whether any value appears at least twice. Provide an O(n) approach.",
-        ),
-    ]
+async def get_assessment(assessment_id: UUID, authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
+    record = await _owned_assessment(assessment_id, user_id)
 
-    return AssessmentGetResponse(
-        assessment_id=assessment_id,
-        created_at=now_iso(),
-        questions=questions,
-    )
+    return _next(record, _session(record))
+
+@router.post("/{assessment_id}/answers", response_model=AssessmentGetResponse)
+async def answer_question(
+    assessment_id: UUID,
+    payload: AssessmentAnswerRequest,
+    authorization: str | None = Header(default=None),
+):
+    """Answer a question currently shown and get what to answer next (or `done`)."""
+    user_id = require_user(authorization)
+    record = await _owned_assessment(assessment_id, user_id)
+    await get_skill_engine().hydrate(user_id)
+
+    session = _session(record)
+    if not get_adaptive_assessments().answer(session, payload.question_id, payload.answer):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not the current question")
+    return _next(record, session)
+
+async def _submit(record: AssessmentRecord, payload: AssessmentSubmitRequest) -> FastJSONResponse:
+    assessment_id, user_id = record.assessment_id, record.user_id
+    await get_skill_engine().hydrate(user_id)
+
+    adaptive = get_adaptive_assessments()
+    session = _session(record)
+    # Answers may also come here instead of through /answers (open-ended ones usually do)
+    for question_id, answer in payload.answers.items():
+        adaptive.answer(session, question_id, answer)
+    jobs = [GradingJob(item, answer) for item, answer in adaptive.finish(session)]
+
+    partial_saved = asyncio.Event()
+
+    async def finish_late(late: List[GradingJob]) -> None:
+        for job in late:
+            if job.outcome is not None:
+                adaptive.observe(user_id, job.item, job.outcome)
+        # The final result must not be overwritten by the partial one
+        await partial_saved.wait()
+        await _save_result(assessment_id, user_id, pending_answers=0)
+
+    graded, late = await get_grading_pipeline().grade(jobs, on_late=finish_late)
+    for job in graded:
+        if job.outcome is not None:
+            adaptive.observe(user_id, job.item, job.outcome)
+    # Partial when graders missed the deadline: their answers aren't in the profile (so confidence is lower) yet
+    try:
+        result = await _save_result(assessment_id, user_id, pending_answers=len(late))
+    finally:
+        partial_saved.set()
+    return FastJSONResponse(result)
 
 @router.post("/{assessment_id}/submit", response_model=AssessmentResultResponse)
-def submit_assessment(
+async def submit_assessment(
     assessment_id: UUID,
     payload: AssessmentSubmitRequest,
     authorization: str | None = Header(default=None),
 ):
-    _user_id = require_user(authorization)
+    user_id = require_user(authorization)
+    record = await _owned_assessment(assessment_id, user_id)
+    # The claim is a conditional insert, so of concurrent submits (from any worker) exactly one is graded
+    assessments = get_repositories().assessments
+    if not await assessments.claim_submission(assessment_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Assessment already submitted")
+    try:
+        return await _submit(record, payload)
+    except BaseException:
+        # Nothing saved: let the client submit again
+        await assessments.release_submission(assessment_id)
+        raise
 
-    profile = [
-        SkillScore(topic=Topic.arrays_strings, score=0.6, confidence=0.5),
-        SkillScore(topic=Topic.hashing, score=0.4, confidence=0.4),
-        SkillScore(topic=Topic.trees, score=0.3, confidence=0.3),
-        SkillScore(topic=Topic.dp, score=0.2, confidence=0.2),
-    ]
-    recommended_focus = [Topic.dp, Topic.trees, Topic.hashing]
+@router.get("/{assessment_id}/result", response_model=AssessmentResultResponse)
+async def get_assessment_result(assessment_id: UUID, authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
+    await _owned_assessment(assessment_id, user_id)
 
-    return AssessmentResultResponse(
-        assessment_id=assessment_id,
-        submitted_at=now_iso(),
-        overall_score=0.38,
-        skill_profile=profile,
-        recommended_focus=recommended_focus,
-    )
+    result = await get_repositories().assessments.get_result(assessment_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not submitted yet")
+    return FastJSONResponse(result)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Header
+
+from backend.core.auth import require_user
+from backend.models.schemas import now_iso
+
+router = APIRouter(tags=["me"])
+
+@router.get("/me")
+async def get_me(authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
+    # TODO: fetch user profile from Supabase
+    return {
+        "user_id": user_id,
+        "created_at": None,
+        "plan": "free",
+        "server_time": now_iso(),
+    }
@@ -1,12 +1,18 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
+from backend.core.responses import CachedBody, cached_json_response
 from backend.models.schemas import Topic, Difficulty
 
 router = APIRouter(prefix="/meta", tags=["meta"])
 
+# Fixed for a given deploy, and the same for everyone
+META_CACHE_CONTROL = "public, max-age=3600"
+TOPICS = CachedBody({"topics": [t.value for t in Topic]})
+DIFFICULTIES = CachedBody({"difficulties": [d.value for d in Difficulty]})
+
 @router.get("/topics")
-def list_topics():
-    return {"topics": [t.value for t in Topic]}
+async def list_topics(if_none_match: str | None = Header(default=None)):
+    return cached_json_response(TOPICS, if_none_match, META_CACHE_CONTROL)
 
 @router.get("/difficulties")
-def list_difficulties():
-    return {"difficulties": [d.value for d in Difficulty]}
+async def list_difficulties(if_none_match: str | None = Header(default=None)):
+    return cached_json_response(DIFFICULTIES, if_none_match, META_CACHE_CONTROL)
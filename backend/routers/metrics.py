@@ -0,0 +1,87 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.core.auth import get_verifier
+from backend.core.guidance_cache import get_guidance_cache
+from backend.core.guidance_sessions import get_guidance_sessions
+from backend.core.invalidation import get_invalidation_bus
+from backend.core.llm_scheduler import get_llm_scheduler
+from backend.core.metrics import REGISTRY
+from backend.core.ratelimit import get_rate_limiter
+from backend.core.roadmap_store import get_roadmap_store
+from backend.core.sandbox import get_sandbox
+from backend.database.pool import get_pool
+
+router = APIRouter(tags=["metrics"])
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _cache_lookups(name: str, hits: int, misses: int):
+    return (
+        f"osiris_{name}_cache_lookups_total", "counter", f"{name.replace('_', ' ').capitalize()} cache lookups by result.",
+        ("result",), {("hit",): hits, ("miss",): misses},
+    )
+
+def _subsystems():
+    """Read at scrape time from counters the subsystems already keep."""
+    scheduler = get_llm_scheduler().stats()
+    yield "osiris_llm_queue_depth", "gauge", "LLM calls waiting for a slot.", (), {(): scheduler["queue_depth"]}
+    yield "osiris_llm_running", "gauge", "LLM generations running.", (), {(): scheduler["running"]}
+    yield (
+        "osiris_llm_requests_total", "counter", "LLM calls by how the scheduler handled them.", ("outcome",),
+        {(k,): scheduler[k] for k in ("admitted", "rejected", "coalesced")},
+    )
+
+    guidance = get_guidance_cache()
+    yield _cache_lookups("guidance", guidance.hits, guidance.misses)
+    sessions = get_guidance_sessions().stats()
+    yield "osiris_guidance_sessions", "gauge", "Guidance conversations held in memory.", (), {(): sessions["sessions"]}
+    yield (
+        "osiris_guidance_turns_total", "counter", "Guidance turns by whether the model's context was reused.",
+        ("prompt",), {("continued",): sessions["continued"], ("primed",): sessions["primed"]},
+    )
+    yield (
+        "osiris_guidance_compactions_total", "counter", "Guidance conversations summarized to fit the budget.", (),
+        {(): sessions["compactions"]},
+    )
+    roadmaps = get_roadmap_store()
+    yield _cache_lookups("roadmap", roadmaps.hits, roadmaps.misses)
+    tokens = get_verifier().cache
+    yield _cache_lookups("token", tokens.hits, tokens.misses)
+
+    yield (
+        "osiris_sandbox_submissions_total", "counter", "Code submissions sent to the sandbox.", (),
+        {(): get_sandbox().executions},
+    )
+
+    limiter = get_rate_limiter()
+    yield (
+        "osiris_rate_limit_checks_total", "counter", "Rate-limited requests by outcome.", ("result",),
+        {("allowed",): limiter.allowed, ("rejected",): limiter.rejected},
+    )
+
+    pool = get_pool()
+    if pool is not None:
+        bus = get_invalidation_bus().stats()
+        yield "osiris_invalidation_bus_up", "gauge", "Whether invalidations are delivered.", (), {(): int(bus["up"])}
+        yield (
+            "osiris_invalidation_messages_total", "counter", "Cache invalidations by direction.", ("direction",),
+            {("published",): bus["published"], ("received",): bus["received"]},
+        )
+        yield (
+            "osiris_invalidation_reconnects_total", "counter", "Invalidation listener reconnects.", (),
+            {(): bus["reconnects"]},
+        )
+        size, idle = pool.get_size(), pool.get_idle_size()
+        yield (
+            "osiris_db_pool_connections", "gauge", "Pooled database connections by state.", ("state",),
+            {("in_use",): size - idle, ("idle",): idle},
+        )
+        yield "osiris_db_pool_max_connections", "gauge", "Pool size limit.", (), {(): pool.get_max_size()}
+
+REGISTRY.collect(_subsystems)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
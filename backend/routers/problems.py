@@ -1,16 +1,25 @@
-from uuid import uuid4
-from fastapi import APIRouter, Header, Query
+from uuid import UUID
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
 
+from backend.core.attempts import AttemptQueueFull, get_attempt_queue
 from backend.core.auth import require_user
+from backend.core.eventlog import ATTEMPT_SUBMITTED, get_event_log
+from backend.core.ratelimit import enforce_rate_limit
+from backend.core.responses import FastJSONResponse, cached_json_response
+from backend.database.repositories import get_repositories
 from backend.models.schemas import (
     ProblemSummary, ProblemDetail, AttemptSubmitRequest, AttemptSubmitResponse,
-    Topic, Difficulty, now_iso
+    Topic, Difficulty
 )
 
 router = APIRouter(prefix="/problems", tags=["problems"])
 
+# Problem statements are the same for every user, so shared caches may keep them briefly;
+# a catalog reload changes the ETag of whatever it changed
+PROBLEM_CACHE_CONTROL = "public, max-age=60"
+
 @router.get("/recommended", response_model=list[ProblemSummary])
-def get_recommended_problems(
+async def get_recommended_problems(
     authorization: str | None = Header(default=None),
     topic: Topic | None = Query(default=None),
     difficulty: Difficulty | None = Query(default=None),
@@ -18,49 +27,78 @@ def get_recommended_problems(
 ):
     _user_id = require_user(authorization)
 
-    base = [
-        ProblemSummary(problem_id="two-sum", title="Two Sum", topic=Topic.hashing, difficulty=Difficulty.easy),
-        ProblemSummary(problem_id="valid-parentheses", title="Valid Parentheses", topic=Topic.stacks_queues, difficulty=Difficulty.easy),
-        ProblemSummary(problem_id="house-robber", title="House Robber", topic=Topic.dp, difficulty=Difficulty.medium),
-    ]
-
-    filtered = [
-        p for p in base
-        if (topic is None or p.topic == topic) and (difficulty is None or p.difficulty == difficulty)
-    ]
-    return filtered[:limit]
+    records = await get_repositories().problems.query(topic, difficulty, limit)
+    return FastJSONResponse([record.summary for record in records])
 
 @router.get("/{problem_id}", response_model=ProblemDetail)
-def get_problem(problem_id: str, authorization: str | None = Header(default=None)):
+async def get_problem(
+    problem_id: str,
+    authorization: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+):
     _user_id = require_user(authorization)
 
-    if problem_id == "two-sum":
-        return ProblemDetail(
-            problem_id="two-sum",
-            title="Two Sum",
-            topic=Topic.hashing,
-            difficulty=Difficulty.easy,
-            statement="Given an array of integers nums and an integer target, return indices of two numbers such that they add up to target.",
-            constraints=["2 <= nums.length <= 10^4", "-10^9 <= nums[i] <= 10^9"],
-            examples=[{"input": {"nums": [2, 7, 11, 15], "target": 9}, "output": [0, 1]}],
+    record = await get_repositories().problems.get(problem_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Problem not found")
+    return cached_json_response(record.detail_json, if_none_match, PROBLEM_CACHE_CONTROL)
+
+@router.post("/{problem_id}/attempts", response_model=AttemptSubmitResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_attempt(
+    problem_id: str,
+    payload: AttemptSubmitRequest,
+    response: Response,
+    authorization: str | None = Header(default=None),
+):
+    user_id = require_user(authorization)
+    # Unknown problems don't cost the caller any of their attempt budget
+    if await get_repositories().problems.get(problem_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Problem not found")
+    response.headers.update(await enforce_rate_limit("attempts", user_id))
+
+    queue = get_attempt_queue()
+    try:
+        attempt_id = queue.reserve()
+    except AttemptQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts are waiting to be evaluated, please retry shortly",
+            headers={"Retry-After": "5"},
         )
 
-    return ProblemDetail(
-        problem_id=problem_id,
-        title="Placeholder Problem",
-        topic=Topic.arrays_strings,
-        difficulty=Difficulty.easy,
-        statement="Problem statement not found in demo mode.",
-    )
+    # Durable before it is graded or acknowledged; concurrent submissions share one fsync
+    try:
+        await get_event_log().append(
+            ATTEMPT_SUBMITTED,
+            user_id,
+            {
+                "attempt_id": attempt_id,
+                "problem_id": problem_id,
+                "language": payload.language,
+                "time_spent_seconds": payload.time_spent_seconds,
+            },
+        )
+    except BaseException:
+        queue.release()
+        raise
+    job = queue.submit(attempt_id, user_id, problem_id, payload)
 
-@router.post("/{problem_id}/attempts", response_model=AttemptSubmitResponse)
-def submit_attempt(problem_id: str, payload: AttemptSubmitRequest, authorization: str | None = Header(default=None)):
-    _user_id = require_user(authorization)
+    response.headers["Location"] = f"/problems/{problem_id}/attempts/{job.attempt_id}"
+    return job.to_response()
+
+@router.get("/{problem_id}/attempts/{attempt_id}", response_model=AttemptSubmitResponse)
+async def get_attempt(problem_id: str, attempt_id: UUID, authorization: str | None = Header(default=None)):
+    user_id = require_user(authorization)
 
-    return AttemptSubmitResponse(
-        attempt_id=uuid4(),
-        submitted_at=now_iso(),
-        verdict="received",
-        feedback="Attempt received. Evaluation is not yet implemented.",
-        updated_skill_profile=None,
-    )
+    job = get_attempt_queue().get(attempt_id)
+    if job is not None:
+        owner, problem, response = job.user_id, job.problem_id, job.to_response()
+    else:
+        # Aged out of the queue's retention (or graded by another instance)
+        record = await get_repositories().attempts.get(attempt_id)
+        if record is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attempt not found")
+        owner, problem, response = record.user_id, record.problem_id, record.response
+    if owner != user_id or problem != problem_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attempt not found")
+    return FastJSONResponse(response)
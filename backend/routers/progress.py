@@ -1,19 +1,35 @@
 from fastapi import APIRouter, Header
 from backend.core.auth import require_user
-from backend.models.schemas import ProgressOverview, Topic, now_iso
+from backend.core.progress import get_progress_store, valid_timezone
+from backend.core.responses import FastJSONResponse
+from backend.core.skills import get_skill_engine
+from backend.models.schemas import ProgressOverview, now_iso
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
 @router.get("/overview", response_model=ProgressOverview)
-def progress_overview(authorization: str | None = Header(default=None)):
+async def progress_overview(
+    authorization: str | None = Header(default=None),
+    x_timezone: str | None = Header(default=None, description="IANA timezone for day streaks, e.g. Europe/Berlin"),
+):
     user_id = require_user(authorization)
 
-    return ProgressOverview(
+    store = get_progress_store()
+    tz = valid_timezone(x_timezone)
+    if tz:
+        store.set_timezone(user_id, tz)
+    problems_completed, total_attempts, streak = store.overview(user_id)
+    skills = get_skill_engine()
+    await skills.hydrate(user_id)
+    ranked = sorted(skills.profile(user_id), key=lambda s: s.score, reverse=True)
+
+    overview = ProgressOverview(
         user_id=user_id,
         generated_at=now_iso(),
-        problems_completed=0,
-        total_attempts=0,
-        current_streak_days=0,
-        strongest_topics=[Topic.arrays_strings],
-        weakest_topics=[Topic.dp, Topic.graphs],
+        problems_completed=problems_completed,
+        total_attempts=total_attempts,
+        current_streak_days=streak,
+        strongest_topics=[s.topic for s in ranked if s.score >= 0.5][:3],
+        weakest_topics=[s.topic for s in reversed(ranked) if s.score < 0.5][:3],
     )
+    return FastJSONResponse(overview)
@@ -1,53 +1,34 @@
-from uuid import uuid4
 from fastapi import APIRouter, Header, Query
 
 from backend.core.auth import require_user
-from backend.models.schemas import RoadmapResponse, RoadmapItem, Topic, Difficulty, now_iso
+from backend.core.config import get_settings
+from backend.core.responses import FastJSONResponse, cached_json_response
+from backend.core.roadmap_store import get_roadmap_store
+from backend.core.skills import get_skill_engine
+from backend.database.repositories import get_repositories
+from backend.models.schemas import RoadmapResponse
 
 router = APIRouter(prefix="/roadmap", tags=["roadmap"])
 
+# Per user: browsers may keep it but must revalidate (cheap, via ETag); shared caches must not store it
+ROADMAP_CACHE_CONTROL = "private, no-cache"
+
 @router.get("", response_model=RoadmapResponse)
-def get_roadmap(authorization: str | None = Header(default=None), limit: int = Query(default=20, ge=1, le=100)):
+async def get_roadmap(
+    authorization: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+):
     user_id = require_user(authorization)
+    await get_skill_engine().hydrate(user_id)
 
-    items = []
-    for _ in range(min(limit, 6)):
-        items.append(
-            RoadmapItem(
-                item_id=uuid4(),
-                topic=Topic.hashing,
-                difficulty=Difficulty.easy,
-                problem_id="two-sum",
-                title="Two Sum",
-                rationale="Build fundamentals in hashing and lookup patterns.",
-                status="todo",
-            )
-        )
-
-    return RoadmapResponse(user_id=user_id, generated_at=now_iso(), items=items)
+    return cached_json_response(get_roadmap_store().get_json(user_id, limit), if_none_match, ROADMAP_CACHE_CONTROL)
 
 @router.post("/refresh", response_model=RoadmapResponse)
-def refresh_roadmap(authorization: str | None = Header(default=None)):
+async def refresh_roadmap(authorization: str | None = Header(default=None)):
     user_id = require_user(authorization)
+    await get_skill_engine().hydrate(user_id)
 
-    items = [
-        RoadmapItem(
-            item_id=uuid4(),
-            topic=Topic.dp,
-            difficulty=Difficulty.medium,
-            problem_id="house-robber",
-            title="House Robber",
-            rationale="DP weakness detected; build state transitions + optimal substructure intuition.",
-            status="todo",
-        ),
-        RoadmapItem(
-            item_id=uuid4(),
-            topic=Topic.trees,
-            difficulty=Difficulty.medium,
-            problem_id="binary-tree-level-order",
-            title="Binary Tree Level Order Traversal",
-            rationale="Practice BFS/queue + structural reasoning.",
-            status="todo",
-        ),
-    ]
-    return RoadmapResponse(user_id=user_id, generated_at=now_iso(), items=items)
+    roadmap = get_roadmap_store().refresh(user_id, get_settings().roadmap_size)
+    await get_repositories().roadmaps.save(roadmap)
+    return FastJSONResponse(roadmap)
@@ -0,0 +1,54 @@
+"""
+Shared fixtures: the app runs in-process on the in-memory repositories, with
+dev JWT keys and the fake Ollama server (backend.dev.fake_ollama) as its LLM.
+"""
+
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.core.config import get_settings
+from backend.dev.fake_ollama import start_fake_ollama
+from backend.dev.tokens import mint_token
+
+DEV_DIR = Path(__file__).resolve().parent.parent / "dev"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def environment(tmp_path_factory):
+    server, url = start_fake_ollama(token_delay=0.0)
+    os.environ.update({
+        "OLLAMA_URL": url,
+        "SUPABASE_JWKS_FILE": str(DEV_DIR / "jwks.json"),
+        "STARTUP_WARMUP": "off",
+        "RATE_LIMIT_STORE": "memory",
+        "EVENTLOG_DIR": str(tmp_path_factory.mktemp("eventlog")),
+    })
+    os.environ.pop("DATABASE_URL", None)
+    get_settings.cache_clear()
+    yield
+    server.shutdown()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    from backend.main import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as c:
+            yield c
+
+
+@pytest.fixture
+def auth():
+    """auth(user_id) -> headers carrying a dev token for that user."""
+    return lambda user_id: {"Authorization": f"Bearer {mint_token(user_id)}"}
@@ -0,0 +1,56 @@
+import pytest
+
+from backend.core.responses import CachedBody, cached_json_response, etag_matches
+
+
+def test_etag_is_stable_and_content_addressed():
+    assert CachedBody({"a": 1}).etag == CachedBody({"a": 1}).etag
+    assert CachedBody({"a": 1}).etag != CachedBody({"a": 2}).etag
+
+
+@pytest.mark.parametrize(
+    "header, matches",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('"{etag}"', True),
+        ('W/"{etag}"', True),
+        ('"other", "{etag}"', True),
+        ('"other"', False),
+    ],
+)
+def test_if_none_match(header, matches):
+    etag = CachedBody([1, 2, 3]).etag.strip('"')
+    assert etag_matches(header.format(etag=etag) if header else header, f'"{etag}"') is matches
+
+
+def test_cached_json_response():
+    cached = CachedBody({"ok": True})
+    full = cached_json_response(cached, None, "public, max-age=60")
+    assert full.status_code == 200 and full.body == cached.body
+    assert full.headers["ETag"] == cached.etag and full.headers["Cache-Control"] == "public, max-age=60"
+    not_modified = cached_json_response(cached, cached.etag, "public, max-age=60")
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["ETag"] == cached.etag
+
+
+@pytest.mark.anyio
+async def test_problem_detail_revalidates(client, auth):
+    headers = auth("etag-user")
+    first = await client.get("/problems/two-sum", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    again = await client.get("/problems/two-sum", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    changed = await client.get("/problems/two-sum", headers={**headers, "If-None-Match": '"stale"'})
+    assert changed.status_code == 200 and changed.json()["problem_id"] == "two-sum"
+
+
+@pytest.mark.anyio
+async def test_roadmap_revalidates(client, auth):
+    headers = auth("etag-roadmap-user")
+    first = await client.get("/roadmap", headers=headers)
+    assert first.status_code == 200
+    again = await client.get("/roadmap", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
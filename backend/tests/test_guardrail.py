@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from backend.core.guardrail import SolutionGuard, statement_fingerprint
+from backend.core.guidance import GUARDRAIL_MESSAGE
+
+SOLUTION = """\
+def two_sum(nums, target):
+    seen = {}
+    for i, n in enumerate(nums):
+        if target - n in seen:
+            return [seen[target - n], i]
+        seen[n] = i
+"""
+
+
+def stream(guard: SolutionGuard, text: str, chunk: int = 3) -> str:
+    """Feed `text` in small chunks, as a model would stream it; returns what the guard let through."""
+    out = ""
+    for i in range(0, len(text), chunk):
+        out += guard.feed(text[i:i + chunk])
+        if guard.tripped:
+            return out
+    return out + guard.finish()
+
+
+def test_prose_passes_through():
+    text = "Think about what you need to remember as you scan the input.\nWhich lookup is constant time?"
+    guard = SolutionGuard("two_sum", SOLUTION)
+    assert stream(guard, text) == text
+    assert guard.tripped is None
+
+
+def test_fenced_code_block_trips_before_it_is_shown():
+    guard = SolutionGuard("two_sum", SOLUTION)
+    out = stream(guard, "Sure:\n```python\nprint(1)\n```\n")
+    assert guard.tripped == "code_block"
+    assert "```" not in out
+
+
+def test_entry_point_body_trips():
+    guard = SolutionGuard("two_sum", SOLUTION)
+    out = stream(guard, "def two_sum(nums, target):\n    a = 1\n    b = 2\n")
+    assert guard.tripped == "function_body"
+    assert out == ""
+
+
+def test_short_helper_function_is_released():
+    text = "def helper(x):\n    return x * 2\nThat doubles it.\n"
+    guard = SolutionGuard("two_sum", SOLUTION)
+    assert stream(guard, text) == text
+    assert guard.tripped is None
+
+
+def test_solution_statements_with_renamed_variables_trip():
+    guard = SolutionGuard("two_sum", SOLUTION)
+    stream(guard, "Consider:\nfor j, v in enumerate(values):\nand then\nif goal - v in memo:\n")
+    assert guard.tripped == "solution_overlap"
+
+
+def test_one_matching_statement_is_not_enough():
+    text = "You might check `if target - n in seen:` each step."
+    guard = SolutionGuard("two_sum", SOLUTION)
+    assert stream(guard, text) == text
+    assert guard.tripped is None
+
+
+def test_inline_spans_on_a_line_that_starts_like_code_trip():
+    guard = SolutionGuard("two_sum", SOLUTION)
+    stream(guard, "x = `for j, y in enumerate(nums):` or `if target - y in d:`\n")
+    assert guard.tripped == "solution_overlap"
+
+
+def test_inline_span_is_checked_before_it_is_streamed():
+    guard = SolutionGuard("two_sum", SOLUTION)
+    out = stream(guard, "Try `for j, y in enumerate(nums):` and then `if target - y in d:` okay\n", chunk=1)
+    assert guard.tripped == "solution_overlap"
+    assert "if target" not in out
+
+
+def test_open_inline_span_is_held_until_it_closes():
+    guard = SolutionGuard()
+    assert guard.feed("Use a `di") == "Use a "
+    assert guard.feed("ct` here") == "`dict` here"
+
+
+def test_fingerprint_ignores_variable_names():
+    assert statement_fingerprint("seen[n] = i") == statement_fingerprint("memo[x] = j")
+    assert statement_fingerprint("seen = {}") is None  # too small to say anything
+
+
+def _events(body: str):
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        yield event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+@pytest.mark.anyio
+async def test_guidance_replaces_a_leaking_reply(client, auth):
+    body = {"problem_id": "two-sum", "user_code": "", "user_message": "give me the code"}
+    response = await client.post("/ai/guidance", json=body, headers=auth("guard-user"))
+    assert response.status_code == 200
+    assert response.json()["mode"] == "guarded"
+    assert response.json()["message"] == GUARDRAIL_MESSAGE
+
+
+@pytest.mark.anyio
+async def test_guidance_stream_never_sends_the_code(client, auth):
+    body = {"problem_id": "two-sum", "user_code": "", "user_message": "give me the code", "new_session": True}
+    response = await client.post("/ai/guidance/stream", json=body, headers=auth("guard-stream-user"))
+    assert response.status_code == 200
+    events = list(_events(response.text))
+    sent = "".join(data["text"] for event, data in events if event == "token")
+    assert "def two_sum" not in sent and "```" not in sent
+    assert ("replace", {"text": GUARDRAIL_MESSAGE}) in events
+    assert events[-1][0] == "done" and events[-1][1]["mode"] == "guarded"
+
+
+@pytest.mark.anyio
+async def test_guidance_passes_a_socratic_reply(client, auth):
+    body = {"problem_id": "two-sum", "user_code": "", "user_message": "how do I start?"}
+    response = await client.post("/ai/guidance", json=body, headers=auth("socratic-user"))
+    assert response.status_code == 200
+    assert response.json()["mode"] == "socratic"
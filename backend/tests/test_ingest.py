@@ -0,0 +1,81 @@
+import json
+
+from backend.core.catalog_file import CatalogFile
+from backend.ingest.pipeline import normalize, process_source, run_import, validate
+
+
+def problem(title: str, **fields) -> dict:
+    return {"title": title, "topic": "arrays", "difficulty": "Easy", "statement": "Do the thing.", **fields}
+
+
+def write_jsonl(path, lines) -> None:
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+
+
+def test_normalize_canonicalizes_fields():
+    record = normalize(problem("  Two   Sum ", topic="Hash Table", constraints=[" 1 <= n ", ""]), "bank")
+    assert record["problem_id"] == "two-sum" and record["title"] == "Two Sum"
+    assert record["topic"] == "hashing" and record["difficulty"] == "easy"
+    assert record["constraints"] == ["1 <= n"] and record["source"] == "bank"
+    assert validate(record) is None
+
+
+def test_validate_reports_what_is_wrong():
+    assert "unknown topic" in validate(normalize(problem("A", topic="astrology"), "s"))
+    assert "entry_point" in validate(normalize(problem("A", tests=[{"input": [1], "output": 1}]), "s"))
+    assert "'input' and 'output'" in validate(normalize(problem("A", entry_point="f", tests=[{"input": [1]}]), "s"))
+
+
+def test_bad_lines_reject_only_themselves(tmp_path):
+    source = tmp_path / "bank.jsonl"
+    write_jsonl(source, [
+        problem("Good One"),
+        "{not json",
+        [1, 2],
+        problem("Bad Examples", examples=5),
+        problem("Bad Tests", tests="none"),
+        problem("Null Constraints", constraints=None),
+        problem("Unknown Topic", topic="astrology"),
+        problem("Good Two"),
+    ])
+    result = process_source(str(source))
+    assert [entry.problem_id for _, entry in result.records] == ["good-one", "null-constraints", "good-two"]
+    assert [error.split(": ", 1)[0] for error in result.errors] == [f"{source}:{n}" for n in (2, 3, 4, 5, 7)]
+    assert "invalid JSON" in result.errors[0]
+    assert "expected a JSON object" in result.errors[1]
+    assert "'examples' must be a list" in result.errors[2]
+
+
+def test_markdown_source(tmp_path):
+    source = tmp_path / "two-sum.md"
+    source.write_text(
+        "---\ntitle: Two Sum\ntopic: hashing\ndifficulty: easy\nentry_point: two_sum\n---\n"
+        "Return the indices of two numbers adding up to target.\n\n"
+        "## Constraints\n- 2 <= len(nums)\n"
+        '## Tests\n```json\n[{"input": [[2, 7], 9], "output": [0, 1]}]\n```\n'
+    )
+    result = process_source(str(source))
+    assert result.errors == []
+    (_, entry), = result.records
+    record = json.loads(entry.blob)
+    assert record["problem_id"] == "two-sum" and record["constraints"] == ["2 <= len(nums)"]
+    assert record["tests"] == [{"input": [[2, 7], 9], "output": [0, 1]}]
+
+
+def test_run_import_dedupes_and_reuses_unchanged_sources(tmp_path):
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    write_jsonl(sources / "a.jsonl", [problem("Alpha"), problem("Beta")])
+    write_jsonl(sources / "b.jsonl", [problem("Alpha"), problem("Beta", statement="Different.")])
+    output = tmp_path / "catalog.osc"
+
+    report = run_import([sources], output, workers=1)
+    assert (report.sources, report.reprocessed, report.problems, report.duplicates) == (2, 2, 2, 1)
+    assert len(report.conflicts) == 1 and report.conflicts[0].startswith("beta:")
+    catalog = CatalogFile(output)
+    assert catalog.ids == ["alpha", "beta"]
+    catalog.close()
+
+    write_jsonl(sources / "b.jsonl", [problem("Gamma")])
+    report = run_import([sources], output, workers=1)
+    assert (report.reprocessed, report.problems, report.duplicates, report.conflicts) == (1, 3, 0, [])
@@ -0,0 +1,89 @@
+import pytest
+
+from backend.core import ratelimit
+from backend.core.ratelimit import (
+    MemoryStore, Quota, RateLimiter, SlidingWindow, SQLiteStore, TokenBucket, parse_policies
+)
+
+DAY = 86400.0
+
+
+def run(policy, times, cost=1):
+    """Apply `policy` at each of `times`, threading its state; returns the decisions."""
+    state, decisions = None, []
+    for now in times:
+        new_state, decision = policy.apply(state, now, cost)
+        if decision.allowed:
+            state = new_state
+        decisions.append(decision)
+    return decisions
+
+
+def test_token_bucket_absorbs_a_burst_then_refills():
+    bucket = TokenBucket(3, 60.0)
+    decisions = run(bucket, [0.0, 0.0, 0.0, 0.0])
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[3].retry_after == pytest.approx(20.0)
+    assert run(bucket, [0.0, 0.0, 0.0, 20.0])[3].allowed
+
+
+def test_sliding_window_weights_the_previous_window():
+    window = SlidingWindow(10, 60.0)
+    state = None
+    for _ in range(10):
+        state, decision = window.apply(state, 59.0, 1)
+        assert decision.allowed
+    # A quarter into the next window, 3/4 of the previous count still applies: 7.5 used
+    _, decision = window.apply(state, 75.0, 3)
+    assert not decision.allowed and decision.retry_after > 0
+    _, decision = window.apply(state, 75.0, 2)
+    assert decision.allowed
+    # Two windows later nothing is left
+    _, decision = window.apply(state, 181.0, 10)
+    assert decision.allowed
+
+
+def test_quota_resets_at_the_period_boundary():
+    quota = Quota(2, DAY)
+    decisions = run(quota, [10.0, 20.0, 30.0, DAY + 1])
+    assert [d.allowed for d in decisions] == [True, True, False, True]
+    assert decisions[2].retry_after == pytest.approx(DAY - 30.0)
+
+
+def test_parse_policies():
+    bucket, window, quota = parse_policies("bucket:10/1m, window:30/5m,quota:300/1d")
+    assert (type(bucket), bucket.limit, bucket.period) == (TokenBucket, 10, 60)
+    assert (type(window), window.limit, window.period) == (SlidingWindow, 30, 300)
+    assert (type(quota), quota.limit, quota.period) == (Quota, 300, 86400)
+    assert parse_policies("") == ()
+    with pytest.raises(ValueError):
+        parse_policies("bucket:10/minute")
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_rejected_requests_are_not_charged(kind, tmp_path):
+    store = MemoryStore() if kind == "memory" else SQLiteStore(tmp_path / "limits.sqlite3")
+    limiter = RateLimiter(store, {"guidance": parse_policies("bucket:2/1h,quota:3/1d")})
+    allowed = [all(d.allowed for _, d in limiter.check("guidance", "u")) for _ in range(4)]
+    assert allowed == [True, True, False, False]
+    # Only the first two were charged to the quota: it would still admit this one, as its last
+    _, quota = limiter.check("guidance", "u")[1]
+    assert quota.allowed and quota.remaining == 0
+    assert limiter.check("attempts", "u") is None  # not limited
+    assert all(d.allowed for _, d in limiter.check("guidance", "someone-else"))
+
+
+@pytest.mark.anyio
+async def test_guidance_answers_429_with_headers(client, auth, monkeypatch):
+    limiter = RateLimiter(MemoryStore(), {"guidance": parse_policies("bucket:2/1m")})
+    monkeypatch.setattr(ratelimit, "_limiter", limiter)
+    body = {"problem_id": "two-sum", "user_code": "", "user_message": "hint please"}
+    headers = auth("limited-user")
+    ok = [await client.post("/ai/guidance", json=body, headers=headers) for _ in range(2)]
+    assert [r.status_code for r in ok] == [200, 200]
+    assert ok[0].headers["RateLimit-Limit"] == "2" and ok[0].headers["RateLimit-Remaining"] == "1"
+    assert ok[0].headers["RateLimit-Policy"] == "2;w=60"
+    rejected = await client.post("/ai/guidance", json=body, headers=headers)
+    assert rejected.status_code == 429
+    assert rejected.headers["RateLimit-Remaining"] == "0"
+    assert int(rejected.headers["Retry-After"]) >= 1